@@ -0,0 +1,85 @@
+"""
+Benchmark de concurrencia del camino async (`/start_game` + `/submit_answer`).
+
+Corre N partidas completas en paralelo contra `app_api` usando un LLM falso con
+latencia inyectada. Compara dos modos:
+
+- `async`: todas las requests en vuelo a la vez (endpoints `async def` + `ainvoke`).
+- `threadpool-sim`: SIMULACIÓN de los endpoints síncronos anteriores. No corre esos
+  handlers (los nodos ya son async): usa los mismos endpoints async y limita del lado
+  del cliente a 40 requests en vuelo con un `Semaphore`, el tamaño por defecto del
+  threadpool de AnyIO. Acota el techo de concurrencia, pero no mide el costo de los
+  hilos ni del `invoke` síncrono.
+
+El LLM falso no tiene cuota, así que el governor se abre (`LLM_MAX_CONCURRENT` y
+`LLM_QUEUE_SIZE` altos) para medir solo la concurrencia de los endpoints; con los
+valores por defecto (16 + 64) más de 80 llamadas al LLM a la vez reciben 429. Se
+puede fijar otro límite exportando esas variables antes de correrlo.
+
+Uso:
+    python -m benchmarks.bench_async --players 200 --latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import prepare_env, percentile, fmt_ms
+
+prepare_env()
+os.environ.setdefault("LLM_MAX_CONCURRENT", "10000")
+os.environ.setdefault("LLM_QUEUE_SIZE", "10000")
+
+import httpx  # noqa: E402
+
+from benchmarks.stub_llm import StubChatModel  # noqa: E402
+from src.llm import set_llm  # noqa: E402
+from src.api import app_api  # noqa: E402
+from src.config import settings  # noqa: E402
+
+ANYIO_DEFAULT_THREADS = 40
+
+
+async def play(client, gate, player_id: int, latencies: list):
+    async def call(path, payload):
+        async with gate:
+            start = time.perf_counter()
+            res = await client.post(path, json=payload)
+            latencies.append(time.perf_counter() - start)
+        res.raise_for_status()
+        return res.json()
+
+    data = await call("/start_game", {"player_name": f"bot-{player_id}", "topic": "Benchmark"})
+    for _ in range(settings.MAX_QUESTIONS):
+        data = await call("/submit_answer", {"session_id": data["session_id"], "user_answer": "x"})
+
+
+async def run(mode: str, players: int):
+    # Simulación del threadpool: el límite es un semáforo del cliente, no hilos reales
+    gate = asyncio.Semaphore(ANYIO_DEFAULT_THREADS if mode == "threadpool-sim" else players)
+    latencies: list = []
+    transport = httpx.ASGITransport(app=app_api)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(play(client, gate, i, latencies) for i in range(players)))
+        elapsed = time.perf_counter() - start
+    turns = players * (settings.MAX_QUESTIONS + 1)
+    print(
+        f"{mode:>14} | {players} partidas | {elapsed:6.2f} s | {turns / elapsed:7.1f} req/s"
+        f" | p50 {fmt_ms(percentile(latencies, 50))} | p99 {fmt_ms(percentile(latencies, 99))}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5, help="Latencia del LLM falso (s)")
+    args = parser.parse_args()
+
+    set_llm(StubChatModel(latency=args.latency))
+    for mode in ("threadpool-sim", "async"):
+        asyncio.run(run(mode, args.players))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark de escritura del Audit Log (filas/s).
+
+- `two_commits`: el esquema anterior (insert + commit, luego get/+=/commit del puntaje).
+- `single_tx`:   `record_answer`, log + UPDATE atómico en una transacción.
+- `write_behind`: `AuditWriter`, cola con group commit en un hilo de fondo.
+
+Cada modo se corre con N hilos escritores concurrentes (como los turnos de la API).
+
+Uso:
+    python -m benchmarks.bench_audit_log --rows 2000 --writers 8
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import prepare_env
+
+prepare_env()
+
+from sqlmodel import Session  # noqa: E402
+
+from src.models import (  # noqa: E402
+    AuditWriter, GameSession, QuestionLog, create_session, engine, init_db, record_answer
+)
+
+
+def _log(session_id: int) -> QuestionLog:
+    return QuestionLog(
+        session_id=session_id, question_text="¿Pregunta?", correct_answer="respuesta",
+        user_answer="respuesta", is_correct=True, feedback="¡Correcto!", score_awarded=10
+    )
+
+
+def two_commits(log: QuestionLog):
+    session_id, points = log.session_id, log.score_awarded
+    with Session(engine) as session:
+        session.add(log)
+        session.commit()
+    with Session(engine) as session:
+        game = session.get(GameSession, session_id)
+        game.total_score += points
+        session.add(game)
+        session.commit()
+
+
+def run(mode: str, rows: int, writers: int, sessions: list) -> float:
+    writer = AuditWriter(batch_size=200, flush_interval=0.01) if mode == "write_behind" else None
+    write = {"two_commits": two_commits, "single_tx": record_answer}.get(mode) or writer.submit
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        list(pool.map(lambda i: write(_log(sessions[i % len(sessions)])), range(rows)))
+    if writer is not None:
+        writer.close()  # incluye el flush: medimos hasta que todo esté en disco
+    return rows / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--sessions", type=int, default=100)
+    args = parser.parse_args()
+
+    init_db()
+    sessions = [create_session(f"bench-{i}") for i in range(args.sessions)]
+    print(f"{args.rows} filas, {args.writers} escritores, {args.sessions} sesiones\n")
+    for mode in ("two_commits", "single_tx", "write_behind"):
+        print(f"{mode:>13}: {run(mode, args.rows, args.writers, sessions):9.0f} filas/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark de contención de locks en SQLite: perfil `default` vs. `tuned`.
+
+N hilos escritores registran respuestas (`record_answer`) mientras M hilos lectores
+consultan el leaderboard, como pasa con la API bajo carga. Se reporta throughput,
+latencia de escritura y errores "database is locked".
+
+Uso:
+    python -m benchmarks.bench_db_engine --writers 8 --readers 4 --seconds 5
+"""
+import argparse
+import threading
+import time
+
+from benchmarks.common import prepare_env, percentile, fmt_ms
+
+tmp_dir = prepare_env()
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlmodel import Session, SQLModel, desc, select  # noqa: E402
+
+from src.config import settings  # noqa: E402
+from src.models import GameSession, QuestionLog, _score_increment, make_engine  # noqa: E402
+
+
+def run(profile: str, writers: int, readers: int, seconds: float, sessions: int):
+    config = settings.model_copy(update={
+        "DB_NAME": str(tmp_dir / f"{profile}.db"),
+        "DB_SQLITE_PROFILE": profile,
+    })
+    engine = make_engine(config)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        games = [GameSession(player_name=f"bench-{i}") for i in range(sessions)]
+        session.add_all(games)
+        session.commit()
+        ids = [game.id for game in games]
+
+    stop = threading.Event()
+    write_latencies, reads, errors = [], [0], [0]
+    lock = threading.Lock()
+
+    def writer(n: int):
+        i = n
+        while not stop.is_set():
+            session_id = ids[i % len(ids)]
+            i += writers
+            start = time.perf_counter()
+            try:
+                with Session(engine) as session:
+                    session.add(QuestionLog(
+                        session_id=session_id, question_text="¿Pregunta?", correct_answer="a",
+                        user_answer="a", is_correct=True, feedback="ok", score_awarded=10
+                    ))
+                    session.exec(_score_increment(session_id, 10))
+                    session.commit()
+            except OperationalError:
+                with lock:
+                    errors[0] += 1
+                continue
+            with lock:
+                write_latencies.append(time.perf_counter() - start)
+
+    def reader():
+        while not stop.is_set():
+            try:
+                with Session(engine) as session:
+                    session.exec(select(GameSession).order_by(desc(GameSession.total_score)).limit(5)).all()
+            except OperationalError:
+                with lock:
+                    errors[0] += 1
+                continue
+            with lock:
+                reads[0] += 1
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    print(
+        f"{profile:>8}: {len(write_latencies) / seconds:7.0f} escrituras/s "
+        f"{reads[0] / seconds:7.0f} lecturas/s  "
+        f"p50 {fmt_ms(percentile(write_latencies, 50))}  p99 {fmt_ms(percentile(write_latencies, 99))}  "
+        f"errores {errors[0]}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--sessions", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{args.writers} escritores, {args.readers} lectores, {args.seconds:.0f} s\n")
+    for profile in ("default", "tuned"):
+        run(profile, args.writers, args.readers, args.seconds, args.sessions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Recall y latencia del índice de preguntas repetidas (`src/dedup.py`) con 100k preguntas.
+
+Arma un tema con `--stored` preguntas sintéticas distintas (plantillas de trivia por
+entidades inventadas) y consulta:
+
+- repetidas: `--queries` preguntas guardadas reescritas como lo haría el LLM (otro
+  saludo del anfitrión, minúsculas, sin tildes, "¿Cuál es" -> "¿Qué es").
+  Recall = proporción detectada como repetida.
+- nuevas: `--queries` preguntas de entidades que no están en el índice. Falsos
+  positivos = proporción marcada como repetida.
+
+Compara el modo exacto (fuerza bruta) con LSH: recall, falsos positivos, latencia
+por consulta (embedding incluido) y cuántas veces LSH encuentra la misma vecina que
+el exacto entre las que el exacto marca como repetidas.
+
+Uso:
+    python -m benchmarks.bench_dedup --stored 100000 --queries 1000
+"""
+import argparse
+import random
+import time
+import unicodedata
+
+from benchmarks.common import percentile, fmt_ms
+from src.dedup import QuestionIndex
+
+TEMPLATES = [
+    "¿En qué año se lanzó {x}?",
+    "¿Quién creó {x}?",
+    "¿Qué empresa desarrolló {x}?",
+    "¿Cuál es el personaje principal de {x}?",
+    "¿En qué país nació {x}?",
+    "¿Cuál es la capital de {x}?",
+    "¿Cómo se llama la mascota de {x}?",
+    "¿De qué color es el logo de {x}?",
+    "¿Cuántos títulos ganó {x}?",
+    "¿Qué instrumento tocaba {x}?",
+]
+PREFIXES = ["", "¡Pregunta rápida! ", "Atención, gamers: ", "A ver si sabés esta: ", "Para 10 puntos: "]
+SYLLABLES = [c + v for c in "bcdfgklmnprstvz" for v in "aeiou"] + ["tal", "dor", "van", "sel", "fex", "gon"]
+
+
+def _entity(rng: random.Random) -> str:
+    return " ".join("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+                    for _ in range(rng.randint(1, 2)))
+
+
+def _rewrite(question: str, rng: random.Random) -> str:
+    """Reescritura superficial, como cuando el LLM repite una pregunta con otras palabras."""
+    text = question.replace("¿Cuál es", "¿Qué es") if rng.random() < 0.5 else question
+    if rng.random() < 0.5:
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(ch for ch in text if not unicodedata.combining(ch) or ch == "\u0303")
+    if rng.random() < 0.3:
+        text = text.lower()
+    return rng.choice(PREFIXES[1:]) + text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stored", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    entities = set()
+    while len(entities) * len(TEMPLATES) < args.stored + args.queries:
+        entities.add(_entity(rng))
+    entities = sorted(entities)
+    rng.shuffle(entities)
+    fresh_entities, stored_entities = entities[:args.queries], entities[args.queries:]
+    stored = [t.format(x=e) for e in stored_entities for t in TEMPLATES][:args.stored]
+    duplicates = [_rewrite(q, rng) for q in rng.sample(stored, args.queries)]
+    fresh = [rng.choice(TEMPLATES).format(x=e) for e in fresh_entities]
+
+    indexes = {mode: QuestionIndex(capacity=args.stored, threshold=args.threshold, mode=mode)
+               for mode in ("exact", "lsh")}
+    start = time.perf_counter()
+    for question in stored:
+        for index in indexes.values():
+            index.add("bench", question)
+    print(f"{args.stored} preguntas guardadas en {time.perf_counter() - start:.1f} s "
+          f"(umbral {args.threshold}); {args.queries} consultas de cada tipo\n")
+
+    nearest = {}
+    exact_hits = 0
+    print(f"{'modo':<7}{'recall':>8}{'falsos +':>10}{'p50':>11}{'p99':>11}{'candidatos':>12}{'misma vecina':>14}")
+    for mode, index in indexes.items():
+        latencies, found, false_positive, same = [], 0, 0, 0
+        for i, question in enumerate(duplicates + fresh):
+            start = time.perf_counter()
+            match = index.nearest("bench", question)
+            latencies.append(time.perf_counter() - start)
+            hit = match is not None and match[1] >= args.threshold
+            exact_hits += hit and mode == "exact"
+            if i < len(duplicates):
+                found += hit
+            else:
+                false_positive += hit
+            if mode == "exact":
+                nearest[i] = match
+            elif nearest[i][1] >= args.threshold:
+                # Recall del ANN: repetidas que el exacto encuentra y LSH también
+                same += match is not None and match[0] == nearest[i][0]
+        stats = index.stats()
+        print(f"{mode:<7}{found / len(duplicates):>8.1%}{false_positive / len(fresh):>10.1%}"
+              f"{fmt_ms(percentile(latencies, 50)):>11}{fmt_ms(percentile(latencies, 99)):>11}"
+              f"{stats['avg_candidates'] or args.stored:>12}"
+              f"{'' if mode == 'exact' else f'{same / max(1, exact_hits):.1%}':>14}")
+
+
+if __name__ == "__main__":
+    main()
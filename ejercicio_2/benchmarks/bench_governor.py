@@ -0,0 +1,91 @@
+"""
+Pico de tráfico contra un modelo con cuota: con y sin el governor de llamadas al LLM.
+
+El LLM falso acepta `--quota` llamadas simultáneas y falla las demás con un error de
+cuota (como el 429 de Vertex AI). `--players` jugadores piden `/start_game` a la vez
+con un tema libre (cada uno genera una pregunta con el LLM). Si reciben 429 esperan
+el Retry-After y reintentan, hasta `--retries` veces; ante un 500 reintentan en 1 s.
+
+- sin governor: todas las llamadas van directo al modelo
+- governor:     LLM_MAX_CONCURRENT = cuota, con cola acotada y 429 rápido
+
+Uso:
+    python -m benchmarks.bench_governor --players 200 --latency 0.5 --quota 8
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+import httpx
+
+from benchmarks.common import fmt_ms, percentile, stub_server
+
+
+async def _player(client, player_id: int, retries: int, result: dict):
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        attempt_start = time.perf_counter()
+        try:
+            res = await client.post("/start_game", json={"player_name": f"bot-{player_id}", "topic": "Pico de tráfico"})
+            status, retry_after = res.status_code, float(res.headers.get("Retry-After", 1))
+        except httpx.TransportError:
+            # Después de un 500 uvicorn cierra la conexión
+            status, retry_after = "conexión cortada", 1.0
+        result["responses"][status] += 1
+        result["attempt_latency"].setdefault(status, []).append(time.perf_counter() - attempt_start)
+        if status == 200:
+            result["ok_latency"].append(time.perf_counter() - start)
+            return
+        if attempt < retries:
+            await asyncio.sleep(retry_after)
+    result["gave_up"] += 1
+
+
+async def _drive(base_url: str, players: int, retries: int) -> dict:
+    result = {"responses": Counter(), "attempt_latency": {}, "ok_latency": [], "gave_up": 0}
+    limits = httpx.Limits(max_connections=players)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        await asyncio.gather(*(_player(client, i, retries, result) for i in range(players)))
+    return result
+
+
+def run(name: str, governor_env: dict, args):
+    env = {
+        "QUESTION_POOL_ENABLED": "false",
+        "STUB_LLM_LATENCY": str(args.latency),
+        "STUB_LLM_MAX_INFLIGHT": str(args.quota),
+        **governor_env,
+    }
+    with stub_server(env) as base_url:
+        result = asyncio.run(_drive(base_url, args.players, args.retries))
+        stats = httpx.get(f"{base_url}/stats").json()["llm_governor"]
+
+    ok = result["ok_latency"]
+    print(f"\n{name}")
+    print(f"  jugadores con partida: {len(ok)}/{args.players} (sin partida: {result['gave_up']})")
+    print(f"  respuestas por status: {dict(result['responses'])}")
+    for status, samples in result["attempt_latency"].items():
+        print(f"    {status}: p50 {fmt_ms(percentile(samples, 50))} | p99 {fmt_ms(percentile(samples, 99))}")
+    print(f"  hasta tener partida:   p50 {fmt_ms(percentile(ok, 50))} | p99 {fmt_ms(percentile(ok, 99))}")
+    print(f"  governor: cola máx {stats['max_queue_depth']}, espera p95 {stats['wait_ms']['p95']} ms, "
+          f"rechazos al entrar {stats['rejected_admission']}, en cola {stats['rejected_queue_full'] + stats['rejected_player_limit']}, "
+          f"timeouts {stats['timeouts']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5, help="Latencia del LLM falso (s)")
+    parser.add_argument("--quota", type=int, default=8, help="Llamadas simultáneas que acepta el modelo")
+    parser.add_argument("--queue", type=int, default=32, help="LLM_QUEUE_SIZE del governor")
+    parser.add_argument("--retries", type=int, default=3)
+    args = parser.parse_args()
+
+    unlimited = str(args.players * 10)
+    run("sin governor", {"LLM_MAX_CONCURRENT": unlimited, "LLM_QUEUE_SIZE": unlimited}, args)
+    run("governor", {"LLM_MAX_CONCURRENT": str(args.quota), "LLM_QUEUE_SIZE": str(args.queue)}, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Deadline, reintentos y hedging (`src/resilience.py`) contra un LLM falso de cola pesada.
+
+La latencia del modelo sigue una Pareto (alpha 1.5, mínimo `--scale`): mediana ~0.24 s,
+p95 ~1.1 s y p99 ~3.2 s con los valores por defecto, más un `--fail-rate` de errores
+transitorios (503). Cada escenario hace `--calls` llamadas con `--concurrency` en
+vuelo, por el mismo camino que los nodos (`ainvoke_structured`).
+
+- sin política:      la llamada directa (un 503 o una respuesta lenta pegan de lleno)
+- deadline+retries:  deadline y reintentos con jitter, sin hedging
+- hedging p95:       además, copia de la llamada al pasar el p95 (presupuesto 5%)
+- hedging sin tope:  lo mismo sin presupuesto (muestra la carga extra que evita el tope)
+
+Uso:
+    python -m benchmarks.bench_hedging --calls 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import prepare_env, percentile, fmt_ms
+
+prepare_env()
+
+from benchmarks.stub_llm import StubChatModel  # noqa: E402
+from src.agents import QuestionSchema  # noqa: E402
+from src.llm import ainvoke_structured, set_llm  # noqa: E402
+from src.resilience import CallPolicy  # noqa: E402
+
+PROMPT = "El tema elegido es: Benchmark."
+
+
+async def _run(policy, calls: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                if policy is None:
+                    await ainvoke_structured(QuestionSchema, PROMPT)
+                else:
+                    await policy.run(lambda: ainvoke_structured(QuestionSchema, PROMPT))
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--scale", type=float, default=0.15, help="Latencia mínima de la Pareto (s)")
+    parser.add_argument("--alpha", type=float, default=1.5, help="Forma de la Pareto (menor = cola más pesada)")
+    parser.add_argument("--fail-rate", type=float, default=0.02)
+    parser.add_argument("--deadline", type=float, default=5.0)
+    args = parser.parse_args()
+
+    def policy(**kwargs):
+        return CallPolicy("bench", deadline=args.deadline, backoff_base=0.05, **kwargs)
+
+    scenarios = [
+        ("sin política", None),
+        ("deadline+retries", policy(hedge=False)),
+        ("hedging p95", policy(hedge_budget=0.05)),
+        ("hedging sin tope", policy(hedge_budget=1.0)),
+    ]
+    print(f"Pareto(alpha={args.alpha}, min={args.scale * 1000:.0f} ms), {args.fail_rate:.0%} de 503, "
+          f"deadline {args.deadline:g} s; {args.calls} llamadas, {args.concurrency} en vuelo\n")
+    print(f"{'escenario':<18}{'p50':>11}{'p95':>11}{'p99':>11}{'max':>11}{'errores':>9}{'llamadas extra':>16}")
+    for name, call_policy in scenarios:
+        stub = StubChatModel(latency=lambda rng: args.scale * rng.paretovariate(args.alpha), seed=7,
+                             fail_rate=args.fail_rate)
+        set_llm(stub)
+        latencies, errors = asyncio.run(_run(call_policy, args.calls, args.concurrency))
+        extra = (stub.requests - args.calls) / args.calls
+        print(f"{name:<18}{fmt_ms(percentile(latencies, 50)):>11}{fmt_ms(percentile(latencies, 95)):>11}"
+              f"{fmt_ms(percentile(latencies, 99)):>11}{fmt_ms(max(latencies)):>11}{errors:>9}{extra:>15.1%}")
+        if call_policy is not None:
+            stats = call_policy.stats()
+            print(f"{'':<18}reintentos {stats['retries']}, hedges {stats['hedges']} "
+                  f"(ganaron {stats['hedge_wins']}), deadline vencido {stats['deadline_exceeded']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Juez por lotes (`JUDGE_BATCH_WINDOW_MS`): throughput y costo de latencia de la ventana.
+
+Simula una sala: `--answers` respuestas ambiguas (todas van al Juez LLM, sin cache de
+veredictos) a `--questions` preguntas llegan repartidas al azar en `--spread` segundos.
+Para cada ventana (0 = un pedido por respuesta) mide:
+
+- llamadas al LLM y tamaño medio de lote;
+- respuestas rechazadas por el governor (429: cola del LLM llena);
+- throughput (respuestas evaluadas / tiempo total);
+- latencia por respuesta (desde que llega hasta el veredicto): p50 y p99.
+
+El LLM falso tarda `--latency` por pedido más `--item-latency` por respuesta del lote.
+
+Uso:
+    python -m benchmarks.bench_judge_batch --answers 500 --spread 1 --windows 0 10 25 50 100
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.common import prepare_env, percentile, fmt_ms
+
+prepare_env()
+
+from benchmarks.stub_llm import StubChatModel  # noqa: E402
+from src import agents  # noqa: E402
+from src.batching import MicroBatcher  # noqa: E402
+from src.config import settings  # noqa: E402
+from src.governor import LLMOverloaded  # noqa: E402
+from src.llm import set_llm  # noqa: E402
+
+
+async def run(window_ms: int, args) -> None:
+    llm = StubChatModel(latency=args.latency, item_latency=args.item_latency)
+    set_llm(llm)
+    agents.verdict_cache = None
+    agents.judge_batcher = MicroBatcher(
+        "judge", agents._judge_batch, window=window_ms / 1000, max_size=args.max_size
+    ) if window_ms > 0 else None
+
+    rng = random.Random(7)
+    arrivals = sorted(rng.uniform(0, args.spread) for _ in range(args.answers))
+    latencies, rejected = [], 0
+
+    async def answer(i: int, at: float):
+        nonlocal rejected
+        await asyncio.sleep(at)
+        start = time.perf_counter()
+        try:
+            await agents._llm_evaluation(f"Pregunta {i % args.questions}", "Respuesta", f"intento {i}", player=f"p{i}")
+        except LLMOverloaded:
+            rejected += 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(answer(i, at) for i, at in enumerate(arrivals)))
+    elapsed = time.perf_counter() - start
+    stats = agents.judge_batcher.stats() if agents.judge_batcher else {}
+    print(f"{window_ms:>8} ms{llm.calls:>9}{stats.get('avg_batch_size') or 1:>8}{rejected:>7}"
+          f"{len(latencies) / elapsed:>10.1f}/s{fmt_ms(percentile(latencies, 50)):>12}{fmt_ms(percentile(latencies, 99)):>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=1)
+    parser.add_argument("--spread", type=float, default=1.0, help="Segundos en los que llegan las respuestas")
+    parser.add_argument("--latency", type=float, default=0.5, help="Latencia base del LLM falso (s)")
+    parser.add_argument("--item-latency", type=float, default=0.01, help="Latencia extra por respuesta del lote (s)")
+    parser.add_argument("--max-size", type=int, default=settings.JUDGE_BATCH_MAX_SIZE)
+    parser.add_argument("--windows", type=int, nargs="+", default=[0, 10, 25, 50, 100])
+    args = parser.parse_args()
+
+    print(f"{args.answers} respuestas a {args.questions} pregunta(s) en {args.spread:.1f} s, LLM de "
+          f"{args.latency * 1000:.0f} ms + {args.item_latency * 1000:.0f} ms/respuesta, lote máx. {args.max_size}, "
+          f"LLM_MAX_CONCURRENT={settings.LLM_MAX_CONCURRENT}\n")
+    print(f"{'ventana':>11}{'llamadas':>9}{'lote':>8}{'429':>7}{'throughput':>12}{'p50':>12}{'p99':>12}")
+    for window_ms in args.windows:
+        asyncio.run(run(window_ms, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark de `/leaderboard` con muchas sesiones en la DB.
+
+1. Query original (`ORDER BY total_score DESC LIMIT 5`) sin índice: escaneo completo.
+2. Misma query con el índice del ranking (`total_score DESC, id`).
+3. Endpoint servido desde el top-N en memoria, y revalidación con ETag (304).
+
+Uso:
+    python -m benchmarks.bench_leaderboard --sessions 1000000
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+
+from benchmarks.common import prepare_env, percentile, fmt_ms
+
+prepare_env()
+
+import httpx  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from sqlmodel import Session, desc, select  # noqa: E402
+
+from src.api import app_api  # noqa: E402
+from src.models import GameSession, engine, init_db, top_scores, update_session_score  # noqa: E402
+
+INDEX = "ix_gamesession_score_id"
+
+
+def seed(sessions: int):
+    rng = random.Random(0)
+    now = datetime.utcnow().isoformat(sep=" ")
+    raw = engine.raw_connection()
+    try:
+        raw.execute(f"DROP INDEX IF EXISTS {INDEX}")
+        batch = 100_000
+        for start in range(0, sessions, batch):
+            rows = [(f"bot-{i}", rng.randrange(0, 31) * 10, now) for i in range(start, min(start + batch, sessions))]
+            raw.executemany("INSERT INTO gamesession (player_name, total_score, start_time) VALUES (?, ?, ?)", rows)
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def time_query(repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with Session(engine) as session:
+            session.exec(select(GameSession).order_by(desc(GameSession.total_score)).limit(5)).all()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def time_endpoint(requests: int, revalidate: bool) -> list:
+    samples = []
+    transport = httpx.ASGITransport(app=app_api)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        etag = (await client.get("/leaderboard")).headers["etag"]
+        headers = {"If-None-Match": etag} if revalidate else {}
+        for _ in range(requests):
+            start = time.perf_counter()
+            res = await client.get("/leaderboard", headers=headers)
+            samples.append(time.perf_counter() - start)
+            assert res.status_code == (304 if revalidate else 200)
+    return samples
+
+
+def report(label: str, samples: list):
+    print(f"{label:>28}: p50 {fmt_ms(percentile(samples, 50))}  p99 {fmt_ms(percentile(samples, 99))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    init_db()
+    start = time.perf_counter()
+    seed(args.sessions)
+    print(f"{args.sessions} sesiones cargadas en {time.perf_counter() - start:.1f} s\n")
+
+    report("query sin índice", time_query(10))
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE INDEX {INDEX} ON gamesession (total_score DESC, id)"))
+    report("query con índice", time_query(200))
+
+    top_scores.invalidate()
+    report("/leaderboard (memoria)", asyncio.run(time_endpoint(args.requests, revalidate=False)))
+    report("/leaderboard If-None-Match", asyncio.run(time_endpoint(args.requests, revalidate=True)))
+
+    samples = []
+    for i in range(200):
+        begin = time.perf_counter()
+        update_session_score(i + 1, 10)
+        samples.append(time.perf_counter() - begin)
+    report("update + top-N incremental", samples)
+
+
+if __name__ == "__main__":
+    main()
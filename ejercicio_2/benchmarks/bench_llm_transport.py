@@ -0,0 +1,106 @@
+"""
+Primer turno vs turnos siguientes contra un modelo local (`benchmarks.stub_vertex`).
+
+Usa el cliente real (ChatVertexAI + canal gRPC de `src.llm`); solo el servidor es falso.
+Cada escenario corre en procesos nuevos (un "deploy" por proceso): primero el arranque
+que hace la API en el lifespan, después el primer turno y `--turns` turnos más.
+
+Escenarios:
+- rebuild:       `with_structured_output` en cada turno y sin warm-up (código original)
+- cached:        runnables cacheados por schema, sin warm-up
+- warm-connect:  cached + LLM_WARMUP=connect
+- warm-request:  cached + LLM_WARMUP=request
+- reconnect:     cached, pero con una conexión nueva por turno (lo que pasa si la
+                 conexión ociosa se cae entre turnos y no hay keep-alive)
+
+`--connect-ms` emula en el stub el costo de una conexión nueva (TLS + token OAuth).
+
+Uso:
+    python -m benchmarks.bench_llm_transport --processes 8 --turns 50 --latency 0.05 --connect-ms 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import fmt_ms, percentile, prepare_env
+from benchmarks.stub_vertex import stub_vertex_server
+
+SCENARIOS = ["rebuild", "cached", "warm-connect", "warm-request", "reconnect"]
+WARMUP_MODE = {"warm-connect": "connect", "warm-request": "request"}
+PROMPT = "Genera una pregunta de trivia sobre Historia de la Tecnología."
+
+
+def child(scenario: str, turns: int):
+    """Corre en un proceso nuevo e imprime las latencias (segundos) como JSON."""
+    prepare_env()
+    os.environ["LLM_WARMUP"] = WARMUP_MODE.get(scenario, "off")
+    from src import llm
+    from src.agents import QuestionSchema, warm_llm
+
+    async def run():
+        # Arranque: lo mismo que hace el lifespan de la API antes de recibir tráfico
+        await asyncio.to_thread(warm_llm)
+        await llm.warm_up()
+
+        samples = []
+        for _ in range(turns + 1):
+            if scenario == "reconnect" and llm._channel is not None:
+                await llm._channel.close()
+                llm._channel_loop = None
+            start = time.perf_counter()
+            if scenario == "rebuild":
+                await llm.ensure_transport()
+                await llm.get_llm().with_structured_output(QuestionSchema).ainvoke(PROMPT)
+            else:
+                await llm.ainvoke_structured(QuestionSchema, PROMPT)
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    print(json.dumps(asyncio.run(run())))
+
+
+def run_scenario(scenario: str, endpoint: str, processes: int, turns: int):
+    env = {**os.environ, "LLM_API_ENDPOINT": endpoint, "LLM_API_INSECURE": "true"}
+    first, steady = [], []
+    for _ in range(processes):
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_llm_transport",
+             "--child", scenario, "--turns", str(turns)],
+            env=env, capture_output=True, text=True, check=True
+        )
+        samples = json.loads(result.stdout.strip().splitlines()[-1])
+        first.append(samples[0])
+        steady.extend(samples[1:])
+    return first, steady
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=8, help="Procesos (deploys) por escenario")
+    parser.add_argument("--turns", type=int, default=50, help="Turnos después del primero, por proceso")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latencia del modelo falso (s)")
+    parser.add_argument("--connect-ms", type=float, default=100, help="Costo emulado de una conexión nueva")
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.turns)
+        return
+
+    print(f"Modelo falso: {args.latency * 1000:.0f} ms por llamada, conexión nueva +{args.connect_ms:.0f} ms; "
+          f"{args.processes} procesos x (1 + {args.turns}) turnos\n")
+    print(f"{'escenario':<14}{'1er p50':>12}{'1er p99':>12}{'turno p50':>12}{'turno p99':>12}")
+    with stub_vertex_server(args.latency, args.connect_ms) as endpoint:
+        for scenario in args.scenarios:
+            first, steady = run_scenario(scenario, endpoint, args.processes, args.turns)
+            print(f"{scenario:<14}{fmt_ms(percentile(first, 50)):>12}{fmt_ms(percentile(first, 99)):>12}"
+                  f"{fmt_ms(percentile(steady, 50)):>12}{fmt_ms(percentile(steady, 99)):>12}")
+
+
+if __name__ == "__main__":
+    main()
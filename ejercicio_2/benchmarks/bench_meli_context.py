@@ -0,0 +1,89 @@
+"""
+Tamaño y diversidad del contexto de "MeLi Expert": bloque fijo vs. retrieval (`src/knowledge.py`).
+
+- Tamaño: caracteres y tokens aproximados (caracteres / 4) del bloque de contexto del
+  prompt: el bloque fijo que se usaba antes, toda la base de hechos pegada en el
+  prompt, y los `k` hechos recuperados por pregunta.
+- Diversidad: simula `--sessions` partidas de `--questions` preguntas. El LLM simulado
+  arma la pregunta sobre uno de los hechos de su contexto (el primero con retrieval,
+  uno al azar con el bloque fijo). Mide cuántos hechos distintos se preguntan en total,
+  la entropía normalizada del uso de hechos (1 = uniforme sobre toda la base) y las
+  preguntas que repiten un hecho dentro de la misma partida.
+
+Uso:
+    python -m benchmarks.bench_meli_context --sessions 500 --questions 10
+"""
+import argparse
+import math
+import random
+import time
+from collections import Counter
+
+from benchmarks.common import percentile, fmt_ms
+from src.config import settings
+from src.knowledge import load_knowledge
+
+# El bloque que iba fijo en todas las preguntas de "MeLi Expert" antes del retrieval
+STATIC_FACTS = [
+    "Fundador: Marcos Galperin (1999, garaje en Saavedra).",
+    "Ecosistema: Mercado Pago, Mercado Envíos (Full), Mercado Shops, Mercado Crédito.",
+    "Hitos: Cotiza en NASDAQ (MELI), es la empresa más valiosa de Latam.",
+    'Cultura: "Beta continuo", "Emprender tomando riesgos", logo del codo a codo en pandemia.',
+    "Colores: Amarillo (#FFE600) y Azul oscuro.",
+]
+HEADER = "CONTEXTO MERCADO LIBRE (basa la pregunta en estos datos):\n"
+
+
+def _block(facts) -> str:
+    return HEADER + "\n".join(f"    - {fact}" for fact in facts)
+
+
+def _entropy(counts: Counter, universe: int) -> float:
+    total = sum(counts.values())
+    return -sum(c / total * math.log(c / total) for c in counts.values()) / math.log(universe)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--k", type=int, default=settings.MELI_CONTEXT_CHUNKS)
+    args = parser.parse_args()
+
+    knowledge = load_knowledge(settings.MELI_KNOWLEDGE_INDEX, settings.MELI_KNOWLEDGE_DIR)
+    total = len(knowledge.texts)
+    rng = random.Random(7)
+
+    print(f"Base: {total} hechos en {knowledge.stats()['documents']} documentos\n")
+    print(f"{'contexto':<26}{'chars':>8}{'~tokens':>9}")
+    sizes = [("bloque fijo (antes)", len(_block(STATIC_FACTS))), ("base completa", len(_block(knowledge.texts)))]
+    for k in sorted({2, args.k}):
+        blocks = [len(_block(knowledge.sample(k))) for _ in range(200)]
+        sizes.append((f"retrieval k={k} (media)", round(sum(blocks) / len(blocks))))
+    for name, chars in sizes:
+        print(f"{name:<26}{chars:>8}{chars // 4:>9}")
+
+    print(f"\n{args.sessions} partidas de {args.questions} preguntas")
+    print(f"{'contexto':<26}{'hechos distintos':>18}{'entropía':>10}{'repetidos/partida':>19}{'p50 sample':>12}")
+    for name in ("bloque fijo (antes)", f"retrieval k={args.k}"):
+        knowledge = load_knowledge(settings.MELI_KNOWLEDGE_INDEX, settings.MELI_KNOWLEDGE_DIR)
+        used, repeats, latencies = Counter(), 0, []
+        for _ in range(args.sessions):
+            asked, facts = [], set()
+            for _ in range(args.questions):
+                if name.startswith("bloque"):
+                    fact = rng.choice(STATIC_FACTS)
+                else:
+                    start = time.perf_counter()
+                    fact = knowledge.sample(args.k, avoid=asked[-settings.PROMPT_HISTORY_SIZE:])[0]
+                    latencies.append(time.perf_counter() - start)
+                asked.append(f"¿{fact}?")
+                repeats += fact in facts
+                facts.add(fact)
+                used[fact] += 1
+        print(f"{name:<26}{len(used):>18}{_entropy(used, total):>10.2f}{repeats / args.sessions:>19.2f}"
+              f"{fmt_ms(percentile(latencies, 50)) if latencies else '-':>12}")
+
+
+if __name__ == "__main__":
+    main()
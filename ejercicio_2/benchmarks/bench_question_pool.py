@@ -0,0 +1,63 @@
+"""
+Benchmark de tiempo a la primera pregunta (`/start_game`) con y sin pool.
+
+- `live`: el pool está deshabilitado y cada partida genera su pregunta con el LLM.
+- `pool`: el pool del tema está pre-cargado y se repone en segundo plano.
+
+Uso:
+    python -m benchmarks.bench_question_pool --games 100 --latency 1.0
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import prepare_env, percentile, fmt_ms
+
+prepare_env()
+
+import httpx  # noqa: E402
+
+from benchmarks.stub_llm import StubChatModel  # noqa: E402
+from src import agents  # noqa: E402
+from src.llm import set_llm  # noqa: E402
+from src.api import app_api  # noqa: E402
+
+TOPIC = "MeLi Expert"
+
+
+async def run(mode: str, games: int, pool_size: int):
+    pool = agents.question_pool
+    pool.topics = {TOPIC} if mode == "pool" else set()
+    pool.max_size = pool_size
+    if mode == "pool":
+        await pool.refill(TOPIC)
+        pool.start()
+
+    latencies = []
+    transport = httpx.ASGITransport(app=app_api)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for i in range(games):
+            start = time.perf_counter()
+            res = await client.post("/start_game", json={"player_name": f"bot-{i}", "topic": TOPIC})
+            latencies.append(time.perf_counter() - start)
+            res.raise_for_status()
+            await asyncio.sleep(0.05)  # ritmo de llegada de jugadores
+    await pool.stop()
+    print(f"{mode:>5} | {games} partidas | p50 {fmt_ms(percentile(latencies, 50))}"
+          f" | p99 {fmt_ms(percentile(latencies, 99))} | hit rate pool {pool.stats()['hit_rate']:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=1.0, help="Latencia del LLM falso (s)")
+    parser.add_argument("--pool-size", type=int, default=50)
+    args = parser.parse_args()
+
+    set_llm(StubChatModel(latency=args.latency))
+    for mode in ("live", "pool"):
+        asyncio.run(run(mode, args.games, args.pool_size))
+
+
+if __name__ == "__main__":
+    main()
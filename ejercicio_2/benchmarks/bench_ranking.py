@@ -0,0 +1,121 @@
+"""
+Benchmark de posición (`/sessions/{id}/rank`) y paginación (`/leaderboard?offset=`).
+
+Para cada tamaño compara las consultas ingenuas (`COUNT(*)` de los que van adelante y
+`OFFSET` sobre el índice) contra el RankIndex en memoria + keyset sobre el índice compuesto.
+Los tamaños se cargan de forma incremental sobre la misma DB.
+
+Uso:
+    python -m benchmarks.bench_ranking --sizes 10000 1000000
+    python -m benchmarks.bench_ranking --sizes 10000 1000000 10000000   # ~1 GB de disco
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+
+from benchmarks.common import prepare_env, percentile, fmt_ms
+
+prepare_env()
+
+import httpx  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from src.api import app_api  # noqa: E402
+from src.models import (  # noqa: E402
+    engine, get_leaderboard_page, init_db, rank_index, top_scores, update_session_score
+)
+
+PAGE = 20
+
+
+def seed(start: int, stop: int, rng: random.Random):
+    now = datetime.utcnow().isoformat(sep=" ")
+    raw = engine.raw_connection()
+    try:
+        batch = 200_000
+        for first in range(start, stop, batch):
+            rows = [(f"bot-{i}", rng.randrange(0, 31) * 10, now) for i in range(first, min(first + batch, stop))]
+            raw.executemany("INSERT INTO gamesession (player_name, total_score, start_time) VALUES (?, ?, ?)", rows)
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def timed(fn, repeat: int) -> list:
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def naive_rank(session_id: int):
+    with engine.connect() as conn:
+        score = conn.execute(text("SELECT total_score FROM gamesession WHERE id = :id"), {"id": session_id}).scalar()
+        conn.execute(text(
+            "SELECT COUNT(*) FROM gamesession WHERE total_score > :s OR (total_score = :s AND id < :id)"
+        ), {"s": score, "id": session_id}).scalar()
+
+
+def naive_page(offset: int):
+    with engine.connect() as conn:
+        conn.execute(text(
+            "SELECT * FROM gamesession ORDER BY total_score DESC, id LIMIT :limit OFFSET :offset"
+        ), {"limit": PAGE, "offset": offset}).all()
+
+
+async def endpoint(paths: list) -> list:
+    samples = []
+    transport = httpx.ASGITransport(app=app_api)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in paths:
+            start = time.perf_counter()
+            res = await client.get(path)
+            samples.append(time.perf_counter() - start)
+            assert res.status_code == 200, res.text
+    return samples
+
+
+def report(label: str, samples: list):
+    print(f"  {label:>30}: p50 {fmt_ms(percentile(samples, 50))}  p99 {fmt_ms(percentile(samples, 99))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    init_db()
+    rng = random.Random(0)
+    loaded = 0
+    for size in sorted(args.sizes):
+        seed(loaded, size, rng)
+        loaded = size
+        top_scores.invalidate()
+        rank_index.invalidate()
+        print(f"\n{size:,} sesiones")
+
+        start = time.perf_counter()
+        len(rank_index)  # fuerza la carga
+        print(f"  {'carga del RankIndex':>30}: {time.perf_counter() - start:8.2f} s")
+        memory = rank_index.stats()["bytes"]
+        print(f"  {'memoria del RankIndex':>30}: {memory / 2**20:8.1f} MB ({memory / size:.1f} bytes/sesión)")
+
+        ids = [rng.randrange(1, size + 1) for _ in range(args.repeat)]
+        offsets = [rng.randrange(0, size - PAGE) for _ in range(args.repeat)]
+        report("rank: COUNT(*)", timed(lambda i: naive_rank(ids[i]), args.repeat))
+        report("rank: /sessions/{id}/rank", asyncio.run(endpoint([f"/sessions/{i}/rank" for i in ids])))
+        report("página: OFFSET", timed(lambda i: naive_page(offsets[i]), args.repeat))
+        report("página: keyset", timed(lambda i: get_leaderboard_page(offsets[i], PAGE), args.repeat))
+        report("página: /leaderboard?offset=", asyncio.run(endpoint(
+            [f"/leaderboard?offset={o}&limit={PAGE}" for o in offsets]
+        )))
+        report("update_session_score", timed(lambda i: update_session_score(ids[i], 10), args.repeat))
+
+
+if __name__ == "__main__":
+    main()
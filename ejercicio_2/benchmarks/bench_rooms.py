@@ -0,0 +1,89 @@
+"""
+Sala multijugador vs. partidas independientes (`POST /rooms` + `/start_game` con `room_id`).
+
+Corre `--players` jugadores a la vez contra `app_api` con un LLM falso de latencia
+fija, en dos modos:
+
+- `independientes`: cada jugador hace `/start_game` con el mismo tema (una partida y
+  una generación de pregunta por jugador y por ronda).
+- `sala`: se crea una sala y todos se unen; cada ronda se genera una vez.
+
+Cada jugador responde MAX_QUESTIONS turnos. Si la API devuelve 429 (governor del LLM
+saturado) el jugador espera `Retry-After` y repite, como el frontend; la latencia de
+un turno incluye esas esperas. Reporta llamadas al LLM, 429 y latencia de los turnos.
+
+Uso:
+    python -m benchmarks.bench_rooms --players 50 --latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import prepare_env, percentile, fmt_ms
+
+prepare_env()
+os.environ["QUESTION_POOL_ENABLED"] = "false"
+
+import httpx  # noqa: E402
+
+from benchmarks.stub_llm import StubChatModel  # noqa: E402
+from src.llm import set_llm  # noqa: E402
+from src.api import app_api  # noqa: E402
+from src.config import settings  # noqa: E402
+
+
+async def _call(client, path: str, payload: dict, latencies: list, rejected: list) -> dict:
+    start = time.perf_counter()
+    while True:
+        res = await client.post(path, json=payload)
+        if res.status_code != 429:
+            break
+        rejected.append(path)
+        await asyncio.sleep(float(res.headers.get("Retry-After", 1)))
+    latencies.append(time.perf_counter() - start)
+    res.raise_for_status()
+    return res.json()
+
+
+async def _play(client, player_id: int, join: dict, latencies: list, rejected: list):
+    data = await _call(client, "/start_game", {"player_name": f"bot-{player_id}", **join}, latencies, rejected)
+    for _ in range(settings.MAX_QUESTIONS):
+        data = await _call(client, "/submit_answer", {"session_id": data["session_id"], "user_answer": "x"},
+                           latencies, rejected)
+
+
+async def run(mode: str, players: int, llm: StubChatModel):
+    calls = llm.calls
+    latencies, rejected = [], []
+    transport = httpx.ASGITransport(app=app_api)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        join = {"topic": "Benchmark"}
+        if mode == "sala":
+            room = await _call(client, "/rooms", {"topic": "Benchmark"}, [], rejected)
+            join = {"room_id": room["room_id"]}
+        await asyncio.gather(*(_play(client, i, join, latencies, rejected) for i in range(players)))
+        elapsed = time.perf_counter() - start
+    print(f"{mode:<15}{llm.calls - calls:>14}{len(rejected):>7}{elapsed:>9.2f} s"
+          f"{fmt_ms(percentile(latencies, 50)):>12}{fmt_ms(percentile(latencies, 99)):>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5, help="Latencia del LLM falso (s)")
+    args = parser.parse_args()
+
+    print(f"{args.players} jugadores x {settings.MAX_QUESTIONS} preguntas, LLM de {args.latency * 1000:.0f} ms, "
+          f"LLM_MAX_CONCURRENT={settings.LLM_MAX_CONCURRENT}\n")
+    print(f"{'modo':<15}{'llamadas LLM':>14}{'429':>7}{'total':>11}{'p50 turno':>12}{'p99 turno':>12}")
+    # Un solo LLM falso: sus preguntas no se repiten entre modos (índice de repetidas)
+    llm = StubChatModel(latency=args.latency)
+    set_llm(llm)
+    for mode in ("independientes", "sala"):
+        asyncio.run(run(mode, args.players, llm))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Router de modelos (`src/router.py`) frente a un modelo fijo cuando el modelo principal se degrada.
+
+Dos LLM falsos: "flash" (rápido, `--fast` s) y "pro" (`--slow` s). Cada escenario hace
+tres fases de `--calls` llamadas con `--concurrency` en vuelo, por el camino de los
+nodos (CallPolicy con deadline y reintentos, sin hedging):
+
+- normal:      los dos modelos sanos
+- degradado:   "flash" tarda `--degraded` s y falla el `--fail-rate` de las llamadas
+- recuperado:  "flash" vuelve a la normalidad
+
+Escenarios:
+
+- modelo fijo: solo "flash" (lo que hacía MODEL_NAME)
+- router:      candidatos ["flash", "pro"]
+
+Uso:
+    python -m benchmarks.bench_router --calls 600 --concurrency 20
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+from benchmarks.common import prepare_env, percentile, fmt_ms
+
+prepare_env()
+
+from benchmarks.stub_llm import StubChatModel  # noqa: E402
+from src.agents import QuestionSchema  # noqa: E402
+from src.llm import set_llm  # noqa: E402
+from src.resilience import CallPolicy  # noqa: E402
+from src.router import ModelRouter  # noqa: E402
+
+PROMPT = "El tema elegido es: Benchmark."
+
+
+async def _phase(router, policy, calls: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await policy.run(router.caller(QuestionSchema, PROMPT))
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return latencies, errors
+
+
+def run(name: str, candidates, args):
+    flash = StubChatModel(latency=lambda rng: rng.uniform(0.8, 1.2) * args.fast, seed=1)
+    pro = StubChatModel(latency=lambda rng: rng.uniform(0.8, 1.2) * args.slow, seed=2)
+    set_llm({"flash": flash, "pro": pro})
+    router = ModelRouter("bench", candidates, cooldown=args.cooldown, seed=3)
+    policy = CallPolicy("bench", deadline=args.deadline, backoff_base=0.05, hedge=False)
+
+    def degrade(on: bool):
+        flash.latency = (lambda rng: rng.uniform(0.8, 1.2) * args.degraded) if on else \
+            (lambda rng: rng.uniform(0.8, 1.2) * args.fast)
+        flash.fail_rate = args.fail_rate if on else 0.0
+
+    print(f"\n{name}")
+    print(f"  {'fase':<12}{'p50':>10}{'p95':>10}{'p99':>10}{'errores':>9}   llamadas por modelo")
+    for phase, degraded in (("normal", False), ("degradado", True), ("recuperado", False)):
+        degrade(degraded)
+        before = Counter({"flash": flash.requests, "pro": pro.requests})
+        latencies, errors = asyncio.run(_phase(router, policy, args.calls, args.concurrency))
+        used = Counter({"flash": flash.requests, "pro": pro.requests}) - before
+        print(f"  {phase:<12}{fmt_ms(percentile(latencies, 50)):>10}{fmt_ms(percentile(latencies, 95)):>10}"
+              f"{fmt_ms(percentile(latencies, 99)):>10}{errors:>9}   {dict(used)}")
+    for model, stats in router.stats().items():
+        print(f"  {model}: llamadas {stats['calls']}, errores {stats['errors']}, degradado {stats['degraded']} veces, "
+              f"exploradas {stats['explored']}, EWMA {stats['ewma_latency_ms']} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=600, help="Llamadas por fase")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--fast", type=float, default=0.1, help="Latencia de 'flash' (s)")
+    parser.add_argument("--slow", type=float, default=0.25, help="Latencia de 'pro' (s)")
+    parser.add_argument("--degraded", type=float, default=1.5, help="Latencia de 'flash' degradado (s)")
+    parser.add_argument("--fail-rate", type=float, default=0.3, help="Errores de 'flash' degradado")
+    parser.add_argument("--cooldown", type=float, default=2.0, help="ROUTER_COOLDOWN_SECONDS")
+    parser.add_argument("--deadline", type=float, default=5.0)
+    args = parser.parse_args()
+
+    run("modelo fijo", ["flash"], args)
+    run("router", ["flash", "pro"], args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Presupuesto de arranque de la API (cold start).
+
+1. `python -X importtime -c "import src.api"`: tiempo de import y los paquetes más caros.
+   Como referencia se mide también el import con el grafo y Vertex AI, como era antes.
+2. Tiempo desde que arranca uvicorn hasta la primera respuesta 200 de `/leaderboard`.
+
+Sale con código 1 si se pasa de los umbrales (sirve como chequeo de regresión en CI).
+
+Uso:
+    python -m benchmarks.bench_startup --max-import-ms 2500 --max-first-response-ms 5000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import free_port
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _env() -> dict:
+    tmp = Path(tempfile.mkdtemp(prefix="trivia-startup-"))
+    return {**os.environ, "DB_NAME": str(tmp / "game.db"), "PYTHONDONTWRITEBYTECODE": "0"}
+
+
+def import_profile(modules: list, env: dict):
+    """
+    Devuelve (ms totales, [(ms, paquete)]) de importar `modules` en un proceso nuevo.
+    El detalle lista los imports directos (segundo nivel) ordenados por costo.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    top_level, direct = {}, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, raw_name = line[len("import time:"):].split("|")
+        # La indentación marca el nivel de anidamiento (1 espacio + 2 por nivel)
+        depth = (len(raw_name) - len(raw_name.lstrip(" ")) - 1) // 2
+        if depth == 0:
+            top_level[raw_name.strip()] = int(cumulative) / 1000
+        elif depth == 1:
+            direct[raw_name.strip()] = int(cumulative) / 1000
+    total = sum(top_level.get(module, 0) for module in modules)
+    return total, sorted(((ms, name) for name, ms in direct.items()), reverse=True)
+
+
+def first_response(env: dict) -> float:
+    """Segundos desde lanzar uvicorn hasta el primer 200 de /leaderboard."""
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api:app_api", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        while True:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/leaderboard").status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            if time.perf_counter() - start > 120:
+                raise RuntimeError("La API no levantó a tiempo")
+            time.sleep(0.02)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Se toma el mejor de N (menos ruido)")
+    parser.add_argument("--max-import-ms", type=float, default=2500)
+    parser.add_argument("--max-first-response-ms", type=float, default=5000)
+    args = parser.parse_args()
+    env = _env()
+    subprocess.run([sys.executable, "-c", "from src.models import init_db; init_db()"], cwd=ROOT, env=env, check=True)
+
+    api_ms, api_top = min((import_profile(["src.api"], env) for _ in range(args.runs)), key=lambda r: r[0])
+    # Lo que antes se cargaba al importar la API: el grafo y el cliente de Vertex AI
+    eager_ms, _ = min(
+        (import_profile(["src.api", "src.agents", "langchain_google_vertexai"], env) for _ in range(args.runs)),
+        key=lambda r: r[0]
+    )
+    first_ms = min(first_response(env) for _ in range(args.runs)) * 1000
+
+    print(f"import src.api:            {api_ms:8.1f} ms")
+    for ms, name in api_top[:6]:
+        print(f"    {name:<28} {ms:8.1f} ms")
+    print(f"ref. api + grafo + Vertex: {eager_ms:8.1f} ms  (el grafo se carga en segundo plano / en la primera partida)")
+    print(f"primer /leaderboard:       {first_ms:8.1f} ms")
+
+    failures = []
+    if api_ms > args.max_import_ms:
+        failures.append(f"import src.api {api_ms:.0f} ms > {args.max_import_ms:.0f} ms")
+    if first_ms > args.max_first_response_ms:
+        failures.append(f"primer /leaderboard {first_ms:.0f} ms > {args.max_first_response_ms:.0f} ms")
+    if failures:
+        print("REGRESIÓN: " + "; ".join(failures))
+        sys.exit(1)
+    print("OK: dentro del presupuesto de arranque")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Tamaño del estado de una partida y tiempo por turno según el largo del juego.
+
+Juega `--games` partidas completas en proceso (grafo + checkpointer configurado, LLM
+falso sin latencia y respuestas exactas, así el Juez no llama al LLM) con
+`MAX_QUESTIONS` de 3 y de 50, y mide en cada turno:
+
+- bytes del checkpoint del hilo (lo que guarda el checkpointer, ya serializado)
+- tiempo del turno (`ainvoke` al reanudar) y del nodo que prepara la siguiente pregunta
+  (`next_question_node`, llamado aparte sobre el estado del turno)
+- largo del prompt del QuizMaster (caracteres)
+
+Uso:
+    python -m benchmarks.bench_state --games 20
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import prepare_env, percentile, fmt_ms
+
+prepare_env()
+
+from benchmarks.stub_llm import StubChatModel  # noqa: E402
+from src import agents  # noqa: E402
+from src.api import StartGameRequest, _new_game  # noqa: E402
+from src.config import settings  # noqa: E402
+from src.llm import set_llm  # noqa: E402
+from src.models import init_db  # noqa: E402
+
+
+def _checkpoint_bytes(config) -> int:
+    """Bytes del último checkpoint del hilo, serializado como lo guarda el checkpointer."""
+    checkpoint = agents.memory.get_tuple(config).checkpoint
+    return len(agents.memory.serde.dumps_typed(checkpoint)[1])
+
+
+async def _play(game: int, result: dict):
+    _, config, state = await _new_game(StartGameRequest(player_name=f"bot-{game}", topic="Benchmark"))
+    output = await agents.app.ainvoke(state, config=config)
+    while not output["game_over"]:
+        result["bytes"].append(_checkpoint_bytes(config))
+        # El nodo que prepara la siguiente pregunta, aislado (el LLM falso responde al instante)
+        values = (await agents.app.aget_state(config)).values
+        start = time.perf_counter()
+        await agents.next_question_node(values)
+        result["node"].append(time.perf_counter() - start)
+        await agents.app.aupdate_state(config, {"user_answer": output["current_answer"]})
+        start = time.perf_counter()
+        output = await agents.app.ainvoke(None, config=config)
+        result["turn"].append(time.perf_counter() - start)
+
+
+def run(max_questions: int, games: int):
+    settings.MAX_QUESTIONS = max_questions
+    result = {"bytes": [], "turn": [], "node": [], "prompt": []}
+
+    # Largo del historial que va en el prompt del QuizMaster
+    generate = agents._generate_question
+
+    async def measured_generate(topic, previous_questions, player=None):
+        result["prompt"].append(len(str(previous_questions)))
+        return await generate(topic, previous_questions, player=player)
+
+    agents._generate_question = measured_generate
+    try:
+        for game in range(games):
+            asyncio.run(_play(game, result))
+    finally:
+        agents._generate_question = generate
+
+    print(f"MAX_QUESTIONS={max_questions:<3} checkpoint: último turno {result['bytes'][-1]:>7} B, "
+          f"máx {max(result['bytes']):>7} B | turno p50 {fmt_ms(percentile(result['turn'], 50))}, "
+          f"p99 {fmt_ms(percentile(result['turn'], 99))} | nodo p50 {percentile(result['node'], 50) * 1e6:.0f} µs | "
+          f"historial en el prompt: máx {max(result['prompt'])} caracteres")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=20)
+    args = parser.parse_args()
+
+    init_db()
+    set_llm(StubChatModel(latency=0))
+    for max_questions in (3, 50):
+        run(max_questions, args.games)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Latencia percibida de `/submit_answer` vs. `/submit_answer/stream` (SSE).
+
+Contra la API real (uvicorn + LLM falso) mide, por turno:
+- `json`: tiempo hasta la respuesta completa (lo que el jugador espera hoy).
+- `stream`: primer byte, primer fragmento de feedback, la siguiente pregunta y el final.
+
+Escenarios: `matcher` (respuestas exactas, el Juez decide sin LLM) y `llm`
+(matcher apagado, el Juez y la siguiente pregunta llaman al LLM en paralelo).
+
+Uso:
+    python -m benchmarks.bench_streaming --games 20 --latency 0.8
+"""
+import argparse
+import json
+import re
+import time
+
+import httpx
+
+from benchmarks.common import fmt_ms, percentile, stub_server
+
+MAX_QUESTIONS = 3
+
+
+def _answer_for(question: str) -> str:
+    # El LLM falso responde "respuesta N" a la "Pregunta N ..."
+    match = re.search(r"Pregunta (\d+)", question)
+    return f"respuesta {match.group(1)}" if match else "x"
+
+
+def _stream_turn(client: httpx.Client, path: str, payload: dict, marks: dict) -> dict:
+    """Consume un turno SSE anotando cuándo llega cada hito (primera vez por turno)."""
+    start = time.perf_counter()
+    seen, event, done = set(), None, None
+
+    def mark(label: str):
+        if label not in seen:
+            seen.add(label)
+            marks.setdefault(label, []).append(time.perf_counter() - start)
+
+    with client.stream("POST", path, json=payload) as res:
+        mark("primer byte")  # headers recibidos
+        for line in res.iter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+                if event in ("feedback", "question"):
+                    mark(event)
+            elif line.startswith("data: ") and event == "done":
+                mark("done")
+                done = json.loads(line[len("data: "):])
+    return done
+
+
+def run(scenario: str, games: int, latency: float):
+    env = {
+        "QUESTION_POOL_ENABLED": "false",
+        "ANSWER_MATCHER_ENABLED": "true" if scenario == "matcher" else "false",
+        "MAX_QUESTIONS": str(MAX_QUESTIONS),
+        "STUB_LLM_LATENCY": str(latency),
+    }
+    blocking, marks = [], {}
+    with stub_server(env) as base_url, httpx.Client(base_url=base_url, timeout=60) as client:
+        for mode in ("json", "stream"):
+            for i in range(games):
+                res = client.post("/start_game", json={"player_name": f"bot-{i}", "topic": "Benchmark"}).json()
+                session_id, question = res["session_id"], res["message"]
+                for _ in range(MAX_QUESTIONS - 1):  # turnos intermedios (hay siguiente pregunta)
+                    payload = {"session_id": session_id, "user_answer": _answer_for(question)}
+                    if mode == "json":
+                        start = time.perf_counter()
+                        data = client.post("/submit_answer", json=payload).json()
+                        blocking.append(time.perf_counter() - start)
+                    else:
+                        data = _stream_turn(client, "/submit_answer/stream", payload, marks)
+                    question = data["message"].split("Siguiente Pregunta: ")[-1]
+
+    print(f"\nescenario={scenario} | LLM falso {latency * 1000:.0f} ms | {games} partidas")
+    print(f"  {'json: respuesta completa':>28}: p50 {fmt_ms(percentile(blocking, 50))}  p99 {fmt_ms(percentile(blocking, 99))}")
+    for label in ("primer byte", "feedback", "question", "done"):
+        samples = marks.get(label, [])
+        print(f"  {'stream: ' + label:>28}: p50 {fmt_ms(percentile(samples, 50))}  p99 {fmt_ms(percentile(samples, 99))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.8)
+    args = parser.parse_args()
+    for scenario in ("matcher", "llm"):
+        run(scenario, args.games, args.latency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Throughput y consistencia de la API con 1, 2 y 4 workers de uvicorn en la
+configuración multi-worker soportada: checkpointer durable (SQLite por defecto)
+y, en ese mismo backend, las reservas de turnos y rondas de sala.
+
+Los jugadores juegan en salas de `--room-size` por HTTP real, así que los pedidos
+de una partida y de una sala caen en workers distintos. Cada turno se manda dos
+veces a la vez con el mismo `turn` (un reintento del cliente). Al final se verifica:
+
+- turnos: cada partida suma 10 puntos por turno, ni más (un duplicado aplicado dos
+  veces) ni menos, y la DB (`/sessions/{id}/rank`) tiene ese mismo total;
+- salas: todos los miembros de una sala vieron las mismas preguntas;
+- ranking: desde cualquier worker, las posiciones son 1..N sin repetir y el total es N.
+
+El LLM falso no tiene cuota, así que se abre el governor como en `bench_async`
+(salvo que `LLM_MAX_CONCURRENT` / `LLM_QUEUE_SIZE` estén exportadas).
+
+Uso:
+    python -m benchmarks.bench_workers --players 100 --latency 0.2
+    python -m benchmarks.bench_workers --checkpointer redis --redis-url redis://localhost:6379/0
+"""
+import argparse
+import asyncio
+import os
+import re
+import time
+
+import httpx
+
+from benchmarks.common import percentile, fmt_ms, stub_server
+
+MAX_QUESTIONS = 3
+
+
+def _answer(message: str) -> str:
+    # El LLM falso pregunta "Pregunta N sobre ..." y la respuesta correcta es "respuesta N"
+    number = re.findall(r"Pregunta (\d+)", message)[-1]
+    return f"respuesta {number}"
+
+
+def _question(message: str) -> str:
+    return message.split("Siguiente Pregunta: ")[-1]
+
+
+async def _play(client, room_id: str, player_id: int, latencies: list) -> dict:
+    res = await client.post("/start_game", json={"player_name": f"bot-{player_id}", "room_id": room_id})
+    res.raise_for_status()
+    game = res.json()
+    questions = [game["message"]]
+    for turn in range(1, MAX_QUESTIONS + 1):
+        payload = {"session_id": game["session_id"], "user_answer": _answer(game["message"]), "turn": turn}
+        start = time.perf_counter()
+        first, retry = await asyncio.gather(*(client.post("/submit_answer", json=payload) for _ in range(2)))
+        latencies.append(time.perf_counter() - start)
+        first.raise_for_status()
+        retry.raise_for_status()
+        if first.json() != retry.json():
+            raise AssertionError(f"El reintento del turno {turn} devolvió otro resultado")
+        game = first.json()
+        if not game["game_over"]:
+            questions.append(_question(game["message"]))
+    return {"session_id": game["session_id"], "room_id": room_id, "score": game["score"], "questions": questions}
+
+
+async def _room(client, room_index: int) -> str:
+    res = await client.post("/rooms", json={"topic": f"Benchmark {room_index}"})
+    res.raise_for_status()
+    return res.json()["room_id"]
+
+
+def _check(client_results: list, ranks: list, players: int) -> list:
+    problems = []
+    expected = 10 * MAX_QUESTIONS
+    bad_scores = [r for r in client_results if r["score"] != expected]
+    bad_db = [rank for rank in ranks if rank["score"] != expected]
+    if bad_scores or bad_db:
+        problems.append(f"puntajes: {len(bad_scores)} partidas y {len(bad_db)} filas de la DB con != {expected}")
+    by_room = {}
+    for result in client_results:
+        by_room.setdefault(result["room_id"], set()).add(tuple(result["questions"]))
+    split_rooms = sum(1 for seen in by_room.values() if len(seen) > 1)
+    if split_rooms:
+        problems.append(f"salas: {split_rooms} con preguntas distintas entre miembros")
+    positions = sorted(rank["rank"] for rank in ranks)
+    totals = {rank["total_sessions"] for rank in ranks}
+    if positions != list(range(1, players + 1)) or totals != {players}:
+        problems.append(f"ranking: posiciones repetidas o faltantes (totales vistos {sorted(totals)})")
+    return problems
+
+
+async def _drive(base_url: str, players: int, room_size: int):
+    latencies: list = []
+    limits = httpx.Limits(max_connections=2 * players)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        start = time.perf_counter()
+        rooms = await asyncio.gather(*(_room(client, i) for i in range(-(-players // room_size))))
+        results = await asyncio.gather(*(_play(client, rooms[i // room_size], i, latencies) for i in range(players)))
+        elapsed = time.perf_counter() - start
+        # Las lecturas del ranking ven los puntajes de los demás workers a lo sumo SCORE_FEED_POLL_MS después
+        await asyncio.sleep(0.2)
+        ranks = []
+        for result in results:
+            res = await client.get(f"/sessions/{result['session_id']}/rank")
+            res.raise_for_status()
+            ranks.append(res.json())
+        return elapsed, latencies, len(rooms), _check(results, ranks, players)
+
+
+def run(workers: int, args) -> None:
+    env = {
+        "CHECKPOINTER": args.checkpointer,
+        "CHECKPOINT_REDIS_URL": args.redis_url,
+        "QUESTION_POOL_ENABLED": "false",
+        "MAX_QUESTIONS": str(MAX_QUESTIONS),
+        "STUB_LLM_LATENCY": str(args.latency),
+        "LLM_MAX_CONCURRENT": os.getenv("LLM_MAX_CONCURRENT", "10000"),
+        "LLM_QUEUE_SIZE": os.getenv("LLM_QUEUE_SIZE", "10000"),
+    }
+    with stub_server(env, workers=workers) as base_url:
+        elapsed, latencies, rooms, problems = asyncio.run(_drive(base_url, args.players, args.room_size))
+        requests_done = rooms + args.players * (1 + 2 * MAX_QUESTIONS)
+        print(f"workers={workers} | {args.players} partidas en {rooms} salas | {elapsed:6.2f} s"
+              f" | {requests_done / elapsed:7.1f} req/s | turno (x2) p50 {fmt_ms(percentile(latencies, 50))}"
+              f" | p99 {fmt_ms(percentile(latencies, 99))} | {'; '.join(problems) or 'consistente'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--room-size", type=int, default=4, help="Jugadores por sala")
+    parser.add_argument("--latency", type=float, default=0.2, help="Latencia del LLM falso (s)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--checkpointer", choices=["sqlite", "redis"], default="sqlite")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    args = parser.parse_args()
+    for workers in args.workers:
+        run(workers, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Utilidades compartidas por los scripts de benchmark."""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import httpx
+
+
+def prepare_env(db_name: str = "bench.db") -> Path:
+    """
+    Configura variables de entorno para correr sin GCP y con una DB descartable.
+
+    Debe llamarse ANTES de importar cualquier módulo de `src`, porque
+    `src.config.settings` se construye al importar.
+    """
+    tmp_dir = Path(tempfile.mkdtemp(prefix="trivia-bench-"))
+    os.environ.setdefault("PROJECT_ID", "benchmark")
+    os.environ["DB_NAME"] = str(tmp_dir / db_name)
+    return tmp_dir
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Percentil por interpolación lineal (pct en 0-100)."""
+    if not samples:
+        return 0.0
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[int(pct) - 1] if pct < 100 else max(samples)
+
+
+def fmt_ms(seconds: float) -> str:
+    return f"{seconds * 1000:8.1f} ms"
+
+
+def rss_bytes() -> int:
+    """Memoria residente actual del proceso (en Linux; en otros sistemas, el pico)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def stub_server(env_overrides: Dict[str, str], workers: int = 1) -> Iterator[str]:
+    """
+    Levanta la API real con uvicorn y el LLM falso (`benchmarks.stub_app`) en un
+    puerto libre, con una DB descartable. Devuelve la URL base y lo apaga al salir.
+    """
+    tmp = Path(tempfile.mkdtemp(prefix="trivia-server-"))
+    env = {
+        **os.environ,
+        "PROJECT_ID": os.getenv("PROJECT_ID", "benchmark"),
+        "DB_NAME": str(tmp / "game.db"),
+        "CHECKPOINT_SQLITE_PATH": str(tmp / "checkpoints.db"),
+        **env_overrides,
+    }
+    # Creamos el esquema antes para que los workers no compitan en el create_all
+    subprocess.run([sys.executable, "-c", "from src.models import init_db; init_db()"], env=env, check=True)
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.stub_app:app_api",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 120
+        while True:
+            try:
+                if httpx.get(f"{base_url}/leaderboard").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.time() > deadline:
+                raise RuntimeError("La API no levantó a tiempo")
+            time.sleep(0.5)
+        yield base_url
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
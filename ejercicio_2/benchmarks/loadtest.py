@@ -0,0 +1,292 @@
+"""
+Prueba de carga offline con LLM falso: throughput, latencia por endpoint y memoria.
+
+Dos modos:
+
+- `api`: `--players` jugadores simultáneos contra `app_api` (en proceso, sin red):
+  `/start_game` y `/submit_answer` x MAX_QUESTIONS. Ante un 429 el jugador espera
+  `Retry-After` y repite, como el frontend. Con `--room` todos juegan en una sala.
+- `cli`: el loop de juego de `src/main.py` (`run_game`) sin terminal: cada jugador
+  contesta desde una consola falsa. Se mide hasta la primera pregunta (`start_game`),
+  de cada respuesta a la pregunta siguiente (`submit_answer`) y el cierre con el
+  ranking (`game_over`).
+
+El LLM falso es determinista (`--seed`) y tarda según `--latency`: segundos fijos o
+una distribución (`uniform:0.2:0.8`, `lognormal:0.3:0.5`, `pareto:0.2:2.5`...).
+Reporta partidas y requests por segundo, p50/p95/p99 por endpoint, errores y
+crecimiento del RSS del proceso. La memoria se mide después de `--warmup` partidas,
+para no contar imports ni caches que se llenan una sola vez.
+
+`--save-baseline` guarda el resultado en JSON; `--baseline` compara contra uno
+guardado (`benchmarks/baselines/`) y termina con código 1 si el throughput baja, o
+una latencia o la memoria suben, más que `--tolerance`.
+
+Uso:
+    python -m benchmarks.loadtest --mode api --players 100 --latency lognormal:0.3:0.5
+    python -m benchmarks.loadtest --mode api --baseline benchmarks/baselines/loadtest_api.json
+    python -m benchmarks.loadtest --mode cli --players 20 --save-baseline benchmarks/baselines/loadtest_cli.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from rich.console import Console
+
+from benchmarks.common import prepare_env, percentile, rss_bytes
+from benchmarks.stub_llm import StubChatModel, latency_distribution
+
+# Margen absoluto de la comparación: por debajo de esto es ruido de la máquina
+LATENCY_SLACK_MS = 10.0
+MEMORY_SLACK_MB = 5.0
+# Muestras mínimas para comparar un percentil (con menos, el p99 es el máximo)
+MIN_SAMPLES = {"p50_ms": 1, "p95_ms": 20, "p99_ms": 100}
+
+
+class Recorder:
+    """Latencias por endpoint y errores de una corrida."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors = Counter()
+        self.games = 0
+
+    def add(self, endpoint: str, seconds: float):
+        self.latencies[endpoint].append(seconds)
+
+
+# --- Modo api ---
+
+async def _api_player(client, player_id: int, join: dict, turns: int, delay: float, think: float,
+                      recorder: Recorder):
+    async def call(path: str, payload: dict) -> dict:
+        while True:
+            start = time.perf_counter()
+            res = await client.post(path, json=payload)
+            if res.status_code != 429:
+                break
+            recorder.errors[f"{path} 429"] += 1
+            await asyncio.sleep(float(res.headers.get("Retry-After", 1)))
+        if res.status_code >= 400:
+            recorder.errors[f"{path} {res.status_code}"] += 1
+            res.raise_for_status()
+        recorder.add(path, time.perf_counter() - start)
+        return res.json()
+
+    await asyncio.sleep(delay)
+    data = await call("/start_game", {"player_name": f"load-{player_id}", **join})
+    for _ in range(turns):
+        await asyncio.sleep(think)
+        data = await call("/submit_answer", {"session_id": data["session_id"], "user_answer": "x"})
+    recorder.games += 1
+
+
+async def _run_api(players: int, args, recorder: Recorder):
+    import httpx
+    from src.api import app_api
+    from src.config import settings
+
+    transport = httpx.ASGITransport(app=app_api)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+        join = {"topic": args.topic}
+        if args.room:
+            res = await client.post("/rooms", json={"topic": args.topic})
+            res.raise_for_status()
+            join = {"room_id": res.json()["room_id"]}
+        results = await asyncio.gather(*(
+            _api_player(client, i, join, settings.MAX_QUESTIONS, i * args.ramp / players, args.think, recorder)
+            for i in range(players)
+        ), return_exceptions=True)
+    _count_failures(results, recorder)
+
+
+# --- Modo cli ---
+
+class HeadlessConsole(Console):
+    """Consola de `src/main.py` sin terminal: contesta sola y mide entre prompts."""
+
+    def __init__(self, player_name: str, answer: str, recorder: Recorder):
+        super().__init__(quiet=True)
+        self.player_name = player_name
+        self.answer = answer
+        self.recorder = recorder
+        self._answers = 0
+        self._since: Optional[float] = None
+
+    def input(self, prompt="", **kwargs) -> str:
+        if self._since is None:
+            self._since = time.perf_counter()
+            return self.player_name
+        self.recorder.add("start_game" if self._answers == 0 else "submit_answer", time.perf_counter() - self._since)
+        self._answers += 1
+        self._since = time.perf_counter()
+        return self.answer
+
+    def game_over(self):
+        self.recorder.add("game_over", time.perf_counter() - self._since)
+        self.recorder.games += 1
+
+
+async def _cli_player(player_id: int, delay: float, recorder: Recorder):
+    from src.main import run_game
+
+    await asyncio.sleep(delay)
+    console = HeadlessConsole(f"cli-{player_id}", "x", recorder)
+    await run_game(console=console)
+    console.game_over()
+
+
+async def _run_cli(players: int, args, recorder: Recorder):
+    results = await asyncio.gather(*(
+        _cli_player(i, i * args.ramp / players, recorder) for i in range(players)
+    ), return_exceptions=True)
+    _count_failures(results, recorder)
+
+
+def _count_failures(results: list, recorder: Recorder):
+    for result in results:
+        if isinstance(result, Exception):
+            recorder.errors[f"partida abortada: {type(result).__name__}"] += 1
+
+
+# --- Corrida y reporte ---
+
+def run(args) -> dict:
+    """Corre la prueba de carga de `args.mode` y devuelve el reporte (el formato de las baselines)."""
+    from src.llm import set_llm
+
+    llm = StubChatModel(latency=latency_distribution(args.latency), seed=args.seed)
+    set_llm(llm)
+    scenario = _run_api if args.mode == "api" else _run_cli
+    if args.warmup:
+        asyncio.run(scenario(args.warmup, args, Recorder()))
+
+    gc.collect()
+    rss_start = rss_bytes()
+    calls = llm.calls
+    recorder = Recorder()
+    start = time.perf_counter()
+    asyncio.run(scenario(args.players, args, recorder))
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    growth_mb = (rss_bytes() - rss_start) / 2**20
+
+    requests = sum(len(samples) for samples in recorder.latencies.values())
+    return {
+        "mode": args.mode,
+        "params": {
+            "players": args.players, "latency": args.latency, "seed": args.seed, "topic": args.topic,
+            "room": args.room, "ramp": args.ramp, "think": args.think, "warmup": args.warmup,
+        },
+        "games": recorder.games,
+        "requests": requests,
+        "llm_calls": llm.calls - calls,
+        "elapsed_s": round(elapsed, 3),
+        "throughput": {
+            "games_per_s": round(recorder.games / elapsed, 2),
+            "requests_per_s": round(requests / elapsed, 2),
+        },
+        "endpoints": {
+            endpoint: {
+                "count": len(samples),
+                **{f"p{pct}_ms": round(percentile(samples, pct) * 1000, 1) for pct in (50, 95, 99)},
+            }
+            for endpoint, samples in sorted(recorder.latencies.items())
+        },
+        "errors": dict(recorder.errors),
+        "memory": {
+            "rss_start_mb": round(rss_start / 2**20, 1),
+            "growth_mb": round(growth_mb, 1),
+            "growth_kb_per_game": round(growth_mb * 1024 / max(recorder.games, 1), 1),
+        },
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[Tuple[str, float, float, bool]]:
+    """
+    (métrica, baseline, actual, empeoró) de cada métrica presente en ambos reportes.
+
+    Empeora el throughput que baja más de `tolerance` y la latencia o la memoria que
+    suben más de `tolerance` y, además, más que el margen absoluto de ruido. Los
+    percentiles altos de endpoints con pocas muestras no se comparan.
+    """
+    rows = []
+    for metric, value in baseline["throughput"].items():
+        current = report["throughput"][metric]
+        rows.append((metric, value, current, current < value * (1 - tolerance)))
+    for endpoint, stats in baseline["endpoints"].items():
+        for key, min_samples in MIN_SAMPLES.items():
+            if endpoint in report["endpoints"] and stats["count"] >= min_samples:
+                current = report["endpoints"][endpoint][key]
+                worse = current > stats[key] * (1 + tolerance) and current - stats[key] > LATENCY_SLACK_MS
+                rows.append((f"{endpoint} {key}", stats[key], current, worse))
+    value, current = baseline["memory"]["growth_mb"], report["memory"]["growth_mb"]
+    worse = current > value * (1 + tolerance) and current - value > MEMORY_SLACK_MB
+    rows.append(("memory growth_mb", value, current, worse))
+    return rows
+
+
+def _print_report(report: dict):
+    params = report["params"]
+    print(f"modo {report['mode']}: {params['players']} jugadores, LLM {params['latency']} (seed {params['seed']}), "
+          f"{report['games']} partidas en {report['elapsed_s']:.2f} s, {report['llm_calls']} llamadas al LLM\n")
+    print(f"{'endpoint':<16}{'requests':>10}{'p50':>11}{'p95':>11}{'p99':>11}")
+    for endpoint, stats in report["endpoints"].items():
+        print(f"{endpoint:<16}{stats['count']:>10}{stats['p50_ms']:>8.1f} ms{stats['p95_ms']:>8.1f} ms"
+              f"{stats['p99_ms']:>8.1f} ms")
+    throughput, memory = report["throughput"], report["memory"]
+    print(f"\nthroughput: {throughput['games_per_s']:.2f} partidas/s, {throughput['requests_per_s']:.2f} requests/s")
+    print(f"memoria: RSS {memory['rss_start_mb']:.1f} MB al empezar, +{memory['growth_mb']:.1f} MB "
+          f"({memory['growth_kb_per_game']:.1f} KB por partida)")
+    print(f"errores: {report['errors'] or 'ninguno'}")
+
+
+def _print_comparison(rows: List[Tuple[str, float, float, bool]]):
+    print(f"\n{'métrica':<28}{'baseline':>12}{'actual':>12}{'cambio':>10}")
+    for metric, value, current, worse in rows:
+        change = f"{(current - value) / value * 100:+.1f}%" if value else "-"
+        print(f"{metric:<28}{value:>12.2f}{current:>12.2f}{change:>10}{'  EMPEORÓ' if worse else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["api", "cli"], default="api")
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--latency", default="lognormal:0.3:0.5",
+                        help="Latencia del LLM falso: segundos o distribución (ver benchmarks.stub_llm)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--topic", default="Carga", help="Tema (uno fuera de POOL_TOPICS va siempre al LLM)")
+    parser.add_argument("--room", action="store_true", help="Todos los jugadores en una sala (modo api)")
+    parser.add_argument("--ramp", type=float, default=0.0, help="Segundos en los que van llegando los jugadores")
+    parser.add_argument("--think", type=float, default=0.0, help="Segundos que piensa cada respuesta (modo api)")
+    parser.add_argument("--warmup", type=int, default=5, help="Partidas previas que no se miden")
+    parser.add_argument("--baseline", type=Path, help="Reporte JSON contra el cual comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Empeoramiento relativo tolerado")
+    parser.add_argument("--save-baseline", type=Path, help="Guarda el reporte como baseline")
+    args = parser.parse_args()
+
+    prepare_env()
+    report = run(args)
+    _print_report(report)
+
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.save_baseline.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+        print(f"\nbaseline guardada en {args.save_baseline}")
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["params"] != report["params"]:
+            print(f"\naviso: parámetros distintos a los de la baseline ({baseline['params']})")
+        rows = compare(report, baseline, args.tolerance)
+        _print_comparison(rows)
+        if any(worse for *_, worse in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""
+App ASGI con LLM falso, para levantar la API real con `uvicorn --workers N`
+en benchmarks multi-proceso.
+
+    STUB_LLM_LATENCY=0.2 uvicorn benchmarks.stub_app:app_api --workers 2
+
+`STUB_LLM_LATENCY` acepta también una distribución (`lognormal:0.2:0.5`, ver
+`latency_distribution`). `STUB_LLM_MAX_INFLIGHT` emula la cuota de llamadas
+simultáneas del modelo (0 = sin límite).
+"""
+import os
+
+from benchmarks.stub_llm import StubChatModel, latency_distribution
+from src.llm import set_llm
+from src.api import app_api  # noqa: F401
+
+set_llm(StubChatModel(
+    latency=latency_distribution(os.getenv("STUB_LLM_LATENCY", "0.2")),
+    max_inflight=int(os.getenv("STUB_LLM_MAX_INFLIGHT", "0"))
+))
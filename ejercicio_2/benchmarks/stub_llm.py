@@ -0,0 +1,178 @@
+"""
+Modelo de lenguaje falso para benchmarks y pruebas offline.
+
+Imita la superficie de `ChatVertexAI` que usan los agentes
+(`with_structured_output(...)` + `invoke`/`ainvoke`) pero responde de forma
+determinista y con una latencia inyectada, sin tocar Vertex AI.
+"""
+import asyncio
+import random
+import re
+import time
+from types import SimpleNamespace
+from typing import Callable, List, Optional, Tuple, Union, get_args
+
+from google.api_core import exceptions as gexc
+
+Latency = Union[float, Callable[[random.Random], float]]
+
+# Distribuciones de `latency_distribution`: nombre -> (parámetros, muestreo)
+_DISTRIBUTIONS = {
+    "fixed": (1, lambda rng, seconds: seconds),
+    "uniform": (2, lambda rng, low, high: rng.uniform(low, high)),
+    "normal": (2, lambda rng, mean, std: rng.gauss(mean, std)),
+    # mediana y sigma del logaritmo: la cola larga típica de un LLM
+    "lognormal": (2, lambda rng, median, sigma: median * rng.lognormvariate(0, sigma)),
+    "pareto": (2, lambda rng, scale, alpha: scale * rng.paretovariate(alpha)),
+}
+
+
+def latency_distribution(spec: str) -> Latency:
+    """
+    Latencia para `StubChatModel` a partir de un texto de la línea de comandos:
+    `0.5` (fija), `uniform:0.2:0.8`, `normal:0.5:0.1`, `lognormal:0.4:0.6`
+    (mediana y sigma) o `pareto:0.3:2.5` (escala y alfa). En segundos.
+    """
+    name, *params = spec.split(":")
+    if not params:
+        return float(name)
+    if name not in _DISTRIBUTIONS:
+        raise ValueError(f"Distribución desconocida '{name}' (opciones: {', '.join(_DISTRIBUTIONS)})")
+    arity, sample = _DISTRIBUTIONS[name]
+    if len(params) != arity:
+        raise ValueError(f"'{name}' lleva {arity} parámetro(s): {spec}")
+    values = [float(param) for param in params]
+    return lambda rng: sample(rng, *values)
+
+
+class StubQuotaError(gexc.ResourceExhausted):
+    """Equivalente falso del 429 "Resource exhausted" de Vertex AI."""
+
+
+class StubTransientError(gexc.ServiceUnavailable):
+    """Equivalente falso de un 503 transitorio de Vertex AI."""
+
+
+class StubChatModel:
+    """
+    Chat model falso con latencia configurable.
+
+    Args:
+        latency (float | Callable): Segundos de espera por llamada, o una función
+            que recibe un `random.Random` y devuelve la latencia muestreada.
+        seed (int): Semilla para que las corridas sean reproducibles.
+        max_inflight (int): Cuota de llamadas simultáneas (0 = sin límite); las que
+            la exceden fallan con StubQuotaError, como Vertex al pasarse de cuota.
+        fail_rate (float): Proporción de llamadas que fallan con StubTransientError.
+        item_latency (float): Segundos extra por respuesta evaluada en un pedido por lotes
+            (el LLM tarda más cuanto más texto devuelve).
+    """
+
+    def __init__(self, latency: Latency = 0.05, seed: int = 0, max_inflight: int = 0,
+                 fail_rate: float = 0.0, item_latency: float = 0.0):
+        self.latency = latency
+        self.max_inflight = max_inflight
+        self.fail_rate = fail_rate
+        self.item_latency = item_latency
+        self.inflight = 0
+        self.requests = 0  # llamadas recibidas (incluye las que fallan o se cancelan)
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._question_seq = 0
+
+    def sample_latency(self) -> float:
+        if callable(self.latency):
+            return max(0.0, self.latency(self._rng))
+        return self.latency
+
+    def with_structured_output(self, schema, include_raw: bool = False):
+        return StubStructuredRunnable(self, schema, include_raw)
+
+    def respond(self, schema, prompt: str):
+        """Construye una respuesta válida del `schema` a partir del prompt."""
+        self.calls += 1
+        fields = schema.model_fields
+        if "question" in fields:
+            self._question_seq += 1
+            topic = _extract(prompt, r"El tema elegido es: (.+?)\.") or "General"
+            n = self._question_seq
+            # Un nombre inventado por pregunta: distintas para el índice de repetidas
+            return schema(question=f"Pregunta {n} sobre {topic}: {_codename(n)}?", answer=f"respuesta {n}")
+        if "evaluations" in fields:
+            verdict = get_args(fields["evaluations"].annotation)[0]
+            return schema(evaluations=[
+                verdict(index=index, **_verdict(correct, user)) for index, correct, user in _batch_items(prompt)
+            ])
+        correct = _extract(prompt, r"Correcta: (.*)") or ""
+        user = _extract(prompt, r"Usuario: (.*)") or ""
+        return schema(**_verdict(correct, user))
+
+
+def _codename(n: int) -> str:
+    rng = random.Random(n)
+    return "".join(rng.choice("bdfgklmnprstvz") + rng.choice("aeiou") for _ in range(4)).title()
+
+
+class StubStructuredRunnable:
+    """
+    Equivalente falso de `llm.with_structured_output(schema, include_raw=...)`.
+
+    Con `include_raw` devuelve `raw` (con `usage_metadata` estimado en caracteres / 4),
+    `parsed` y `parsing_error`, como langchain.
+    """
+
+    def __init__(self, model: StubChatModel, schema, include_raw: bool = False):
+        self.model = model
+        self.schema = schema
+        self.include_raw = include_raw
+
+    def _output(self, prompt: str):
+        parsed = self.model.respond(self.schema, prompt)
+        if not self.include_raw:
+            return parsed
+        usage = {"input_tokens": len(prompt) // 4, "output_tokens": len(parsed.model_dump_json()) // 4}
+        return {"raw": SimpleNamespace(usage_metadata=usage), "parsed": parsed, "parsing_error": None}
+
+    def invoke(self, prompt: str, config: Optional[dict] = None):
+        time.sleep(self.model.sample_latency())
+        return self._output(prompt)
+
+    async def ainvoke(self, prompt: str, config: Optional[dict] = None):
+        model = self.model
+        model.requests += 1
+        model.inflight += 1
+        try:
+            if model.max_inflight and model.inflight > model.max_inflight:
+                raise StubQuotaError("429 Resource exhausted")
+            if model.fail_rate and model._rng.random() < model.fail_rate:
+                await asyncio.sleep(0.01)
+                raise StubTransientError("503 Service unavailable")
+            extra = model.item_latency * len(_batch_items(prompt)) if "evaluations" in self.schema.model_fields else 0
+            await asyncio.sleep(model.sample_latency() + extra)
+            return self._output(prompt)
+        finally:
+            model.inflight -= 1
+
+
+def _verdict(correct: str, user: str) -> dict:
+    is_correct = correct.strip().lower() == user.strip().lower()
+    feedback = "¡Bien hecho!" if is_correct else f"La respuesta era {correct}."
+    return {"is_correct": is_correct, "feedback": feedback, "points": 10 if is_correct else 0}
+
+
+def _batch_items(prompt: str) -> List[Tuple[int, str, str]]:
+    """(índice, correcta, respuesta) de cada "[n] Usuario: ..." de un prompt por lotes."""
+    items, correct = [], ""
+    for line in prompt.splitlines():
+        line = line.strip()
+        if line.startswith("Correcta: "):
+            correct = line[len("Correcta: "):]
+        match = re.match(r"\[(\d+)\] Usuario: (.*)", line)
+        if match:
+            items.append((int(match.group(1)), correct, match.group(2)))
+    return items
+
+
+def _extract(text: str, pattern: str) -> Optional[str]:
+    match = re.search(pattern, text)
+    return match.group(1).strip() if match else None
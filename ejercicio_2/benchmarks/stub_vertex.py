@@ -0,0 +1,123 @@
+"""
+Servidor gRPC local que emula `PredictionService.GenerateContent` de Vertex AI.
+
+Permite correr el cliente real (ChatVertexAI + canal gRPC de `src.llm`) sin GCP:
+
+    python -m benchmarks.stub_vertex --port 50051 --latency 0.05 --connect-ms 100
+    LLM_API_ENDPOINT=127.0.0.1:50051 LLM_API_INSECURE=true uvicorn src.api:app_api
+
+Responde las llamadas con salida estructurada (function calling) completando los
+campos del schema, y las demás con el texto "ok". `--connect-ms` emula el costo de
+una conexión nueva (handshake TLS + token OAuth): se cobra en la primera llamada de
+cada conexión.
+"""
+import argparse
+import asyncio
+import itertools
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import grpc
+from google.cloud.aiplatform_v1beta1.types import content, openapi, prediction_service, tool
+from google.protobuf import struct_pb2
+
+from benchmarks.common import free_port
+
+SERVICE = "google.cloud.aiplatform.v1beta1.PredictionService"
+
+
+class StubVertex:
+    def __init__(self, latency: float, connect_ms: float):
+        self.latency = latency
+        self.connect_ms = connect_ms
+        self._counter = itertools.count(1)
+        self._peers = set()
+
+    async def generate_content(self, request, context):
+        peer = context.peer()
+        if peer not in self._peers:
+            self._peers.add(peer)
+            await asyncio.sleep(self.connect_ms / 1000)
+        await asyncio.sleep(self.latency)
+
+        n = next(self._counter)
+        if request.tools and request.tools[0].function_declarations:
+            declaration = request.tools[0].function_declarations[0]
+            args = struct_pb2.Struct()
+            args.update({
+                name: _fake_value(name, prop.type_, n)
+                for name, prop in declaration.parameters.properties.items()
+            })
+            part = content.Part(function_call=tool.FunctionCall(name=declaration.name, args=args))
+        else:
+            part = content.Part(text="ok")
+        return prediction_service.GenerateContentResponse(candidates=[
+            content.Candidate(content=content.Content(role="model", parts=[part]), finish_reason=1)
+        ])
+
+
+def _fake_value(name: str, type_, n: int):
+    if type_ == openapi.Type.BOOLEAN:
+        return True
+    if type_ in (openapi.Type.INTEGER, openapi.Type.NUMBER):
+        return 10
+    if name == "question":
+        return f"Pregunta {n}?"
+    return f"{name} {n}"
+
+
+async def serve(port: int, latency: float, connect_ms: float):
+    stub = StubVertex(latency, connect_ms)
+    handler = grpc.method_handlers_generic_handler(SERVICE, {
+        "GenerateContent": grpc.unary_unary_rpc_method_handler(
+            stub.generate_content,
+            request_deserializer=prediction_service.GenerateContentRequest.deserialize,
+            response_serializer=prediction_service.GenerateContentResponse.serialize,
+        ),
+    })
+    server = grpc.aio.server()
+    server.add_generic_rpc_handlers((handler,))
+    server.add_insecure_port(f"127.0.0.1:{port}")
+    await server.start()
+    await server.wait_for_termination()
+
+
+@contextmanager
+def stub_vertex_server(latency: float = 0.05, connect_ms: float = 0) -> Iterator[str]:
+    """Levanta el stub en un subproceso y devuelve el endpoint (host:puerto)."""
+    port = free_port()
+    proc = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.stub_vertex",
+        "--port", str(port), "--latency", str(latency), "--connect-ms", str(connect_ms),
+    ])
+    try:
+        deadline = time.time() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.time() > deadline:
+                    raise RuntimeError("El stub de Vertex no levantó a tiempo")
+                time.sleep(0.2)
+        yield f"127.0.0.1:{port}"
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=50051)
+    parser.add_argument("--latency", type=float, default=0.05, help="Segundos por respuesta")
+    parser.add_argument("--connect-ms", type=float, default=0, help="Costo de la primera llamada de cada conexión")
+    args = parser.parse_args()
+    asyncio.run(serve(args.port, args.latency, args.connect_ms))
+
+
+if __name__ == "__main__":
+    main()
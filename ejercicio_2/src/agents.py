@@ -1,23 +1,86 @@
+import asyncio
+import json
 import os
-from langchain_google_vertexai import ChatVertexAI
+import re
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver 
 from pydantic import BaseModel, Field
-from sqlmodel import Session
 
 # Importaciones internas
 from src.config import settings
-from src.state import TriviaState
-from src.models import engine, QuestionLog, update_session_score
+from src.state import RoomState, TriviaState
+from src.checkpoint import build_checkpointer
+from src.governor import llm_governor
+from src.resilience import CallPolicy
+from src.llm import structured_llm
+from src.router import ModelRouter
+from src.batching import MicroBatcher
+from src.metrics import instrument_node
+from src.models import QuestionLog, audit_writer, record_answer
+from src.matcher import match_answer, canned_feedback, matcher_stats, normalize_answer
+from src.question_pool import QuestionPool, question_fingerprint
+from src.dedup import build_question_index
+from src.knowledge import load_knowledge
+from src.rooms import RoomHub
+from src.shared_results import SharedResults, build_claim_backend
+from src.verdict_cache import build_verdict_cache
 
 # --- 1. Configuración del LLM ---
-llm = ChatVertexAI(
-    model_name=settings.MODEL_NAME,
-    temperature=0.8, # temperatura alta para más variedad
-    project=settings.PROJECT_ID,
-    location=settings.REGION
+# El cliente se crea en el primer uso (ver src/llm.py)
+
+# Cache de veredictos compartido por todas las sesiones
+verdict_cache = build_verdict_cache(
+    settings.VERDICT_CACHE_BACKEND,
+    max_size=settings.VERDICT_CACHE_SIZE,
+    ttl_seconds=settings.VERDICT_CACHE_TTL_SECONDS,
+    path=settings.VERDICT_CACHE_PATH
+)
+
+# Hechos de Mercado Libre para el contexto de 'MeLi Expert' (el índice se carga una vez)
+meli_knowledge = load_knowledge(settings.MELI_KNOWLEDGE_INDEX, settings.MELI_KNOWLEDGE_DIR)
+
+# Preguntas recientes de todas las sesiones por tema (dedup entre sesiones)
+question_index = build_question_index(
+    settings.DEDUP_INDEX,
+    capacity=settings.DEDUP_INDEX_SIZE,
+    threshold=settings.DEDUP_THRESHOLD,
+    max_topics=settings.DEDUP_MAX_TOPICS
 )
 
+def _call_policy(name: str, deadline: float) -> CallPolicy:
+    return CallPolicy(
+        name,
+        deadline=deadline,
+        max_attempts=settings.LLM_MAX_ATTEMPTS,
+        backoff_base=settings.LLM_RETRY_BACKOFF_SECONDS,
+        backoff_max=settings.LLM_RETRY_BACKOFF_MAX_SECONDS,
+        hedge=settings.LLM_HEDGE_ENABLED,
+        hedge_quantile=settings.LLM_HEDGE_QUANTILE,
+        hedge_budget=settings.LLM_HEDGE_BUDGET,
+        min_samples=settings.LLM_HEDGE_MIN_SAMPLES
+    )
+
+# Deadline, reintentos y hedging por nodo (cada uno aprende su propio p95)
+question_policy = _call_policy("question", settings.LLM_QUESTION_DEADLINE_SECONDS)
+judge_policy = _call_policy("judge", settings.LLM_JUDGE_DEADLINE_SECONDS)
+judge_batch_policy = _call_policy("judge_batch", settings.LLM_JUDGE_DEADLINE_SECONDS)
+
+def _model_router(name: str, models: List[str]) -> ModelRouter:
+    return ModelRouter(
+        name,
+        models or [settings.MODEL_NAME],
+        alpha=settings.ROUTER_EWMA_ALPHA,
+        error_threshold=settings.ROUTER_ERROR_THRESHOLD,
+        cooldown=settings.ROUTER_COOLDOWN_SECONDS,
+        explore_rate=settings.ROUTER_EXPLORE_RATE,
+        latency_slack=settings.ROUTER_LATENCY_SLACK
+    )
+
+# Modelos candidatos por nodo: cada llamada va al más rápido que esté sano
+question_router = _model_router("question", settings.QUESTION_MODELS)
+judge_router = _model_router("judge", settings.JUDGE_MODELS)
+
 # --- 2. Estructuras de Salida ---
 class QuestionSchema(BaseModel):
     question: str = Field(description="La pregunta de trivia.")
@@ -28,16 +91,36 @@ class EvaluationSchema(BaseModel):
     feedback: str = Field(description="Explicación educativa sin revelar el score numérico.")
     points: int = Field(description="10 puntos si es correcta, 0 si no.")
 
+class BatchVerdictSchema(EvaluationSchema):
+    index: int = Field(description="Número [n] de la respuesta evaluada.")
+
+class JudgeBatchSchema(BaseModel):
+    evaluations: List[BatchVerdictSchema] = Field(description="Un veredicto por cada respuesta numerada.")
+
+def warm_llm():
+    """Crea los clientes del LLM y los wrappers estructurados que usan los nodos (bloqueante)."""
+    for model in question_router.candidates:
+        structured_llm(QuestionSchema, model)
+    for model in judge_router.candidates:
+        structured_llm(EvaluationSchema, model)
+        if judge_batcher is not None:
+            structured_llm(JudgeBatchSchema, model)
+
+def routed_models() -> List[str]:
+    """Todos los modelos candidatos de los nodos (para el warm-up del transporte)."""
+    return list(dict.fromkeys(question_router.candidates + judge_router.candidates))
+
 # --- 3. Definición de Nodos ---
 
-def generate_question_node(state: TriviaState):
+async def generate_question_node(state: TriviaState):
     """Agente 1: Genera una pregunta con personalidad y MEMORIA."""
 
     """
     Nodo Generador (QuizMaster): Crea una nueva pregunta de trivia utilizando un LLM.
 
-    Este nodo consulta el historial de mensajes en el estado para evitar repetir
-    preguntas anteriores e inyecta contexto específico si el tema es 'MeLi Expert'.
+    Este nodo usa las huellas de las preguntas ya hechas para evitar repetirlas (y las
+    más recientes como contexto del prompt) e inyecta contexto específico si el tema
+    es 'MeLi Expert'.
 
     Args:
         state (TriviaState): El estado actual del grafo, incluyendo el tema y el historial.
@@ -46,29 +129,112 @@ def generate_question_node(state: TriviaState):
         dict: Un diccionario con la actualización parcial del estado:
               - current_question: La nueva pregunta generada.
               - current_answer: La respuesta correcta (oculta al usuario).
-              - messages: El mensaje del Host añadido al historial.
+              - recent_questions / asked_fingerprints: La pregunta añadida al historial.
     """
-    topic = state.get("topic", "General")
+    question, answer = await _next_question(state, state["question_count"])
     
-    # Buscamos en los mensajes previos textos que empiecen con "🤖 Host:"
-    previous_questions = [
-        msg.replace("🤖 Host: ", "") 
-        for msg in state.get("messages", []) 
-        if isinstance(msg, str) and "Host:" in msg
-    ]
+    return {
+        "current_question": question,
+        "current_answer": answer,
+        **_asked(question)
+    }
+
+async def next_question_node(state: TriviaState):
+    """
+    Nodo de Pre-generación: Prepara la siguiente pregunta en paralelo con el Juez.
+
+    La siguiente pregunta no depende del veredicto, así que se genera en el mismo
+    superstep que 'judge'. Se guarda aparte (next_question/next_answer) y recién
+    'advance' la promueve a pregunta actual. En el último turno no se genera nada.
+
+    Args:
+        state (TriviaState): El estado del grafo antes de evaluar la respuesta.
+
+    Returns:
+        dict: next_question y next_answer (vacíos si el juego termina este turno).
+    """
+    if state["question_count"] + 1 >= settings.MAX_QUESTIONS:
+        return {"next_question": "", "next_answer": ""}
+
+    question, answer = await _next_question(state, state["question_count"] + 1)
+    return {"next_question": question, "next_answer": answer}
+
+def _asked(question: str) -> dict:
+    """Actualización del historial compacto con una pregunta hecha."""
+    return {"recent_questions": [question], "asked_fingerprints": {question_fingerprint(question)}}
+
+async def _next_question(state: TriviaState, round_index: int) -> Tuple[str, str]:
+    """
+    Obtiene la pregunta de la ronda `round_index` (0 = primera) de la sesión: la de su
+    sala si es multijugador (una generación para todos los miembros), o la propia.
+    """
+    if state.get("room_id"):
+        return await room_hub.question(state["room_id"], round_index)
+    return await _draw_or_generate(
+        state.get("topic", "General"), state.get("recent_questions", []),
+        state.get("asked_fingerprints", set()), player=state.get("player_name")
+    )
+
+async def _draw_or_generate(topic: str, previous_questions: List[str], seen: Set[str],
+                            player: Optional[str]) -> Tuple[str, str]:
+    """
+    Pregunta del pool si el tema es fijo y hay una que no se vio, o generada en vivo con
+    el LLM (temas libres / pool vacío).
+    """
+    if question_pool.supports(topic):
+        pooled = question_pool.draw(topic, seen)
+        if pooled:
+            return pooled.question, pooled.answer
+
+    return await _generate_question(topic, previous_questions, player=player, seen=seen)
+
+async def _generate_question(topic: str, previous_questions: List[str], player: Optional[str] = None,
+                             seen: Set[str] = frozenset()) -> Tuple[str, str]:
+    """
+    Pide al LLM una pregunta nueva que no repita una reciente del tema (de cualquier sesión).
+
+    Si sale repetida (misma huella que una de la sesión, o parecida a una del índice), se
+    vuelve a pedir con esa pregunta en la lista de prohibidas, hasta DEDUP_MAX_REGENERATIONS
+    veces. El prompt lleva solo las preguntas recientes y las repetidas encontradas, no
+    todo el historial.
+
+    `player` es la clave de turno en el governor; la reposición del pool usa una por tema.
+    """
+    avoid = list(previous_questions)
+    for _ in range(settings.DEDUP_MAX_REGENERATIONS + 1):
+        question, answer = await _ask_quiz_master(topic, avoid, player)
+        repeated = question if question_fingerprint(question) in seen else None
+        if repeated is None and question_index is not None:
+            repeated = question_index.find_duplicate(topic, question)
+        if repeated is None:
+            break
+        avoid.append(repeated)
+    if question_index is not None:
+        question_index.add(topic, question)
+    return question, answer
+
+async def _ask_quiz_master(topic: str, previous_questions: List[str], player: Optional[str]) -> Tuple[str, str]:
+    """Pide al LLM una pregunta con el prompt del QuizMaster."""
+    prompt = _quiz_master_prompt(topic, previous_questions)
+    response = await question_policy.run(
+        llm_governor.per_attempt(player or f"pool:{topic}", question_router.caller(QuestionSchema, prompt))
+    )
+    return response.question, response.answer
+
+def _quiz_master_prompt(topic: str, previous_questions: List[str]) -> str:
+    """
+    Prompt del QuizMaster. Para 'MeLi Expert' suma unos pocos hechos recuperados por
+    pregunta (ver src/knowledge.py), evitando los de las preguntas ya hechas.
+    """
     history_context = f"PREGUNTAS YA HECHAS (¡PROHIBIDO REPETIRLAS!): {previous_questions}" if previous_questions else ""
     # ---------------------------------------------------------------
 
     meli_context = ""
-    if topic == "MeLi Expert":
-        meli_context = """
-        CONTEXTO MERCADO LIBRE:
-        - Fundador: Marcos Galperin (1999, garaje en Saavedra).
-        - Ecosistema: Mercado Pago, Mercado Envíos (Full), Mercado Shops, Mercado Crédito.
-        - Hitos: Cotiza en NASDAQ (MELI), es la empresa más valiosa de Latam.
-        - Cultura: "Beta continuo", "Emprender tomando riesgos", logo del codo a codo en pandemia.
-        - Colores: Amarillo (#FFE600) y Azul oscuro.
-        """
+    if topic == "MeLi Expert" and meli_knowledge is not None:
+        facts = meli_knowledge.sample(settings.MELI_CONTEXT_CHUNKS, avoid=previous_questions)
+        meli_context = "CONTEXTO MERCADO LIBRE (basa la pregunta en estos datos):\n" + "\n".join(
+            f"    - {fact}" for fact in facts
+        )
 
     prompt = f"""
     Eres el anfitrión carismático de un show de trivia llamado "MeLi Arcade".
@@ -87,25 +253,21 @@ def generate_question_node(state: TriviaState):
 
     Genera la pregunta y la respuesta correcta.
     """
-    
-    structured_llm = llm.with_structured_output(QuestionSchema)
-    response = structured_llm.invoke(prompt)
-    
-    return {
-        "current_question": response.question,
-        "current_answer": response.answer,
-        "messages": [f"🤖 Host: {response.question}"]
-    }
+    return prompt
 
-def evaluate_answer_node(state: TriviaState):
+async def evaluate_answer_node(state: TriviaState):
     """Agente 2: Evalúa la respuesta.
 
     Nodo Juez: Evalúa la respuesta del usuario frente a la respuesta correcta.
 
-    Realiza tres acciones principales:
-    1. Utiliza el LLM para una evaluación semántica (no estricta por texto exacto).
-    2. Persiste el resultado detallado en la base de datos (Audit Log).
-    3. Calcula si el juego debe terminar basado en MAX_QUESTIONS.
+    Realiza dos acciones principales:
+    1. Decide localmente los casos claros (matcher determinista) y usa el LLM para
+       una evaluación semántica (no estricta por texto exacto) de los ambiguos.
+    2. Calcula si el juego debe terminar basado en MAX_QUESTIONS.
+
+    No escribe en la base: el veredicto queda en el estado y 'advance' lo persiste
+    cuando el turno completo terminó (si la siguiente pregunta falla, no queda nada
+    escrito y el reintento no duplica el Audit Log ni el puntaje).
 
     Args:
         state (TriviaState): Estado conteniendo la respuesta del usuario y la correcta.
@@ -116,67 +278,240 @@ def evaluate_answer_node(state: TriviaState):
     user_input = state["user_answer"]
     correct_ans = state["current_answer"]
     question = state["current_question"]
-    session_id = state["session_id"] 
     
-    prompt = f"""
-    Pregunta: {question}
-    Correcta: {correct_ans}
-    Usuario: {user_input}
-    Evalúa si es correcta y da feedback educativo sin decir puntos.
-    """
-    
-    structured_llm = llm.with_structured_output(EvaluationSchema)
-    eval_result = structured_llm.invoke(prompt)
-    
-    with Session(engine) as session:
-        log = QuestionLog(
-            session_id=session_id,
-            question_text=question,
-            correct_answer=correct_ans,
-            user_answer=user_input,
-            is_correct=eval_result.is_correct,
-            feedback=eval_result.feedback,
-            score_awarded=eval_result.points
+    # Fast-path: coincidencias / no-coincidencias claras no necesitan al LLM
+    local_verdict = match_answer(user_input, correct_ans) if settings.ANSWER_MATCHER_ENABLED else None
+    matcher_stats.record(local_verdict)
+    if local_verdict is not None:
+        eval_result = EvaluationSchema(
+            is_correct=local_verdict,
+            feedback=canned_feedback(local_verdict, correct_ans),
+            points=10 if local_verdict else 0
         )
-        session.add(log)
-        session.commit()
-    
-    update_session_score(session_id, eval_result.points)
+    else:
+        eval_result = await _llm_evaluation(question, correct_ans, user_input, state.get("player_name", ""))
+
+    # Streaming (SSE): el feedback y el puntaje salen apenas hay veredicto, sin esperar
+    # a la siguiente pregunta. Con ainvoke el writer no hace nada.
+    new_score = state["score"] + eval_result.points
+    writer = get_stream_writer()
+    for chunk in _word_chunks(eval_result.feedback):
+        writer({"event": "feedback", "data": {"text": chunk}})
+    writer({"event": "score", "data": {
+        "is_correct": eval_result.is_correct, "points": eval_result.points, "score": new_score
+    }})
     
     next_count = state["question_count"] + 1
     is_game_over = next_count >= settings.MAX_QUESTIONS
     
     return {
-        "score": state["score"] + eval_result.points,
+        "score": new_score,
         "last_feedback": eval_result.feedback,
+        "last_correct": eval_result.is_correct,
+        "last_points": eval_result.points,
         "question_count": next_count,
         "game_over": is_game_over
     }
 
+def _word_chunks(text: str) -> List[str]:
+    """Parte el texto en palabras (con su espacio) para emitirlo de a poco."""
+    return re.findall(r"\S+\s*", text)
+
+async def _llm_evaluation(question: str, correct_ans: str, user_input: str, player: str = "") -> EvaluationSchema:
+    """Evaluación semántica con el LLM para las respuestas ambiguas (con cache de veredictos)."""
+    if verdict_cache is not None:
+        cached = await verdict_cache.get(question, correct_ans, user_input)
+        if cached is not None:
+            return EvaluationSchema(**cached)
+
+    if judge_batcher is not None:
+        eval_result = await judge_batcher.submit(JudgeRequest(question, correct_ans, user_input, player))
+    else:
+        eval_result = await _judge_one(JudgeRequest(question, correct_ans, user_input, player))
+
+    if verdict_cache is not None:
+        await verdict_cache.set(question, correct_ans, user_input, eval_result.model_dump())
+    return eval_result
+
+class JudgeRequest(NamedTuple):
+    """Una respuesta a evaluar con el LLM."""
+    question: str
+    correct_answer: str
+    user_answer: str
+    player: str
+
+async def _judge_one(request: JudgeRequest) -> EvaluationSchema:
+    """Evalúa una respuesta con su propio pedido al LLM."""
+    prompt = f"""
+    Pregunta: {request.question}
+    Correcta: {request.correct_answer}
+    Usuario: {request.user_answer}
+    Evalúa si es correcta y da feedback educativo sin decir puntos.
+    """
+    
+    return await judge_policy.run(
+        llm_governor.per_attempt(request.player, judge_router.caller(EvaluationSchema, prompt))
+    )
+
+async def _judge_batch(requests: List[JudgeRequest]) -> List[EvaluationSchema]:
+    """
+    Evalúa un lote de respuestas (ver `judge_batcher`) en un solo pedido al LLM.
+
+    Las respuestas iguales (normalizadas) a una misma pregunta van una sola vez y las
+    de la misma pregunta se agrupan bajo ella. Si el LLM no devuelve el veredicto de
+    alguna, esa se evalúa con su propio pedido.
+    """
+    slots: Dict[Tuple[str, str], int] = {}
+    unique: List[JudgeRequest] = []
+    for request in requests:
+        key = (request.question, normalize_answer(request.user_answer))
+        if key not in slots:
+            slots[key] = len(unique)
+            unique.append(request)
+    if len(unique) == 1:
+        verdict = await _judge_one(unique[0])
+        return [verdict] * len(requests)
+
+    groups: Dict[Tuple[str, str], List[str]] = {}
+    for index, request in enumerate(unique):
+        groups.setdefault((request.question, request.correct_answer), []).append(f"[{index}] Usuario: {request.user_answer}")
+    blocks = "\n\n    ".join(
+        f"Pregunta: {question}\n    Correcta: {correct}\n    " + "\n    ".join(answers)
+        for (question, correct), answers in groups.items()
+    )
+    prompt = f"""
+    Evalúa cada respuesta numerada frente a la correcta de su pregunta y da feedback
+    educativo sin decir puntos. Devuelve un veredicto por respuesta con su número en `index`.
+
+    {blocks}
+    """
+
+    # El lote es de varios jugadores: va en su propia cola del governor, no en la del primero
+    response = await judge_batch_policy.run(
+        llm_governor.per_attempt("judge_batch", judge_router.caller(JudgeBatchSchema, prompt))
+    )
+    verdicts = {
+        item.index: EvaluationSchema(is_correct=item.is_correct, feedback=item.feedback, points=item.points)
+        for item in response.evaluations if 0 <= item.index < len(unique)
+    }
+    missing = [index for index in range(len(unique)) if index not in verdicts]
+    for index, verdict in zip(missing, await asyncio.gather(*(_judge_one(unique[i]) for i in missing))):
+        verdicts[index] = verdict
+    return [verdicts[slots[(request.question, normalize_answer(request.user_answer))]] for request in requests]
+
+async def advance_round_node(state: TriviaState):
+    """
+    Nodo de Unión: Cierra el turno una vez que terminaron 'judge' y 'next_question'.
+
+    Persiste el veredicto del Juez (Audit Log + puntaje): recién acá el turno está
+    completo, así que un turno que falló a medias no deja nada escrito.
+    Si el juego sigue, la pregunta pre-generada pasa a ser la pregunta actual.
+    Si el juego terminó, la pregunta extra se descarta.
+    """
+    log = QuestionLog(
+        session_id=state["session_id"],
+        question_text=state["current_question"],
+        correct_answer=state["current_answer"],
+        user_answer=state["user_answer"],
+        is_correct=state["last_correct"],
+        feedback=state["last_feedback"],
+        score_awarded=state["last_points"]
+    )
+    if settings.AUDIT_WRITE_BEHIND:
+        audit_writer.submit(log)
+    else:
+        # Log + puntaje en una transacción; SQLite es bloqueante, va a un hilo
+        await asyncio.to_thread(record_answer, log)
+
+    if state["game_over"]:
+        return {"next_question": "", "next_answer": ""}
+
+    return {
+        "current_question": state["next_question"],
+        "current_answer": state["next_answer"],
+        "next_question": "",
+        "next_answer": "",
+        **_asked(state["next_question"])
+    }
+
+async def room_question_node(state: RoomState):
+    """
+    Nodo de Sala: Genera la pregunta de la ronda siguiente de una sala multijugador.
+
+    Corre una vez por ronda para toda la sala (ver src/rooms.py); el dedup usa el
+    historial de la sala, no el de cada miembro.
+    """
+    question, answer = await _draw_or_generate(
+        state["topic"], state.get("recent_questions", []), state.get("asked_fingerprints", set()),
+        player=f"room:{state['room_id']}"
+    )
+    return {"questions": [(question, answer)], **_asked(question)}
+
 # --- 4. Lógica Condicional ---
+# Nodos que corren en paralelo en cada turno (fan-out)
+ROUND_NODES = ["judge", "next_question"]
+
 def check_game_over(state: TriviaState):
     if state["game_over"]:
-        return "end_game"
-    return "continue"
+        return END
+    return ROUND_NODES
 
 # --- 5. Construcción del Grafo ---
+# Cada nodo mide su duración (métricas y traza por request, ver src/metrics.py)
 workflow = StateGraph(TriviaState)
-workflow.add_node("quiz_master", generate_question_node)
-workflow.add_node("judge", evaluate_answer_node)
+workflow.add_node("quiz_master", instrument_node("quiz_master", generate_question_node))
+workflow.add_node("judge", instrument_node("judge", evaluate_answer_node))
+workflow.add_node("next_question", instrument_node("next_question", next_question_node))
+workflow.add_node("advance", instrument_node("advance", advance_round_node))
 workflow.set_entry_point("quiz_master")
-workflow.add_edge("quiz_master", "judge")
-workflow.add_conditional_edges(
-    "judge",
-    check_game_over,
-    {
-        "continue": "quiz_master",
-        "end_game": END
-    }
+# Fan-out: el Juez y la siguiente pregunta corren a la vez...
+for node in ROUND_NODES:
+    workflow.add_edge("quiz_master", node)
+# ...y 'advance' espera a ambos (fan-in)
+workflow.add_edge(ROUND_NODES, "advance")
+workflow.add_conditional_edges("advance", check_game_over, ROUND_NODES + [END])
+
+# --- 6. Pool de Preguntas ---
+# La reposición en segundo plano la arranca la API (ver lifespan en src/api.py)
+question_pool = QuestionPool(
+    generator=_generate_question,
+    topics=settings.POOL_TOPICS if settings.QUESTION_POOL_ENABLED else [],
+    max_size=settings.POOL_SIZE,
+    ttl_seconds=settings.POOL_TTL_SECONDS,
+    refill_interval=settings.POOL_REFILL_INTERVAL
 )
 
-# --- 6. Compilación ---
-memory = MemorySaver() 
+# --- 7. Juez por lotes ---
+# Las respuestas que llegan juntas al Juez LLM (salas, aulas) van en un solo pedido
+judge_batcher = MicroBatcher(
+    "judge",
+    _judge_batch,
+    window=settings.JUDGE_BATCH_WINDOW_MS / 1000,
+    max_size=settings.JUDGE_BATCH_MAX_SIZE
+) if settings.JUDGE_BATCH_WINDOW_MS > 0 else None
+
+# --- 8. Compilación ---
+memory = build_checkpointer(settings)
 app = workflow.compile(
     checkpointer=memory,
     interrupt_before=["judge"] 
-)
\ No newline at end of file
+)
+
+# --- 9. Salas multijugador ---
+# Cada corrida genera una ronda; el hilo de la sala vive en el mismo checkpointer, y
+# con uno compartido (sqlite/redis) cada ronda se reserva ahí para generarla una sola vez
+room_claims = build_claim_backend(settings)
+room_workflow = StateGraph(RoomState)
+room_workflow.add_node("room_quiz_master", instrument_node("room_quiz_master", room_question_node))
+room_workflow.set_entry_point("room_quiz_master")
+room_workflow.add_edge("room_quiz_master", END)
+room_hub = RoomHub(
+    room_workflow.compile(checkpointer=memory),
+    max_cached=settings.ROOM_CACHE_SIZE,
+    max_rounds=settings.MAX_QUESTIONS,
+    shared=SharedResults(
+        room_claims, "room:", dumps=json.dumps, loads=json.loads,
+        claim_ttl_seconds=settings.SHARED_CLAIM_TTL_SECONDS,
+        result_ttl_seconds=settings.CHECKPOINT_IDLE_TTL_SECONDS,
+    ) if room_claims is not None else None
+)
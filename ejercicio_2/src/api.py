@@ -1,26 +1,142 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List
 
-# Importamos nuestro core
-from src.agents import app
-from src.models import init_db, create_session, get_leaderboard, GameSession
+# Importamos nuestro core (el grafo/LLM se importan recién cuando hacen falta, ver _agents)
+from src.matcher import matcher_stats
+from src.models import (
+    init_db, create_session, audit_writer, top_scores, rank_index, score_feed,
+    get_leaderboard_page, get_session_rank, GameSession
+)
+from src.leaderboard import leaderboard_etag
+from src.governor import LLMOverloaded, llm_governor
+from src.resilience import LLMUnavailable
+from src.rooms import RoomNotFound
+from src.idempotency import TurnAborted, TurnResults
+from src.shared_results import SharedResults, build_claim_backend
+from src.llm import warm_up, llm_stats
+from src.metrics import MetricsMiddleware, checkpoint_threads, render
 from src.state import TriviaState
 from src.config import settings
 
+logger = logging.getLogger(__name__)
+
 # Inicializamos la DB al arrancar la API
 init_db()
 
-app_api = FastAPI(title="Trivia Tech Lead API", version="1.0")
+_agents_module = None
+
+def _agents():
+    """
+    Módulo del grafo (LangGraph + LLM), importado en el primer uso.
+
+    Importarlo lleva segundos y el leaderboard no lo necesita: así la API queda
+    lista para responder sin esperarlo (cold start en Cloud Run).
+    """
+    global _agents_module
+    if _agents_module is None:
+        from src import agents
+        _agents_module = agents
+    return _agents_module
+
+async def _loaded_agents():
+    """El módulo del grafo. Si todavía se está importando, se espera fuera del event loop."""
+    return _agents_module or await asyncio.to_thread(_agents)
+
+async def _graph():
+    """El grafo compilado."""
+    return (await _loaded_agents()).app
+
+async def _warm_agents():
+    # Carga del grafo y del cliente del LLM fuera del event loop (crear el cliente
+    # resuelve credenciales de GCP de forma síncrona), warm-up del canal al modelo y
+    # después arranca la reposición del pool de preguntas de temas fijos
+    agents = await asyncio.to_thread(_agents)
+    try:
+        await asyncio.to_thread(agents.warm_llm)
+    except Exception:
+        logger.exception("No se pudo crear el cliente del LLM; se reintenta en el primer uso")
+    else:
+        await warm_up(models=agents.routed_models())
+    agents.question_pool.start()
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # El grafo se carga en segundo plano: la API atiende el leaderboard mientras tanto
+    warmup = asyncio.create_task(_warm_agents())
+    # El índice de posiciones se carga en segundo plano (con millones de sesiones tarda segundos)
+    threading.Thread(target=rank_index.warm, name="rank-index-warm", daemon=True).start()
+    # Igual el top del leaderboard: las recargas siguientes ya corren fuera del pedido
+    threading.Thread(target=top_scores.warm, name="top-scores-warm", daemon=True).start()
+    yield
+    warmup.cancel()
+    if _agents_module is not None:
+        await _agents_module.question_pool.stop()
+    # Flush de las filas pendientes del Audit Log antes de apagar
+    await run_in_threadpool(audit_writer.close)
+
+app_api = FastAPI(title="Trivia Tech Lead API", version="1.0", lifespan=lifespan)
+if settings.METRICS_ENABLED:
+    app_api.add_middleware(MetricsMiddleware)
+
+@app_api.exception_handler(LLMOverloaded)
+async def llm_overloaded_handler(_: Request, exc: LLMOverloaded):
+    # Sobrecarga del LLM: 429 inmediato con Retry-After en vez de un 500 por cuota
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Servidor ocupado, reintentá en unos segundos", "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app_api.exception_handler(LLMUnavailable)
+async def llm_unavailable_handler(_: Request, exc: LLMUnavailable):
+    # Deadline del nodo vencido o errores transitorios en todos los intentos. El turno no
+    # se escribió en la DB (lo persiste 'advance' al completarse): el cliente puede repetir
+    # el pedido y el turno se registra una sola vez
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "El modelo no respondió a tiempo, reintentá", "retry_after": 1},
+        headers={"Retry-After": "1"}
+    )
+
+@app_api.exception_handler(TurnAborted)
+async def turn_aborted_handler(_: Request, exc: TurnAborted):
+    # El pedido original del turno se cortó antes de aplicarlo: el reintento lo calcula de nuevo
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "El turno no se pudo completar, reintentá", "retry_after": 1},
+        headers={"Retry-After": "1"}
+    )
+
+@app_api.exception_handler(RoomNotFound)
+async def room_not_found_handler(_: Request, exc: RoomNotFound):
+    # La sala se liberó del checkpointer (idle TTL) en medio de la partida
+    return JSONResponse(status_code=404, content={"detail": str(exc)})
 
 # --- Modelos de Datos para la API (Request/Response) ---
 class StartGameRequest(BaseModel):
     player_name: str
+    topic: Optional[str] = None     # Obligatorio salvo al unirse a una sala (usa el de la sala)
+    room_id: Optional[str] = None   # Sala multijugador a la que se une la partida
+
+class CreateRoomRequest(BaseModel):
+    topic: str
+
+class RoomResponse(BaseModel):
+    room_id: str
     topic: str
 
 class ChatRequest(BaseModel):
     session_id: int
     user_answer: Optional[str] = None # Puede ser None si es el primer turno
+    turn: Optional[int] = None        # Pregunta que se responde (1 = la primera): hace idempotente el reintento
 
 class GameStateResponse(BaseModel):
     message: str            # Texto a mostrar (Pregunta o Feedback)
@@ -34,40 +150,47 @@ class LeaderboardEntry(BaseModel):
     score: int
     date: str
 
+class RankResponse(BaseModel):
+    session_id: int
+    player_name: str
+    score: int
+    rank: int               # Posición 1-based
+    total_sessions: int
+
+# Resultado de cada turno respondido con `turn` (reintentos idempotentes). Con un
+# checkpointer compartido (sqlite/redis) la reserva del turno también lo es: un
+# duplicado que cae en otro worker espera el mismo resultado
+_claims = build_claim_backend(settings)
+turn_results: TurnResults[GameStateResponse] = TurnResults(
+    max_entries=settings.TURN_CACHE_SIZE,
+    shared=SharedResults(
+        _claims, "turn:",
+        dumps=GameStateResponse.model_dump_json, loads=GameStateResponse.model_validate_json,
+        claim_ttl_seconds=settings.SHARED_CLAIM_TTL_SECONDS,
+        result_ttl_seconds=settings.TURN_RESULT_TTL_SECONDS,
+    ) if _claims is not None else None
+)
+
 # --- Endpoints ---
 
 @app_api.post("/start_game", response_model=GameStateResponse)
-def start_game(request: StartGameRequest):
+async def start_game(request: StartGameRequest):
     """Inicia una partida y devuelve la primera pregunta."""
     
-    # 1. Crear sesión en DB
-    session_id = create_session(request.player_name)
-    
-    # 2. Configurar hilo de LangGraph
-    thread_config = {"configurable": {"thread_id": str(session_id)}}
-    
-    # 3. Estado Inicial
-    initial_state: TriviaState = { 
-        "messages": [], "question_count": 0, "score": 0, "game_over": False,
-        "session_id": session_id, "player_name": request.player_name,
-        "topic": request.topic,
-        "current_question": "", "current_answer": "", "user_answer": "", "last_feedback": ""
-    }
-    
-    # 4. Invocar primer paso (Generar Pregunta)
-    # Ejecutamos hasta que se detenga esperando input
-    output = app.invoke(initial_state, config=thread_config)
+    # 0. Si el LLM está saturado se rechaza (429) antes de crear la sesión
+    with llm_governor.admission(request.player_name):
+        # 1-3. Crear sesión en DB y estado inicial del hilo de LangGraph
+        session_id, thread_config, initial_state = await _new_game(request)
+        
+        # 4. Invocar primer paso (Generar Pregunta)
+        # Ejecutamos hasta que se detenga esperando input
+        graph = await _graph()
+        output = await graph.ainvoke(initial_state, config=thread_config)
     
-    return GameStateResponse(
-        message=output["current_question"],
-        is_question=True,
-        game_over=False,
-        score=0,
-        session_id=session_id
-    )
+    return _start_response(output, session_id)
 
 @app_api.post("/submit_answer", response_model=GameStateResponse)
-def submit_answer(request: ChatRequest) -> GameStateResponse:
+async def submit_answer(request: ChatRequest) -> GameStateResponse:
     """
     Procesa la respuesta del usuario y avanza el turno del juego.
 
@@ -76,33 +199,252 @@ def submit_answer(request: ChatRequest) -> GameStateResponse:
     2. Reanuda la ejecución para que el agente 'Juez' evalúe.
     3. Si el juego no termina, el agente 'QuizMaster' genera la siguiente pregunta.
 
+    Si el pedido trae `turn`, es idempotente: un reintento del mismo turno devuelve
+    el resultado ya calculado (o espera el cálculo en curso) sin volver a evaluar,
+    registrar ni sumar puntos. Un `turn` que no es el actual de la partida da 409.
+
     Args:
-        request (ChatRequest): Contiene el session_id y la respuesta del usuario.
+        request (ChatRequest): Contiene el session_id, la respuesta del usuario y
+                               opcionalmente el número de turno.
 
     Returns:
         GameStateResponse: El nuevo estado del juego, incluyendo feedback y
                            la siguiente pregunta (si aplica).
     """
+    if request.turn is None:
+        return await _answer_turn(request)
+    return await turn_results.run((request.session_id, request.turn), lambda: _answer_turn(request))
+
+async def _answer_turn(request: ChatRequest) -> GameStateResponse:
+    # 0. Si el LLM está saturado se rechaza (429) sin tocar el grafo
+    with llm_governor.admission():
+        # 1. Validar la partida e inyectar la respuesta al grafo pausado
+        thread_config = await _resume_turn(request)
+        
+        # 2. Reanudar ejecución (Evaluar -> [Check Game Over] -> Generar Siguiente Pregunta)
+        # LangGraph correrá hasta la próxima pausa (después de generar la siguiente pregunta) 
+        # O hasta terminar si es Game Over.
+        graph = await _graph()
+        output = await graph.ainvoke(None, config=thread_config)
     
-    thread_config = {"configurable": {"thread_id": str(request.session_id)}}
+    # 3. Construir respuesta 
+    return _turn_response(output, request.session_id)
+
+@app_api.post("/rooms", response_model=RoomResponse)
+async def create_room(request: CreateRoomRequest):
+    """
+    Crea una sala multijugador y genera su primera pregunta.
+
+    Los jugadores se unen con `/start_game` (o `/start_game/stream`) enviando el
+    `room_id`: cada ronda se genera una sola vez para toda la sala, y cada jugador
+    responde, es evaluado y suma puntos en su propia sesión.
+    """
+    with llm_governor.admission():
+        agents = await _loaded_agents()
+        room_id = await agents.room_hub.create(request.topic)
+    return RoomResponse(room_id=room_id, topic=request.topic)
+
+# --- Streaming (Server-Sent Events) ---
+# Mismo flujo que los endpoints de arriba, pero los datos salen a medida que existen:
+#   feedback (palabra a palabra) -> score -> question -> done (GameStateResponse completo)
+
+@app_api.post("/start_game/stream")
+async def start_game_stream(request: StartGameRequest):
+    """Versión SSE de /start_game: eventos `session`, `question` y `done`."""
+    llm_governor.check_capacity(request.player_name)
+    session_id, thread_config, initial_state = await _new_game(request)
+
+    async def events():
+        yield _sse("session", {"session_id": session_id})
+        output = None
+        async for output in _stream_graph(initial_state, thread_config, player=request.player_name):
+            if isinstance(output, str):
+                yield output
+        if output is None:
+            return
+        yield _sse("question", {"text": output["current_question"]})
+        yield _sse("done", _start_response(output, session_id).model_dump())
+
+    return _sse_response(events())
+
+@app_api.post("/submit_answer/stream")
+async def submit_answer_stream(request: ChatRequest):
+    """
+    Versión SSE de /submit_answer.
+
+    Emite `feedback` (texto del Juez por palabras) y `score` apenas hay veredicto,
+    `question` cuando está la siguiente pregunta y `done` con la respuesta completa.
+    Si el LLM se satura o no responde a tiempo emite `error` con `status` (429 o 503)
+    y `retry_after`.
+
+    Con `turn`, un reintento del turno (terminado o en curso) emite solo `done` con
+    el resultado ya calculado, igual que en /submit_answer.
+    """
+    if request.turn is None:
+        return _sse_response(await _stream_turn(request))
+    key = (request.session_id, request.turn)
+    result = turn_results.join(key)
+    if result is not None:
+        return _sse_response(_replay_turn(result))
+    result = turn_results.begin(key)
+    try:
+        shared = await turn_results.claim(key)
+        if shared is not None:
+            # Lo calculó otro worker: se repite su resultado
+            turn_results.finish(key, shared)
+            return _sse_response(_replay_turn(result))
+        events = await _stream_turn(request, on_result=lambda response: turn_results.finish(key, response))
+    except Exception as exc:
+        turn_results.abort(key, exc)
+        raise
+    return _sse_response(_release_unfinished(key, events))
+
+async def _stream_turn(request: ChatRequest, on_result=None):
+    # `on_result` recibe el GameStateResponse apenas existe, antes del evento `done`
+    llm_governor.check_capacity()
+    thread_config = await _resume_turn(request)
+
+    async def events():
+        output = None
+        async for output in _stream_graph(None, thread_config):
+            if isinstance(output, str):
+                yield output
+        if output is None:
+            return
+        if not output["game_over"]:
+            yield _sse("question", {"text": output["current_question"]})
+        response = _turn_response(output, request.session_id)
+        if on_result is not None:
+            on_result(response)
+        yield _sse("done", response.model_dump())
+
+    return events()
+
+async def _release_unfinished(key, events):
+    # Si el stream se cortó antes del resultado (error del LLM o cliente desconectado),
+    # el turno queda libre para el reintento
+    try:
+        async for event in events:
+            yield event
+    finally:
+        turn_results.abort(key)
+
+async def _replay_turn(result):
+    try:
+        response = await asyncio.shield(result)
+    except HTTPException as exc:
+        yield _sse("error", {"status": exc.status_code, "detail": exc.detail, "retry_after": 1})
+    except LLMOverloaded as exc:
+        yield _sse("error", {"status": 429, "detail": str(exc), "retry_after": exc.retry_after})
+    except (LLMUnavailable, TurnAborted):
+        yield _sse("error", {"status": 503, "detail": "El turno no se pudo completar, reintentá", "retry_after": 1})
+    else:
+        yield _sse("done", response.model_dump())
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _stream_graph(graph_input, thread_config, player: Optional[str] = None):
+    """
+    Corre el grafo con stream_mode custom + values. Produce los eventos SSE de los
+    nodos (str) y, al final, el último estado completo (dict). Si el LLM se satura o
+    no responde a tiempo, el último valor es None (después del evento `error`).
+    `player` es la clave del jugador en la admisión del governor, como en /start_game.
+    """
+    state = None
+    graph = await _graph()
+    try:
+        with llm_governor.admission(player):
+            async for mode, chunk in graph.astream(graph_input, config=thread_config, stream_mode=["custom", "values"]):
+                if mode == "custom":
+                    yield _sse(chunk["event"], chunk["data"])
+                else:
+                    state = chunk
+    except LLMOverloaded as exc:
+        # Los headers ya salieron con 200: el 429 viaja como evento
+        yield _sse("error", {"status": 429, "detail": str(exc), "retry_after": exc.retry_after})
+        state = None
+    except LLMUnavailable as exc:
+        yield _sse("error", {"status": 503, "detail": str(exc), "retry_after": 1})
+        state = None
+    yield state
+
+# --- Helpers de los endpoints de juego ---
+
+async def _new_game(request: StartGameRequest):
+    # En una sala el tema es el de la sala
+    topic = request.topic
+    if request.room_id:
+        topic = await (await _loaded_agents()).room_hub.topic(request.room_id)
+        if topic is None:
+            raise HTTPException(status_code=404, detail="Sala no encontrada")
+    elif not topic:
+        raise HTTPException(status_code=422, detail="Falta el tema (topic)")
+
+    # Crear sesión en DB (bloqueante, va al threadpool)
+    session_id = await run_in_threadpool(create_session, request.player_name)
     
-    # 1. Inyectar respuesta del usuario al grafo pausado
-    app.update_state(thread_config, {"user_answer": request.user_answer})
+    # Configurar hilo de LangGraph
+    thread_config = {"configurable": {"thread_id": str(session_id)}}
     
-    # 2. Reanudar ejecución (Evaluar -> [Check Game Over] -> Generar Siguiente Pregunta)
-    # LangGraph correrá hasta la próxima pausa (después de generar la siguiente pregunta) 
-    # O hasta terminar si es Game Over.
-    output = app.invoke(None, config=thread_config)
+    # Estado Inicial
+    initial_state: TriviaState = { 
+        "recent_questions": [], "asked_fingerprints": set(),
+        "question_count": 0, "score": 0, "game_over": False,
+        "session_id": session_id, "player_name": request.player_name,
+        "topic": topic, "room_id": request.room_id or "",
+        "current_question": "", "current_answer": "", "user_answer": "", "last_feedback": "",
+        "last_correct": False, "last_points": 0,
+        "next_question": "", "next_answer": ""
+    }
+    return session_id, thread_config, initial_state
+
+async def _resume_turn(request: ChatRequest) -> dict:
+    thread_config = {"configurable": {"thread_id": str(request.session_id)}}
     
-    # 3. Construir respuesta 
+    # La partida tiene que existir y seguir en curso (los hilos terminados se liberan)
+    graph = await _graph()
+    snapshot = await graph.aget_state(thread_config)
+    if not snapshot.values:
+        raise HTTPException(status_code=404, detail="Partida no encontrada o ya finalizada")
+    # Turno que quedó a medias (el Juez terminó y la siguiente pregunta falló o el stream
+    # se cortó): el estado ya trae el veredicto y `next` sigue pendiente. El reintento
+    # retoma el grafo donde quedó, sin volver a inyectar la respuesta ni a juzgarla.
+    resuming = bool(snapshot.next) and "judge" not in snapshot.next
+    current_turn = snapshot.values["question_count"] + (0 if resuming else 1)
+    # Un turno ya aplicado cuyo resultado ya no está (desalojado o vencido) no se repite
+    if request.turn is not None and request.turn != current_turn:
+        raise HTTPException(status_code=409, detail="Ese turno no es el actual de la partida")
     
+    # Inyectar respuesta del usuario al grafo pausado
+    if not resuming:
+        await graph.aupdate_state(thread_config, {"user_answer": request.user_answer})
+    return thread_config
+
+def _start_response(output: dict, session_id: int) -> GameStateResponse:
+    return GameStateResponse(
+        message=output["current_question"],
+        is_question=True,
+        game_over=False,
+        score=0,
+        session_id=session_id
+    )
+
+def _turn_response(output: dict, session_id: int) -> GameStateResponse:
     if output["game_over"]:
         return GameStateResponse(
             message=f"Juego Terminado. {output.get('last_feedback', '')}",
             is_question=False,
             game_over=True,
             score=output["score"],
-            session_id=request.session_id
+            session_id=session_id
         )
     else:
         # Combinamos Feedback anterior + Nueva Pregunta
@@ -112,19 +454,93 @@ def submit_answer(request: ChatRequest) -> GameStateResponse:
             is_question=True,
             game_over=False,
             score=output["score"],
-            session_id=request.session_id
+            session_id=session_id
         )
 
 @app_api.get("/leaderboard", response_model=List[LeaderboardEntry])
-def leaderboard():
-    """Devuelve el Top 5"""
-    results = get_leaderboard()
+def leaderboard(
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(5, ge=1, le=settings.LEADERBOARD_MAX_PAGE),
+):
+    """
+    Devuelve una página del ranking (por defecto el Top 5, servido desde memoria).
+
+    Las páginas siguientes usan paginación keyset (ver `get_leaderboard_page`).
+    Incluye ETag y Cache-Control: si el cliente manda `If-None-Match` con el ETag
+    vigente se responde 304 sin cuerpo.
+    """
+    entries = get_leaderboard_page(offset, limit)
+    etag = leaderboard_etag(entries)
+    cache_headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.LEADERBOARD_MAX_AGE_SECONDS}",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cache_headers)
+    response.headers.update(cache_headers)
+
     return [
         LeaderboardEntry(
-            player_name=row.player_name, 
-            score=row.total_score,
-            date=row.start_time.strftime("%Y-%m-%d")
-        ) for row in results
+            player_name=entry.player_name, 
+            score=entry.score,
+            date=entry.start_time.strftime("%Y-%m-%d")
+        ) for entry in entries
     ]
 
+@app_api.get("/sessions/{session_id}/rank", response_model=RankResponse)
+def session_rank(session_id: int):
+    """Posición de una sesión en el ranking global (O(log n) con el índice en memoria)."""
+    result = get_session_rank(session_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Sesión no encontrada")
+    rank, total, game = result
+    return RankResponse(
+        session_id=game.id,
+        player_name=game.player_name,
+        score=game.total_score,
+        rank=rank,
+        total_sessions=total
+    )
+
+@app_api.get("/stats")
+def stats():
+    """Métricas internas de las optimizaciones (pools, caches, etc)."""
+    agents = _agents()
+    return {
+        "question_pool": agents.question_pool.stats(),
+        "question_index": agents.question_index.stats() if agents.question_index else None,
+        "meli_knowledge": agents.meli_knowledge.stats() if agents.meli_knowledge else None,
+        "answer_matcher": matcher_stats.as_dict(),
+        "verdict_cache": agents.verdict_cache.stats() if agents.verdict_cache else None,
+        "checkpointer": agents.memory.stats() if hasattr(agents.memory, "stats") else None,
+        "audit_writer": audit_writer.stats(),
+        "leaderboard": top_scores.stats(),
+        "rank_index": rank_index.stats(),
+        "score_feed": score_feed.stats(),
+        "rooms": agents.room_hub.stats(),
+        "turn_results": turn_results.stats(),
+        "llm": llm_stats(),
+        "llm_governor": llm_governor.stats(),
+        "llm_calls": {
+            "question": agents.question_policy.stats(),
+            "judge": agents.judge_policy.stats(),
+            "judge_batch": agents.judge_batch_policy.stats(),
+        },
+        "judge_batcher": agents.judge_batcher.stats() if agents.judge_batcher else None,
+        "llm_models": {"question": agents.question_router.stats(), "judge": agents.judge_router.stats()},
+    }
+
+@app_api.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas en formato Prometheus (latencias por endpoint y nodo, LLM, DB, checkpointer)."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Métricas deshabilitadas")
+    # El scrape no carga el grafo: el gauge se actualiza solo si ya está cargado
+    if _agents_module is not None and hasattr(_agents_module.memory, "stats"):
+        checkpoint_threads.set(_agents_module.memory.stats()["live_threads"])
+    body, content_type = render()
+    return Response(content=body, media_type=content_type)
+
 # Para correr usar comando: uvicorn src.api:app_api --reload
\ No newline at end of file
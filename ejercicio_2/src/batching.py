@@ -0,0 +1,93 @@
+import asyncio
+import contextvars
+import logging
+from collections import Counter
+from typing import Awaitable, Callable, Generic, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# flush(items) -> un resultado por item, en el mismo orden
+BatchFlush = Callable[[List[T]], Awaitable[List[R]]]
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Junta pedidos concurrentes y los resuelve de a lotes con una sola llamada.
+
+    El primer pedido abre una ventana de `window` segundos; los que llegan mientras
+    tanto se suman al lote. El lote sale al cerrar la ventana o apenas llega a
+    `max_size`. Cada pedido espera su resultado; si la llamada del lote falla, todos
+    los pedidos del lote reciben la misma excepción.
+
+    La llamada corre en su propia tarea: si un pedido se cancela (el cliente se fue),
+    el resto del lote sigue.
+
+    Args:
+        name (str): Nombre del lote (logs y métricas).
+        flush: Corrutina que resuelve un lote (un resultado por item, en orden).
+        window (float): Segundos que se espera a juntar más pedidos.
+        max_size (int): Pedidos máximos por lote.
+    """
+
+    def __init__(self, name: str, flush: BatchFlush, window: float, max_size: int):
+        self.name = name
+        self.flush = flush
+        self.window = window
+        self.max_size = max_size
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._counters = Counter()
+        self._sizes = Counter()
+
+    async def submit(self, item: T) -> R:
+        """Suma `item` al lote abierto y espera su resultado."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        self._counters["items"] += 1
+        if len(self._pending) >= self.max_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._dispatch)
+        return await future
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Los pedidos cancelados mientras esperaban no viajan
+        batch = [(item, future) for item, future in self._pending if not future.done()]
+        self._pending = []
+        if batch:
+            asyncio.create_task(self._run(batch), context=contextvars.Context())
+
+    async def _run(self, batch: List[Tuple[T, asyncio.Future]]):
+        self._counters["batches"] += 1
+        self._sizes[len(batch)] += 1
+        try:
+            results = await self.flush([item for item, _ in batch])
+        except Exception as exc:
+            self._counters["failed_batches"] += 1
+            logger.warning("Falló el lote '%s' de %d pedidos: %r", self.name, len(batch), exc)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        batches = self._counters["batches"]
+        return {
+            "window_ms": round(self.window * 1000, 1),
+            "max_size": self.max_size,
+            "items": self._counters["items"],
+            "batches": batches,
+            "failed_batches": self._counters["failed_batches"],
+            "avg_batch_size": round(sum(size * n for size, n in self._sizes.items()) / batches, 2) if batches else None,
+            "max_batch_size": max(self._sizes) if self._sizes else None,
+        }
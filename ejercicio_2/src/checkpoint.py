@@ -0,0 +1,630 @@
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import ormsgpack
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+# (task_id, idx) -> (task_id, channel, valor serializado, task_path)
+Writes = Dict[Tuple[str, int], Tuple[str, str, Tuple[str, bytes], str]]
+
+
+@dataclass
+class ThreadRecord:
+    """Último checkpoint de un hilo junto con sus pending writes, ya serializados."""
+    checkpoint_id: str
+    parent_id: Optional[str]
+    checkpoint: Tuple[str, bytes]
+    metadata: Tuple[str, bytes]
+    writes: Writes = field(default_factory=dict)
+    last_access: float = field(default_factory=time.monotonic)
+
+    def size(self) -> int:
+        """Bytes aproximados que ocupa el registro (payloads serializados)."""
+        return (
+            len(self.checkpoint[1]) + len(self.metadata[1])
+            + sum(len(value[1]) for _, _, value, _ in self.writes.values())
+        )
+
+
+class LatestCheckpointSaver(BaseCheckpointSaver[int], ABC):
+    """
+    Checkpointer que guarda SOLO el último checkpoint de cada hilo.
+
+    El juego nunca usa time-travel: para reanudar un turno alcanza con el último
+    checkpoint y sus pending writes. Guardar solo eso hace que el costo por
+    partida sea constante en vez de crecer con cada superstep.
+
+    Las subclases definen dónde viven los registros implementando los métodos
+    abstractos `_load`, `_store`, `_add_writes`, `_delete` e `_iter_keys`: a una que
+    le falte alguno no se la puede instanciar.
+
+    Args:
+        drop_finished (bool): Si es True, el hilo se borra apenas su estado llega
+            a `game_over` (nadie vuelve a leer una partida terminada).
+    """
+
+    # True si el storage hace I/O bloqueante (los métodos async lo mandan a un hilo)
+    blocking_io = False
+
+    def __init__(self, *, drop_finished: bool = False, serde=None):
+        super().__init__(serde=serde)
+        self.drop_finished = drop_finished
+
+    @abstractmethod
+    def _load(self, key: str) -> Optional[ThreadRecord]:
+        """Registro del hilo, o None si no existe."""
+
+    @abstractmethod
+    def _store(self, key: str, record: ThreadRecord):
+        """Reemplaza el checkpoint del hilo (y descarta los writes del anterior)."""
+
+    @abstractmethod
+    def _add_writes(self, key: str, checkpoint_id: str, writes: Writes):
+        """Agrega writes al checkpoint `checkpoint_id` si sigue siendo el último."""
+
+    @abstractmethod
+    def _delete(self, key: str):
+        """Borra el hilo (no falla si no existe)."""
+
+    @abstractmethod
+    def _iter_keys(self) -> Iterator[str]:
+        """Claves de todos los hilos guardados."""
+
+    # --- API de BaseCheckpointSaver ---
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id, checkpoint_ns = _thread_of(config)
+        record = self._load(_key(thread_id, checkpoint_ns))
+        if record is None:
+            return None
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id and checkpoint_id != record.checkpoint_id:
+            return None  # los checkpoints anteriores no se conservan
+        return self._to_tuple(thread_id, checkpoint_ns, record)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        keys = [_key(*_thread_of(config))] if config else list(self._iter_keys())
+        returned = 0
+        for key in keys:
+            if limit is not None and returned >= limit:
+                return
+            record = self._load(key)
+            if record is None:
+                continue
+            if before and get_checkpoint_id(before) and record.checkpoint_id >= get_checkpoint_id(before):
+                continue
+            thread_id, _, checkpoint_ns = key.partition("|")
+            tuple_ = self._to_tuple(thread_id, checkpoint_ns, record)
+            if filter and not all(tuple_.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            returned += 1
+            yield tuple_
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id, checkpoint_ns = _thread_of(config)
+        record = ThreadRecord(
+            checkpoint_id=checkpoint["id"],
+            parent_id=config["configurable"].get("checkpoint_id"),
+            checkpoint=self.serde.dumps_typed(checkpoint),
+            metadata=self.serde.dumps_typed(get_checkpoint_metadata(config, metadata)),
+        )
+        self._on_put(_key(thread_id, checkpoint_ns), record, checkpoint)
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id, checkpoint_ns = _thread_of(config)
+        serialized: Writes = {
+            (task_id, WRITES_IDX_MAP.get(channel, idx)): (task_id, channel, self.serde.dumps_typed(value), task_path)
+            for idx, (channel, value) in enumerate(writes)
+        }
+        self._add_writes(_key(thread_id, checkpoint_ns), config["configurable"]["checkpoint_id"], serialized)
+
+    def delete_thread(self, thread_id: str) -> None:
+        for key in list(self._iter_keys()):
+            if key.partition("|")[0] == thread_id:
+                self._delete(key)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await self._run(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await self._run(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await self._run(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return await self._run(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await self._run(self.delete_thread, thread_id)
+
+    # --- Helpers ---
+
+    async def _run(self, fn, *args):
+        if self.blocking_io:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def _on_put(self, key: str, record: ThreadRecord, checkpoint: Checkpoint):
+        if self.drop_finished and checkpoint["channel_values"].get("game_over"):
+            self._delete(key)
+            return
+        self._store(key, record)
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, record: ThreadRecord) -> CheckpointTuple:
+        writes = sorted(record.writes.items(), key=lambda item: writes_sort_key(item[1][3], *item[0]))
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": record.checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed(record.checkpoint),
+            metadata=self.serde.loads_typed(record.metadata),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": record.parent_id,
+                    }
+                }
+                if record.parent_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed(value))
+                for _, (task_id, channel, value, _) in writes
+            ],
+        )
+
+
+class BoundedMemorySaver(LatestCheckpointSaver):
+    """
+    Checkpointer en memoria con consumo acotado.
+
+    - Guarda solo el último checkpoint por hilo.
+    - Borra el hilo apenas el estado llega a `game_over`.
+    - Desaloja hilos inactivos por TTL y, si se supera `max_threads` o
+      `max_bytes`, los menos usados recientemente (LRU).
+
+    Args:
+        max_threads (int): Máximo de partidas vivas.
+        max_bytes (int): Presupuesto total aproximado de memoria (bytes serializados).
+        idle_ttl_seconds (float): Tiempo sin actividad tras el cual se desaloja un hilo.
+        drop_finished (bool): Si es True, los hilos terminados se borran de inmediato.
+    """
+
+    def __init__(self, *, max_threads: int = 10000, max_bytes: int = 256 * 1024 * 1024,
+                 idle_ttl_seconds: float = 3600, drop_finished: bool = True, serde=None):
+        super().__init__(drop_finished=drop_finished, serde=serde)
+        self.max_threads = max_threads
+        self.max_bytes = max_bytes
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._threads: "OrderedDict[str, ThreadRecord]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._evicted = {"finished": 0, "idle": 0, "budget": 0}
+        self._lock = threading.RLock()
+
+    def stats(self) -> dict:
+        return {
+            "live_threads": len(self._threads),
+            "approx_bytes": self._bytes,
+            "evicted": dict(self._evicted),
+        }
+
+    def _load(self, key: str) -> Optional[ThreadRecord]:
+        with self._lock:
+            record = self._threads.get(key)
+            if record is not None:
+                record.last_access = time.monotonic()
+                self._threads.move_to_end(key)
+            return record
+
+    def _store(self, key: str, record: ThreadRecord):
+        with self._lock:
+            self._bytes -= self._sizes.get(key, 0)
+            self._threads[key] = record
+            self._threads.move_to_end(key)
+            self._sizes[key] = record.size()
+            self._bytes += self._sizes[key]
+            record.last_access = time.monotonic()
+            self._enforce_limits()
+
+    def _add_writes(self, key: str, checkpoint_id: str, writes: Writes):
+        with self._lock:
+            record = self._threads.get(key)
+            if record is None or record.checkpoint_id != checkpoint_id:
+                return
+            for inner_key, write in writes.items():
+                if inner_key[1] >= 0 and inner_key in record.writes:
+                    continue
+                record.writes[inner_key] = write
+            self._store(key, record)
+
+    def _delete(self, key: str):
+        with self._lock:
+            if self._threads.pop(key, None) is not None:
+                self._bytes -= self._sizes.pop(key)
+
+    def _iter_keys(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._threads))
+
+    def _on_put(self, key: str, record: ThreadRecord, checkpoint: Checkpoint):
+        if self.drop_finished and checkpoint["channel_values"].get("game_over") and key in self._threads:
+            self._evicted["finished"] += 1
+        super()._on_put(key, record, checkpoint)
+
+    def _enforce_limits(self):
+        deadline = time.monotonic() - self.idle_ttl_seconds
+        while self._threads:
+            oldest_key, oldest = next(iter(self._threads.items()))
+            if oldest.last_access < deadline:
+                reason = "idle"
+            elif len(self._threads) > self.max_threads or self._bytes > self.max_bytes:
+                reason = "budget"
+            else:
+                break
+            self._delete(oldest_key)
+            self._evicted[reason] += 1
+
+
+class SQLiteSaver(LatestCheckpointSaver):
+    """
+    Checkpointer durable sobre un archivo SQLite compartido por todos los workers.
+
+    Cada hilo ocupa una fila con su último checkpoint (msgpack, comprimido con
+    zlib si supera `compress_min_bytes`); los pending writes van en otra tabla
+    para que tareas paralelas no se pisen. Usa un pool de conexiones en modo WAL.
+
+    Args:
+        path (str): Archivo SQLite.
+        pool_size (int): Conexiones abiertas reutilizables.
+        idle_ttl_seconds (float): Hilos sin actividad más viejos que esto se purgan.
+        compress_min_bytes (int): Umbral a partir del cual se comprime el registro.
+    """
+
+    blocking_io = True
+    PRUNE_EVERY = 256  # puts entre purgas de hilos vencidos
+
+    def __init__(self, path: str, *, pool_size: int = 4, idle_ttl_seconds: float = 3600,
+                 compress_min_bytes: int = 1024, busy_timeout_ms: int = 5000,
+                 drop_finished: bool = True, serde=None):
+        super().__init__(drop_finished=drop_finished, serde=serde)
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.compress_min_bytes = compress_min_bytes
+        self._puts = 0
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(pool_size):
+            conn = sqlite3.connect(path, timeout=busy_timeout_ms / 1000,
+                                   check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._pool.put(conn)
+        with self._conn() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    thread_key TEXT PRIMARY KEY,
+                    checkpoint_id TEXT NOT NULL,
+                    record BLOB NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_checkpoints_updated_at ON checkpoints (updated_at);
+                CREATE TABLE IF NOT EXISTS checkpoint_writes (
+                    thread_key TEXT NOT NULL,
+                    checkpoint_id TEXT NOT NULL,
+                    task_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    payload BLOB NOT NULL,
+                    PRIMARY KEY (thread_key, checkpoint_id, task_id, idx)
+                );
+            """)
+
+    @contextmanager
+    def _conn(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def stats(self) -> dict:
+        with self._conn() as conn:
+            threads, record_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(record)), 0) FROM checkpoints").fetchone()
+            write_bytes = conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(payload)), 0) FROM checkpoint_writes").fetchone()[0]
+        return {"live_threads": threads, "approx_bytes": record_bytes + write_bytes}
+
+    def _load(self, key: str) -> Optional[ThreadRecord]:
+        with self._conn() as conn:
+            conn.execute("BEGIN")
+            try:
+                row = conn.execute("SELECT record FROM checkpoints WHERE thread_key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                record = _unpack_record(row[0])
+                for task_id, idx, payload in conn.execute(
+                    "SELECT task_id, idx, payload FROM checkpoint_writes"
+                    " WHERE thread_key = ? AND checkpoint_id = ?", (key, record.checkpoint_id)
+                ):
+                    record.writes[(task_id, idx)] = _unpack_write(payload)
+                return record
+            finally:
+                conn.execute("COMMIT")
+
+    def _store(self, key: str, record: ThreadRecord):
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints (thread_key, checkpoint_id, record, updated_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key, record.checkpoint_id, _pack_record(record, self.compress_min_bytes), now),
+                )
+                conn.execute(
+                    "DELETE FROM checkpoint_writes WHERE thread_key = ? AND checkpoint_id != ?",
+                    (key, record.checkpoint_id),
+                )
+                self._puts += 1
+                if self._puts % self.PRUNE_EVERY == 0:
+                    self._prune_idle(conn, now - self.idle_ttl_seconds)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _add_writes(self, key: str, checkpoint_id: str, writes: Writes):
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for (task_id, idx), write in writes.items():
+                    verb = "INSERT OR IGNORE" if idx >= 0 else "INSERT OR REPLACE"
+                    conn.execute(
+                        f"{verb} INTO checkpoint_writes (thread_key, checkpoint_id, task_id, idx, payload)"
+                        " SELECT ?, ?, ?, ?, ? WHERE EXISTS"
+                        " (SELECT 1 FROM checkpoints WHERE thread_key = ? AND checkpoint_id = ?)",
+                        (key, checkpoint_id, task_id, idx, _pack_write(write), key, checkpoint_id),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _delete(self, key: str):
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM checkpoints WHERE thread_key = ?", (key,))
+            conn.execute("DELETE FROM checkpoint_writes WHERE thread_key = ?", (key,))
+            conn.execute("COMMIT")
+
+    def _iter_keys(self) -> Iterator[str]:
+        with self._conn() as conn:
+            return iter([row[0] for row in conn.execute("SELECT thread_key FROM checkpoints")])
+
+    @staticmethod
+    def _prune_idle(conn: sqlite3.Connection, deadline: float):
+        conn.execute(
+            "DELETE FROM checkpoint_writes WHERE thread_key IN"
+            " (SELECT thread_key FROM checkpoints WHERE updated_at < ?)", (deadline,))
+        conn.execute("DELETE FROM checkpoints WHERE updated_at < ?", (deadline,))
+
+
+class RedisSaver(LatestCheckpointSaver):
+    """
+    Checkpointer durable sobre Redis (o cualquier servidor compatible: Valkey,
+    Memorystore, KeyDB). Requiere el paquete opcional `redis`.
+
+    Cada hilo usa una clave con el último checkpoint y un hash con sus pending
+    writes; ambas expiran tras `idle_ttl_seconds` sin actividad. El cliente
+    reutiliza conexiones de un `ConnectionPool`.
+    """
+
+    blocking_io = True
+
+    def __init__(self, url: str, *, pool_size: int = 8, idle_ttl_seconds: float = 3600,
+                 compress_min_bytes: int = 1024, prefix: str = "trivia:",
+                 drop_finished: bool = True, serde=None):
+        try:
+            import redis
+        except ImportError as exc:
+            raise ImportError("CHECKPOINTER=redis requiere `pip install redis`") from exc
+        super().__init__(drop_finished=drop_finished, serde=serde)
+        self.idle_ttl_seconds = int(idle_ttl_seconds)
+        self.compress_min_bytes = compress_min_bytes
+        self.prefix = prefix
+        pool = redis.ConnectionPool.from_url(url, max_connections=pool_size)
+        self._redis = redis.Redis(connection_pool=pool)
+
+    def stats(self) -> dict:
+        return {"live_threads": sum(1 for _ in self._iter_keys())}
+
+    def _load(self, key: str) -> Optional[ThreadRecord]:
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.get(self._ckpt_key(key))
+        pipe.hgetall(self._writes_key(key))
+        packed, writes = pipe.execute()
+        if packed is None:
+            return None
+        record = _unpack_record(packed)
+        prefix = f"{record.checkpoint_id}|".encode()
+        for field_, payload in writes.items():
+            if field_.startswith(prefix):
+                _, task_id, idx = field_.decode().split("|")
+                record.writes[(task_id, int(idx))] = _unpack_write(payload)
+        return record
+
+    def _store(self, key: str, record: ThreadRecord):
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.set(self._ckpt_key(key), _pack_record(record, self.compress_min_bytes), ex=self.idle_ttl_seconds)
+        pipe.delete(self._writes_key(key))
+        pipe.execute()
+
+    def _add_writes(self, key: str, checkpoint_id: str, writes: Writes):
+        # Los writes de un checkpoint viejo se ignoran al leer y se borran en el próximo _store
+        pipe = self._redis.pipeline(transaction=True)
+        writes_key = self._writes_key(key)
+        for (task_id, idx), write in writes.items():
+            field_ = f"{checkpoint_id}|{task_id}|{idx}"
+            if idx >= 0:
+                pipe.hsetnx(writes_key, field_, _pack_write(write))
+            else:
+                pipe.hset(writes_key, field_, _pack_write(write))
+        pipe.expire(writes_key, self.idle_ttl_seconds)
+        pipe.execute()
+
+    def _delete(self, key: str):
+        self._redis.delete(self._ckpt_key(key), self._writes_key(key))
+
+    def _iter_keys(self) -> Iterator[str]:
+        start = len(self._ckpt_key(""))
+        for raw in self._redis.scan_iter(match=self._ckpt_key("*")):
+            yield raw.decode()[start:]
+
+    def _ckpt_key(self, key: str) -> str:
+        return f"{self.prefix}ckpt:{key}"
+
+    def _writes_key(self, key: str) -> str:
+        return f"{self.prefix}writes:{key}"
+
+
+# --- Serialización compacta (msgpack + zlib opcional) ---
+_RAW, _ZLIB = b"m", b"z"
+
+
+def _pack_record(record: ThreadRecord, compress_min_bytes: int) -> bytes:
+    payload = ormsgpack.packb([
+        record.checkpoint_id, record.parent_id,
+        record.checkpoint[0], record.checkpoint[1],
+        record.metadata[0], record.metadata[1],
+    ])
+    if len(payload) >= compress_min_bytes:
+        return _ZLIB + zlib.compress(payload, 1)
+    return _RAW + payload
+
+
+def _unpack_record(data: bytes) -> ThreadRecord:
+    payload = zlib.decompress(data[1:]) if data[:1] == _ZLIB else data[1:]
+    checkpoint_id, parent_id, ck_type, ck_bytes, md_type, md_bytes = ormsgpack.unpackb(payload)
+    return ThreadRecord(checkpoint_id, parent_id, (ck_type, ck_bytes), (md_type, md_bytes))
+
+
+def _pack_write(write: Tuple[str, str, Tuple[str, bytes], str]) -> bytes:
+    task_id, channel, (value_type, value), task_path = write
+    return ormsgpack.packb([task_id, channel, value_type, value, task_path])
+
+
+def _unpack_write(data: bytes) -> Tuple[str, str, Tuple[str, bytes], str]:
+    task_id, channel, value_type, value, task_path = ormsgpack.unpackb(data)
+    return task_id, channel, (value_type, value), task_path
+
+
+def build_checkpointer(settings) -> BaseCheckpointSaver:
+    """Construye el checkpointer según `settings.CHECKPOINTER` ("memory", "bounded", "sqlite" o "redis")."""
+    if settings.CHECKPOINTER == "memory":
+        return MemorySaver()
+    if settings.CHECKPOINTER == "bounded":
+        return BoundedMemorySaver(
+            max_threads=settings.CHECKPOINT_MAX_THREADS,
+            max_bytes=settings.CHECKPOINT_MAX_BYTES,
+            idle_ttl_seconds=settings.CHECKPOINT_IDLE_TTL_SECONDS,
+        )
+    if settings.CHECKPOINTER == "sqlite":
+        return SQLiteSaver(
+            settings.CHECKPOINT_SQLITE_PATH,
+            pool_size=settings.CHECKPOINT_POOL_SIZE,
+            idle_ttl_seconds=settings.CHECKPOINT_IDLE_TTL_SECONDS,
+            compress_min_bytes=settings.CHECKPOINT_COMPRESS_MIN_BYTES,
+        )
+    if settings.CHECKPOINTER == "redis":
+        return RedisSaver(
+            settings.CHECKPOINT_REDIS_URL,
+            pool_size=settings.CHECKPOINT_POOL_SIZE,
+            idle_ttl_seconds=settings.CHECKPOINT_IDLE_TTL_SECONDS,
+            compress_min_bytes=settings.CHECKPOINT_COMPRESS_MIN_BYTES,
+        )
+    raise ValueError(f"CHECKPOINTER desconocido: {settings.CHECKPOINTER!r}")
+
+
+def _thread_of(config: RunnableConfig) -> Tuple[str, str]:
+    configurable = config["configurable"]
+    return str(configurable["thread_id"]), configurable.get("checkpoint_ns", "")
+
+
+def _key(thread_id: str, checkpoint_ns: str) -> str:
+    return f"{thread_id}|{checkpoint_ns}"
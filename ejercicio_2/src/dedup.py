@@ -0,0 +1,233 @@
+import re
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.matcher import normalize_answer
+
+# Relleno de la "plantilla" de una pregunta: no dice de qué trata. "quién", "cuándo",
+# "dónde" o "año" sí se quedan (cambian lo que se pregunta).
+QUESTION_WORDS = {
+    "que", "cual", "cuales", "como", "es", "son", "fue", "fueron", "era", "se", "en", "por",
+    "para", "con", "y", "o", "su", "sus", "nombre", "llama", "llamaba", "conocido", "conocida",
+}
+
+# Buckets de la tabla de frecuencias (IDF) de cada tema
+DF_BUCKETS = 1 << 14
+
+
+def text_features(text: str) -> np.ndarray:
+    """Hashes de las palabras de contenido del texto (sin acentos ni artículos) y de sus trigramas."""
+    words = [word for word in normalize_answer(text).split() if word not in QUESTION_WORDS]
+    grams = [f" {word} "[i:i + 3] for word in words for i in range(len(word))]
+    return np.array([zlib.crc32(feature.encode("utf-8")) for feature in words + grams], dtype=np.uint32)
+
+
+def question_features(text: str) -> np.ndarray:
+    """
+    `text_features` de la pregunta.
+
+    Solo se mira la última frase entre "¿" y "?": el saludo del anfitrión ("¡Atención,
+    gamers!") cambia en cada respuesta del LLM y no es parte de la pregunta.
+    """
+    clauses = re.findall(r"¿([^¿?]+)\?", text)
+    return text_features(clauses[-1] if clauses else text)
+
+
+def embed_features(features: List[np.ndarray], df: np.ndarray, docs: int, dim: int = 256) -> np.ndarray:
+    """
+    Embeddings (una fila por texto) de norma 1: feature hashing con signo, cada feature
+    pesada por su IDF (`df` = frecuencias por bucket en `docs` documentos).
+    """
+    rows = np.repeat(np.arange(len(features)), [len(f) for f in features])
+    hashes = np.concatenate(features) if features else np.zeros(0, dtype=np.uint32)
+    idf = np.log((docs + 1) / (df[hashes % DF_BUCKETS] + 1)) + 1
+    signs = np.where(hashes & 0x80000000, 1.0, -1.0)
+    vectors = np.zeros((len(features), dim), dtype=np.float32)
+    np.add.at(vectors, (rows, hashes % dim), (idf * signs).astype(np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def document_frequencies(features: List[np.ndarray]) -> np.ndarray:
+    """Tabla de frecuencias (documentos por bucket) para `embed_features`."""
+    df = np.zeros(DF_BUCKETS, dtype=np.int32)
+    for hashes in features:
+        np.add.at(df, np.unique(hashes % DF_BUCKETS), 1)
+    return df
+
+
+class _TopicIndex:
+    """Buffer circular de preguntas de un tema con sus embeddings y frecuencias de features."""
+
+    def __init__(self):
+        self.texts: List[str] = []
+        self.features: List[np.ndarray] = []
+        self.vectors: Optional[np.ndarray] = None  # crece al doble hasta `capacity`
+        self.codes: Optional[np.ndarray] = None    # (tablas, filas): se compara tabla por tabla
+        self.df = np.zeros(DF_BUCKETS, dtype=np.int32)
+        self.size = 0
+        self.next = 0
+
+
+class QuestionIndex:
+    """
+    Índice local de preguntas recientes por tema para detectar repetidas entre sesiones.
+
+    El embedding es léxico y local (sin modelo ni red): feature hashing con signo de las
+    palabras de contenido y sus trigramas, pesados por IDF del tema. Las palabras que
+    comparten muchas preguntas del tema ("lanzó", "primer") pesan poco y las que la
+    identifican (el juego, la persona) pesan mucho. Detecta la misma pregunta reescrita
+    ("¿Quién fundó MercadoLibre?" / "¿Quién es el fundador de Mercado Libre?"), pero no
+    sinónimos sin palabras en común.
+
+    - "exact": similitud coseno contra todas las preguntas del tema (NumPy, fuerza bruta).
+    - "lsh": aproximado con hiperplanos aleatorios. Cada pregunta tiene `lsh_tables`
+      códigos de `lsh_bits` bits, y solo se compara (exacto) contra las que comparten
+      al menos un código. Más rápido con índices grandes, a cambio de algo de recall.
+
+    Cada tema guarda las últimas `capacity` preguntas; se mantienen `max_topics` temas
+    (los temas libres que nadie vuelve a jugar se desalojan).
+
+    Args:
+        capacity (int): Preguntas recientes por tema.
+        threshold (float): Similitud coseno a partir de la cual una pregunta es repetida.
+        mode (str): "exact" o "lsh".
+        max_topics (int): Temas con índice en memoria (LRU).
+        dim (int): Dimensión del embedding.
+        lsh_tables (int): Tablas de LSH (más tablas = más recall y más candidatos).
+        lsh_bits (int): Bits por código (más bits = buckets más chicos).
+    """
+
+    def __init__(self, capacity: int = 5000, threshold: float = 0.8, mode: str = "exact",
+                 max_topics: int = 256, dim: int = 256, lsh_tables: int = 32, lsh_bits: int = 12,
+                 seed: int = 0):
+        if mode not in ("exact", "lsh"):
+            raise ValueError(f"Modo de índice desconocido: {mode!r}")
+        self.capacity = capacity
+        self.threshold = threshold
+        self.mode = mode
+        self.max_topics = max_topics
+        self.dim = dim
+        self._planes = np.random.default_rng(seed).standard_normal((lsh_tables * lsh_bits, dim)).astype(np.float32)
+        self._weights = (1 << np.arange(lsh_bits)).astype(np.uint32)
+        self._tables, self._bits = lsh_tables, lsh_bits
+        self._topics: "OrderedDict[str, _TopicIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = Counter()
+        self._query_seconds = 0.0
+
+    # --- Embeddings ---
+
+    def _embed(self, index: _TopicIndex, features: List[np.ndarray]) -> np.ndarray:
+        """Embeddings con el IDF actual del tema."""
+        return embed_features(features, index.df, index.size, self.dim)
+
+    def _codes(self, vectors: np.ndarray) -> np.ndarray:
+        """Códigos LSH (uno por tabla) de una matriz de embeddings."""
+        bits = (vectors @ self._planes.T > 0).reshape(len(vectors), self._tables, self._bits)
+        return (bits * self._weights).sum(axis=2).astype(np.uint16)
+
+    def _reindex(self, index: _TopicIndex, rows: int):
+        """Recalcula todos los embeddings con el IDF actual y deja lugar para `rows` filas."""
+        vectors = np.zeros((rows, self.dim), dtype=np.float32)
+        vectors[:index.size] = self._embed(index, index.features)
+        index.vectors = vectors
+        if self.mode == "lsh":
+            index.codes = np.zeros((self._tables, rows), dtype=np.uint16)
+            index.codes[:, :index.size] = self._codes(vectors[:index.size]).T
+
+    # --- API ---
+
+    def add(self, topic: str, question: str):
+        """Agrega una pregunta al índice del tema (pisa la más vieja si está lleno)."""
+        features = question_features(question)
+        with self._lock:
+            index = self._topics.get(topic)
+            if index is None:
+                index = self._topics[topic] = _TopicIndex()
+                while len(self._topics) > self.max_topics:
+                    self._topics.popitem(last=False)
+            self._topics.move_to_end(topic)
+
+            row = index.next
+            if row < index.size:
+                # Buffer lleno: la pregunta más vieja deja de contar en el IDF
+                np.subtract.at(index.df, np.unique(index.features[row] % DF_BUCKETS), 1)
+                index.texts[row], index.features[row] = question, features
+            else:
+                index.texts.append(question)
+                index.features.append(features)
+                index.size += 1
+            np.add.at(index.df, np.unique(features % DF_BUCKETS), 1)
+            index.next = (row + 1) % self.capacity
+
+            # Al crecer (a 64, 128, 256, ...) se reserva el doble y se recalcula el IDF de
+            # todo el tema: al principio las frecuencias cambian mucho. Costo amortizado O(1).
+            if index.vectors is None or index.size > len(index.vectors):
+                self._reindex(index, min(self.capacity, max(64, 2 * index.size)))
+            else:
+                index.vectors[row] = self._embed(index, [features])[0]
+                if self.mode == "lsh":
+                    index.codes[:, row] = self._codes(index.vectors[row:row + 1])[0]
+
+    def nearest(self, topic: str, question: str) -> Optional[Tuple[str, float]]:
+        """La pregunta guardada más parecida del tema y su similitud, o None si no hay ninguna."""
+        features = question_features(question)
+        started = time.perf_counter()
+        with self._lock:
+            index = self._topics.get(topic)
+            if index is None or index.size == 0:
+                return None
+            vector = self._embed(index, [features])[0]
+            rows = None
+            if self.mode == "lsh":
+                code = self._codes(vector[None, :])[0]
+                hits = np.zeros(index.size, dtype=bool)
+                for table in range(self._tables):
+                    hits |= index.codes[table, :index.size] == code[table]
+                rows = np.flatnonzero(hits)
+                self._counters["candidates"] += len(rows)
+                if len(rows) == 0:
+                    return None
+                scores = index.vectors[rows] @ vector
+            else:
+                scores = index.vectors[:index.size] @ vector
+            best = int(np.argmax(scores))
+            result = index.texts[int(rows[best]) if rows is not None else best], float(scores[best])
+        self._query_seconds += time.perf_counter() - started
+        self._counters["queries"] += 1
+        return result
+
+    def find_duplicate(self, topic: str, question: str) -> Optional[str]:
+        """La pregunta reciente del tema que `question` repite (similitud >= threshold), o None."""
+        match = self.nearest(topic, question)
+        self._counters["checks"] += 1
+        if match is None or match[1] < self.threshold:
+            return None
+        self._counters["duplicates"] += 1
+        return match[0]
+
+    def stats(self) -> dict:
+        queries = self._counters["queries"]
+        return {
+            "mode": self.mode,
+            "threshold": self.threshold,
+            "topics": len(self._topics),
+            "stored": sum(index.size for index in self._topics.values()),
+            "checks": self._counters["checks"],
+            "duplicates": self._counters["duplicates"],
+            "avg_query_ms": round(self._query_seconds / queries * 1000, 3) if queries else None,
+            "avg_candidates": round(self._counters["candidates"] / queries, 1) if queries and self.mode == "lsh" else None,
+        }
+
+
+def build_question_index(mode: str, capacity: int, threshold: float, max_topics: int) -> Optional[QuestionIndex]:
+    """Construye el índice según configuración ("exact", "lsh" o "none")."""
+    if mode == "none":
+        return None
+    return QuestionIndex(capacity=capacity, threshold=threshold, mode=mode, max_topics=max_topics)
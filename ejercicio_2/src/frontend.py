@@ -1,3 +1,4 @@
+import json
 import streamlit as st
 import requests
 import pandas as pd
@@ -92,12 +93,36 @@ if "q_count" not in st.session_state:
     st.session_state.q_count = 1
 
 # --- FUNCIONES DE JUEGO ---
+def sse_events(res):
+    """Lee un stream text/event-stream de la API y produce (evento, datos) a medida que llegan."""
+    event = None
+    for line in res.iter_lines(decode_unicode=True):
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            yield event, json.loads(line[len("data: "):])
+
+def busy_warning(retry_after, status=429):
+    """Aviso cuando la API responde 429 (LLM saturado) o 503 (el modelo no respondió a tiempo)."""
+    if status == 503:
+        st.warning("🤖 El modelo tardó demasiado en responder. Probá de nuevo.")
+    else:
+        st.warning(f"⏳ Hay mucha gente jugando. Probá de nuevo en {retry_after} s.")
+
 def start_game(name, topic):
     try:
         payload = {"player_name": name, "topic": topic}
-        res = requests.post(f"{API_URL}/start_game", json=payload)
-        if res.status_code == 200:
-            data = res.json()
+        data = None
+        with requests.post(f"{API_URL}/start_game/stream", json=payload, stream=True) as res:
+            if res.status_code in (429, 503):
+                busy_warning(res.headers.get("Retry-After", "unos"), res.status_code)
+            elif res.status_code == 200:
+                for event, event_data in sse_events(res):
+                    if event == "done":
+                        data = event_data
+                    elif event == "error":
+                        busy_warning(event_data["retry_after"], event_data["status"])
+        if data:
             st.session_state.session_id = data["session_id"]
             st.session_state.game_over = False
             st.session_state.messages = []
@@ -110,18 +135,44 @@ def start_game(name, topic):
 
 def submit_answer(answer):
     try:
-        payload = {"session_id": st.session_state.session_id, "user_answer": answer}
+        # `turn`: si el pedido se repite, la API devuelve el mismo resultado sin aplicarlo dos veces
+        payload = {"session_id": st.session_state.session_id, "user_answer": answer,
+                   "turn": st.session_state.q_count}
         
         # Guardar puntaje anterior para detectar acierto
         prev_score = st.session_state.score
         
         st.session_state.messages.append({"role": "user", "content": answer})
+        with st.chat_message("user", avatar="👨‍💻"):
+            st.markdown(f"**{answer}**")
         
-        with st.spinner("🤖 El Juez está deliberando..."):
-            res = requests.post(f"{API_URL}/submit_answer", json=payload)
+        # Streaming: el feedback del Juez se muestra palabra a palabra y la siguiente
+        # pregunta aparece apenas está lista
+        data = None
+        with st.chat_message("assistant", avatar="🤖"):
+            placeholder = st.empty()
+            placeholder.markdown("🤖 El Juez está deliberando...")
+            feedback = ""
+            with requests.post(f"{API_URL}/submit_answer/stream", json=payload, stream=True) as res:
+                if res.status_code in (429, 503):
+                    placeholder.empty()
+                    busy_warning(res.headers.get("Retry-After", "unos"), res.status_code)
+                elif res.status_code == 200:
+                    for event, event_data in sse_events(res):
+                        if event == "feedback":
+                            feedback += event_data["text"]
+                            placeholder.markdown(f"Feedback: {feedback}▌")
+                        elif event == "score":
+                            placeholder.markdown(f"Feedback: {feedback}\n\n⏳ Preparando la siguiente pregunta...")
+                        elif event == "question":
+                            placeholder.markdown(f"Feedback: {feedback}\n\nSiguiente Pregunta: {event_data['text']}")
+                        elif event == "done":
+                            data = event_data
+                        elif event == "error":
+                            placeholder.empty()
+                            busy_warning(event_data["retry_after"], event_data["status"])
         
-        if res.status_code == 200:
-            data = res.json()
+        if data:
             st.session_state.score = data["score"]
             st.session_state.messages.append({"role": "assistant", "content": data["message"]})
             
@@ -162,9 +213,15 @@ with st.sidebar:
     st.markdown("### 🏆 Hall of Fame")
     if st.button("🔄 Refrescar Ranking"):
         try:
-            res = requests.get(f"{API_URL}/leaderboard")
+            # Revalidación con ETag: si no cambió, la API responde 304 sin cuerpo
+            cached = st.session_state.get("leaderboard_cache")
+            headers = {"If-None-Match": cached["etag"]} if cached else {}
+            res = requests.get(f"{API_URL}/leaderboard", headers=headers)
             if res.status_code == 200:
-                df = pd.DataFrame(res.json())
+                cached = {"etag": res.headers.get("ETag", ""), "rows": res.json()}
+                st.session_state.leaderboard_cache = cached
+            if res.status_code in (200, 304) and cached:
+                df = pd.DataFrame(cached["rows"])
                 st.dataframe(
                     df, 
                     hide_index=True,
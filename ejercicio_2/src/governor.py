@@ -0,0 +1,260 @@
+import asyncio
+import math
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from src.config import settings
+
+T = TypeVar("T")
+
+
+class LLMOverloaded(Exception):
+    """
+    No hay capacidad para otra llamada al LLM (cola llena o espera agotada).
+
+    Args:
+        retry_after (int): Segundos sugeridos antes de reintentar (header Retry-After).
+        reason (str): "queue_full", "player_limit", "rate_limit" o "timeout".
+    """
+
+    def __init__(self, retry_after: int, reason: str):
+        super().__init__(f"LLM saturado ({reason}), reintentar en {retry_after}s")
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class LLMGovernor:
+    """
+    Limita las llamadas al LLM del proceso: concurrencia máxima, ritmo (token bucket) y
+    una cola de espera acotada con turnos por jugador.
+
+    Los pedidos que no entran esperan en una cola por jugador; los lugares que se liberan
+    se reparten en ronda entre jugadores (round-robin), así un jugador con muchos
+    pedidos no deja sin turno a los demás. Si la cola está llena, el jugador ya tiene
+    demasiados pedidos en espera o la espera supera `max_wait`, se rechaza con
+    `LLMOverloaded` en vez de acumular latencia.
+
+    Además rechaza al entrar (`admission` / `check_capacity`), antes de crear la partida,
+    si la cola de espera por un lugar ya está llena o si el token bucket no la vacía
+    dentro de `max_wait`. Solo cuenta la presión real sobre el LLM: los pedidos HTTP en
+    curso que no llaman al modelo (pool, matcher, cache de veredictos) no ocupan lugar.
+
+    Args:
+        max_concurrent (int): Llamadas al LLM en curso a la vez.
+        max_queue (int): Pedidos en espera (en total) antes de rechazar.
+        max_queue_per_player (int): Pedidos en espera por jugador.
+        max_wait (float): Segundos máximos en la cola.
+        rate_per_second (float): Llamadas por segundo (token bucket); 0 = sin límite.
+        burst (int): Capacidad del bucket (0 = max_concurrent).
+    """
+
+    def __init__(self, max_concurrent: int = 16, max_queue: int = 64, max_queue_per_player: int = 4,
+                 max_wait: float = 10.0, rate_per_second: float = 0, burst: int = 0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_queue_per_player = max_queue_per_player
+        self.max_wait = max_wait
+        self.rate_per_second = rate_per_second
+        self.burst = burst or max_concurrent
+
+        self._active = 0
+        self._waiting = 0
+        self._admitted = 0  # pedidos HTTP en curso que pasaron por admission()
+        self._queues: Dict[str, Deque[asyncio.Future]] = {}
+        self._turns: Deque[str] = deque()  # jugadores con pedidos en espera, en orden de turno
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Métricas
+        self._counters = Counter()
+        self._waits: Deque[float] = deque(maxlen=1024)
+        self._max_depth = 0
+        self._service_time = 0.0  # EWMA de la duración de una llamada (para Retry-After)
+
+    @asynccontextmanager
+    async def slot(self, player: str):
+        """Reserva un lugar para una llamada al LLM de `player` mientras dura el bloque."""
+        await self.acquire(player)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self._service_time = elapsed if not self._service_time else 0.8 * self._service_time + 0.2 * elapsed
+            self.release()
+
+    def per_attempt(self, player: str, call: Callable[[], Awaitable[T]]) -> Callable[[], Awaitable[T]]:
+        """
+        Envuelve una fábrica de llamadas para CallPolicy.run: cada intento (reintento o
+        hedge) reserva su propio lugar, así las copias también cuentan contra `max_concurrent`.
+        """
+        async def attempt() -> T:
+            async with self.slot(player):
+                return await call()
+        return attempt
+
+    async def acquire(self, player: str):
+        if self._active < self.max_concurrent and not self._waiting and self._take_token() == 0:
+            self._active += 1
+            self._record_grant(0.0)
+            return
+
+        self._admit(player)
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(player)
+        if queue is None:
+            queue = self._queues[player] = deque()
+            self._turns.append(player)
+        queue.append(future)
+        self._waiting += 1
+        self._max_depth = max(self._max_depth, self._waiting)
+        self._dispatch()
+
+        started = time.monotonic()
+        try:
+            done, _ = await asyncio.wait({future}, timeout=self.max_wait)
+        except asyncio.CancelledError:
+            self._abandon(player, future)
+            raise
+        if not done:
+            self._abandon(player, future)
+            self._counters["timeouts"] += 1
+            raise LLMOverloaded(self.retry_after(), "timeout")
+        self._record_grant(time.monotonic() - started)
+
+    def release(self):
+        self._active -= 1
+        self._dispatch()
+
+    def check_capacity(self, player: Optional[str] = None):
+        """Rechazo temprano (antes de crear la partida o tocar el grafo) si ya no hay lugar."""
+        if self._active < self.max_concurrent and not self._waiting and self._token_wait() == 0:
+            return
+        if self.rate_per_second > 0 and self._token_wait() > self.max_wait:
+            # El ritmo de la cuota no alcanza a atender la cola antes de `max_wait`
+            self._counters["rejected_admission"] += 1
+            raise LLMOverloaded(self.retry_after(), "rate_limit")
+        self._admit(player)
+
+    @contextmanager
+    def admission(self, player: Optional[str] = None):
+        """Rechaza al entrar si no hay lugar; cuenta el pedido HTTP en curso (solo para /stats)."""
+        self.check_capacity(player)
+        self._admitted += 1
+        try:
+            yield
+        finally:
+            self._admitted -= 1
+
+    def retry_after(self) -> int:
+        """Segundos estimados hasta que se vacíe la cola actual."""
+        backlog = self._waiting + 1
+        drain = backlog * (self._service_time or 1.0) / max(1, self.max_concurrent)
+        if self.rate_per_second > 0:
+            drain = max(drain, backlog / self.rate_per_second)
+        return max(1, math.ceil(drain))
+
+    def _token_wait(self) -> float:
+        """Segundos hasta que el bucket tenga tokens para la cola actual + un pedido (sin consumir)."""
+        if self.rate_per_second <= 0:
+            return 0
+        tokens = min(self.burst, self._tokens + (time.monotonic() - self._refilled_at) * self.rate_per_second)
+        return max(0.0, self._waiting + 1 - tokens) / self.rate_per_second
+
+    def _admit(self, player: Optional[str]):
+        if self._waiting >= self.max_queue:
+            self._counters["rejected_queue_full"] += 1
+            raise LLMOverloaded(self.retry_after(), "queue_full")
+        if player is not None and len(self._queues.get(player, ())) >= self.max_queue_per_player:
+            self._counters["rejected_player_limit"] += 1
+            raise LLMOverloaded(self.retry_after(), "player_limit")
+
+    def _dispatch(self):
+        """Reparte los lugares libres entre los jugadores en espera, en ronda."""
+        while self._turns and self._active < self.max_concurrent:
+            delay = self._take_token()
+            if delay:
+                loop = asyncio.get_running_loop()
+                # Un timer por vez (el de un event loop ya cerrado no cuenta)
+                if self._timer is None or self._timer_loop is not loop:
+                    self._timer, self._timer_loop = loop.call_later(delay, self._on_timer), loop
+                return
+            player = self._turns.popleft()
+            queue = self._queues[player]
+            future = queue.popleft()
+            self._waiting -= 1
+            if queue:
+                self._turns.append(player)
+            else:
+                del self._queues[player]
+            self._active += 1
+            future.set_result(None)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def _abandon(self, player: str, future: asyncio.Future):
+        """El pedido se va de la cola (timeout o cancelación); si ya tenía lugar, lo devuelve."""
+        if future.done() and not future.cancelled():
+            self.release()
+            return
+        future.cancel()
+        queue = self._queues.get(player)
+        if queue is not None and future in queue:
+            queue.remove(future)
+            self._waiting -= 1
+            if not queue:
+                del self._queues[player]
+                self._turns.remove(player)
+
+    def _take_token(self) -> float:
+        """Consume un token del bucket. Devuelve 0 si había, o los segundos hasta el próximo."""
+        if self.rate_per_second <= 0:
+            return 0
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate_per_second)
+        self._refilled_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self.rate_per_second
+
+    def _record_grant(self, waited: float):
+        self._counters["granted"] += 1
+        if waited:
+            self._counters["queued"] += 1
+        self._waits.append(waited)
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+
+        def pct(p: float) -> float:
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 1) if waits else 0.0
+
+        return {
+            "active": self._active,
+            "queue_depth": self._waiting,
+            "max_queue_depth": self._max_depth,
+            "waiting_players": len(self._turns),
+            "admitted_requests": self._admitted,
+            "wait_ms": {"p50": pct(0.50), "p95": pct(0.95), "max": pct(1.0)},
+            **{key: self._counters[key] for key in
+               ("granted", "queued", "rejected_admission", "rejected_queue_full",
+                "rejected_player_limit", "timeouts")},
+        }
+
+
+# Governor compartido por todas las llamadas al LLM del proceso
+llm_governor = LLMGovernor(
+    max_concurrent=settings.LLM_MAX_CONCURRENT,
+    max_queue=settings.LLM_QUEUE_SIZE,
+    max_queue_per_player=settings.LLM_QUEUE_PER_PLAYER,
+    max_wait=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+    rate_per_second=settings.LLM_RATE_PER_SECOND,
+    burst=settings.LLM_RATE_BURST,
+)
@@ -0,0 +1,144 @@
+import asyncio
+from collections import Counter, OrderedDict
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+from src.shared_results import SharedResults
+
+R = TypeVar("R")
+
+
+class TurnAborted(Exception):
+    """El cálculo del turno no terminó (se canceló o se cortó el stream): se puede reintentar."""
+
+
+class TurnResults(Generic[R]):
+    """
+    Resultado de cada turno ya respondido, para que un reintento no lo aplique dos veces.
+
+    La clave es `(session_id, turn)`. Un reintento de un turno terminado recibe el
+    resultado guardado sin tocar el grafo, el LLM ni la DB. Si el turno todavía se está
+    calculando, el duplicado espera ese mismo cálculo (single-flight). Los errores no se
+    guardan: el turno quedó sin aplicar y el próximo reintento lo vuelve a calcular.
+
+    Los resultados se guardan en un LRU en memoria del proceso. Con varios workers hace
+    falta `shared` (el backend del checkpointer): cada turno se reserva ahí antes de
+    calcularlo, así que un duplicado que cae en otro worker espera y recibe el mismo
+    resultado en vez de aplicarlo otra vez.
+
+    Args:
+        max_entries (int): Turnos terminados que se guardan (los más viejos se descartan).
+        shared (SharedResults): Reserva y resultado de cada turno entre workers (None = un solo worker).
+    """
+
+    def __init__(self, max_entries: int = 10000, shared: Optional[SharedResults[R]] = None):
+        self.max_entries = max_entries
+        self.shared = shared
+        self._done: "OrderedDict[Hashable, R]" = OrderedDict()
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}  # cálculos lanzados por `run`
+        self._counters = Counter()
+
+    def join(self, key: Hashable) -> Optional[asyncio.Future]:
+        """
+        Future con el resultado del turno si ya terminó o se está calculando; None si
+        nadie lo pidió todavía (el que llama tiene que calcularlo con `begin`).
+        """
+        if key in self._done:
+            self._done.move_to_end(key)
+            self._counters["replayed"] += 1
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(self._done[key])
+            return future
+        future = self._pending.get(key)
+        if future is not None:
+            self._counters["coalesced"] += 1
+        return future
+
+    def begin(self, key: Hashable) -> asyncio.Future:
+        """Marca el turno como en curso; los duplicados esperan el future devuelto."""
+        future = asyncio.get_running_loop().create_future()
+        # Si nadie espera un turno que falló, el error no se loguea como "never retrieved"
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._pending[key] = future
+        self._counters["computed"] += 1
+        return future
+
+    async def claim(self, key: Hashable) -> Optional[R]:
+        """
+        Reserva el turno entre workers (después de `begin`). None si lo calcula este
+        proceso; si no, el resultado que calculó otro worker (espera si está en curso).
+        """
+        if self.shared is None:
+            return None
+        try:
+            result = await self.shared.claim(key)
+        except TimeoutError as exc:
+            raise TurnAborted() from exc
+        if result is not None:
+            self._counters["replayed_shared"] += 1
+        return result
+
+    def finish(self, key: Hashable, result: R):
+        """Guarda el resultado del turno y se lo entrega a los duplicados que esperan."""
+        if self.shared is not None:
+            self.shared.publish_later(key, result)
+        self._done[key] = result
+        self._done.move_to_end(key)
+        while len(self._done) > self.max_entries:
+            self._done.popitem(last=False)
+        future = self._pending.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    def abort(self, key: Hashable, exc: Optional[BaseException] = None):
+        """
+        El turno no se aplicó: los duplicados que esperan reciben `exc` (o TurnAborted).
+        No hace nada si el turno ya terminó.
+        """
+        future = self._pending.pop(key, None)
+        if future is None:
+            return
+        if self.shared is not None:
+            self.shared.release_later(key)
+        self._counters["aborted"] += 1
+        if not future.done():
+            future.set_exception(exc if isinstance(exc, Exception) else TurnAborted())
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[R]]) -> R:
+        """
+        Resultado del turno `key`: el guardado, el del cálculo en curso o uno nuevo.
+
+        El cálculo corre en su propia tarea: si el cliente que lo pidió se desconecta,
+        termina igual y queda guardado para su reintento.
+        """
+        future = self.join(key)
+        if future is None:
+            future = self.begin(key)
+            task = self._tasks[key] = asyncio.create_task(self._compute(key, compute))
+            task.add_done_callback(lambda done: self._settle(key, done))
+        return await asyncio.shield(future)
+
+    async def _compute(self, key: Hashable, compute: Callable[[], Awaitable[R]]) -> R:
+        result = await self.claim(key)
+        return result if result is not None else await compute()
+
+    def _settle(self, key: Hashable, task: asyncio.Task):
+        self._tasks.pop(key, None)
+        if task.cancelled():
+            self.abort(key)
+        elif task.exception() is not None:
+            self.abort(key, task.exception())
+        else:
+            self.finish(key, task.result())
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._done),
+            "max_entries": self.max_entries,
+            "in_flight": len(self._pending),
+            "computed": self._counters["computed"],
+            "replayed": self._counters["replayed"],
+            "coalesced": self._counters["coalesced"],
+            "replayed_shared": self._counters["replayed_shared"],
+            "aborted": self._counters["aborted"],
+        }
@@ -0,0 +1,150 @@
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from src.dedup import document_frequencies, embed_features, question_features, text_features
+
+logger = logging.getLogger(__name__)
+
+# Retrieval local para el contexto de "MeLi Expert", con la separación ingesta / consulta
+# del diseño RAG de ejercicio_1 (en chico): la ingesta parte los documentos de hechos en
+# chunks y guarda sus embeddings en un .npz; la consulta carga ese índice una vez y cada
+# pregunta toma unos pocos chunks, en vez de un bloque fijo con los mismos cinco datos.
+
+# --- 1. Ingesta (python -m src.knowledge) ---
+
+@dataclass
+class Chunk:
+    """Un hecho de los documentos (una viñeta) con la sección de donde sale."""
+    text: str
+    source: str
+    section: str
+
+
+def load_chunks(source_dir: str) -> List[Chunk]:
+    """
+    Lee los documentos Markdown de `source_dir`: cada viñeta ("- ...") es un chunk y
+    el título "## ..." anterior es su sección.
+    """
+    chunks = []
+    for path in sorted(Path(source_dir).glob("*.md")):
+        section = ""
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if line.startswith("## "):
+                section = line[3:].strip()
+            elif line.startswith("- "):
+                chunks.append(Chunk(text=line[2:].strip(), source=path.stem, section=section))
+    return chunks
+
+
+def ingest(source_dir: str, index_path: str) -> int:
+    """Arma el índice de los documentos de `source_dir` y lo guarda en `index_path`. Devuelve los chunks."""
+    chunks = load_chunks(source_dir)
+    if not chunks:
+        raise ValueError(f"No hay hechos para indexar en {source_dir}")
+    # La sección (p. ej. "Mercado Pago") suma contexto al embedding, pero no va al prompt
+    features = [text_features(f"{chunk.section} {chunk.text}") for chunk in chunks]
+    df = document_frequencies(features)
+    Path(index_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(index_path, "wb") as f:
+        np.savez(
+            f,
+            vectors=embed_features(features, df, len(chunks)),
+            df=df,
+            texts=np.array([chunk.text for chunk in chunks]),
+            sources=np.array([chunk.source for chunk in chunks]),
+        )
+    return len(chunks)
+
+
+# --- 2. Consulta ---
+
+class KnowledgeBase:
+    """
+    Índice en memoria de los hechos y muestreo de contexto por pregunta.
+
+    `sample` elige un hecho semilla al azar, con más peso para los que no se parecen a
+    las preguntas ya hechas en la sesión (peso exp(-similitud / temperature)) y para los
+    menos usados entre todas las sesiones. Después suma los hechos más cercanos a la
+    semilla, para que el LLM tenga contexto relacionado sobre un mismo tema.
+
+    Args:
+        vectors (np.ndarray): Embeddings de los hechos (norma 1).
+        df (np.ndarray): Frecuencias de features del índice (para los embeddings de consulta).
+        texts (List[str]): Texto de cada hecho.
+        sources (List[str]): Documento de cada hecho.
+        temperature (float): Cuánto se castiga el parecido con lo ya preguntado (menos = más).
+        seed (int): Semilla del muestreo (None = aleatorio).
+    """
+
+    def __init__(self, vectors: np.ndarray, df: np.ndarray, texts: List[str], sources: List[str],
+                 temperature: float = 0.1, seed: Optional[int] = None):
+        self.vectors = vectors
+        self.df = df
+        self.texts = list(texts)
+        self.sources = list(sources)
+        self.temperature = temperature
+        self._uses = np.zeros(len(self.texts), dtype=np.int64)
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def load(cls, index_path: str, source_dir: str, seed: Optional[int] = None) -> "KnowledgeBase":
+        """Carga el índice; si no existe o algún documento es más nuevo, antes lo vuelve a generar."""
+        index = Path(index_path)
+        docs = list(Path(source_dir).glob("*.md"))
+        if not index.exists() or any(doc.stat().st_mtime > index.stat().st_mtime for doc in docs):
+            logger.info("Indexando %d chunks de %s", ingest(source_dir, index_path), source_dir)
+        with np.load(index) as data:
+            return cls(data["vectors"], data["df"], data["texts"].tolist(), data["sources"].tolist(), seed=seed)
+
+    def embed_questions(self, questions: Iterable[str]) -> np.ndarray:
+        """Embeddings de preguntas en el espacio de los hechos (mismo IDF)."""
+        features = [question_features(question) for question in questions]
+        return embed_features(features, self.df, len(self.texts), self.vectors.shape[1])
+
+    def sample(self, k: int, avoid: Iterable[str] = ()) -> List[str]:
+        """
+        Hasta `k` hechos para el prompt de una pregunta.
+
+        Args:
+            k (int): Hechos a devolver.
+            avoid (Iterable[str]): Preguntas ya hechas en la sesión (se evitan sus hechos).
+        """
+        avoid = list(avoid)
+        asked = np.zeros(len(self.texts), dtype=np.float32)
+        if avoid:
+            # Parecido de cada hecho con la pregunta de la sesión más cercana
+            asked = (self.vectors @ self.embed_questions(avoid).T).max(axis=1)
+        weights = np.exp(-(asked - asked.min()) / self.temperature) / (1 + self._uses - self._uses.min())
+        seed = int(self._rng.choice(len(self.texts), p=weights / weights.sum()))
+
+        related = self.vectors @ self.vectors[seed] - asked
+        related[seed] = -np.inf
+        picked = [seed] + [int(i) for i in np.argsort(-related)[:max(0, k - 1)]]
+        self._uses[seed] += 1
+        return [self.texts[i] for i in picked]
+
+    def stats(self) -> dict:
+        return {
+            "chunks": len(self.texts),
+            "documents": len(set(self.sources)),
+            "seeds_used": int((self._uses > 0).sum()),
+        }
+
+
+def load_knowledge(index_path: str, source_dir: str) -> Optional[KnowledgeBase]:
+    """El índice de hechos, o None si no hay documentos (el prompt va sin contexto)."""
+    if not any(Path(source_dir).glob("*.md")):
+        logger.warning("No hay documentos de hechos en %s; 'MeLi Expert' va sin contexto", source_dir)
+        return None
+    return KnowledgeBase.load(index_path, source_dir)
+
+
+if __name__ == "__main__":
+    from src.config import settings
+
+    total = ingest(settings.MELI_KNOWLEDGE_DIR, settings.MELI_KNOWLEDGE_INDEX)
+    print(f"{total} chunks indexados en {settings.MELI_KNOWLEDGE_INDEX}")
@@ -0,0 +1,277 @@
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class ScoreEntry:
+    """Una fila del ranking (copia liviana de GameSession)."""
+    session_id: int
+    player_name: str
+    score: int
+    start_time: datetime
+
+
+@dataclass(frozen=True)
+class ScoreUpdate:
+    """Total actual de una sesión según la DB y los puntajes que tuvo antes (ver `ScoreFeed`)."""
+    entry: ScoreEntry
+    previous_scores: Tuple[int, ...]
+
+
+def leaderboard_etag(entries: List[ScoreEntry]) -> str:
+    """ETag de un ranking: hash del contenido, igual en todos los workers si los datos coinciden."""
+    payload = json.dumps(
+        [(e.session_id, e.player_name, e.score, e.start_time.isoformat()) for e in entries]
+    )
+    return '"' + hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16] + '"'
+
+
+class TopScores:
+    """
+    Top-N del leaderboard mantenido en memoria.
+
+    Los puntajes solo suben (cada respuesta suma 0 o más puntos), así que alcanza con
+    ofrecer cada nuevo total: si la sesión ya está en el top se actualiza, si supera
+    al último entra y desplaza al mínimo. Un total más bajo que el que ya tiene la
+    sesión llegó tarde y se ignora. Orden: puntaje desc, id asc (más antigua primero).
+
+    Los totales de todos los workers llegan por `ScoreFeed` (`apply`). Además, cada
+    `resync_seconds` se recarga desde la DB con `loader` (query indexada, LIMIT N).
+    Solo la primera carga bloquea (la API la hace al arrancar, ver `warm`); las
+    siguientes corren en un hilo aparte y mientras tanto se sirve el top actual. Los
+    totales que llegan durante una recarga se vuelven a ofrecer después del reemplazo.
+
+    Args:
+        capacity (int): Cantidad de posiciones que se mantienen.
+        loader (Callable): Devuelve las mejores `capacity` filas desde la DB.
+        resync_seconds (float): Antigüedad máxima antes de recargar (0 = nunca).
+    """
+
+    def __init__(self, capacity: int, loader: Optional[Callable[[int], Iterable[ScoreEntry]]] = None,
+                 resync_seconds: float = 0):
+        self.capacity = capacity
+        self.loader = loader
+        self.resync_seconds = resync_seconds
+        self._entries: List[ScoreEntry] = []
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        self._expired = False
+        self._during_reload: Optional[List[ScoreEntry]] = None
+
+    @staticmethod
+    def _sort_key(entry: ScoreEntry):
+        return (-entry.score, entry.session_id)
+
+    def offer(self, entry: ScoreEntry):
+        """Registra el nuevo total de una sesión."""
+        with self._lock:
+            if self._during_reload is not None:
+                self._during_reload.append(entry)
+            self._offer(entry)
+
+    def apply(self, updates: Sequence[ScoreUpdate]):
+        """Totales nuevos leídos por `ScoreFeed`."""
+        for update in updates:
+            self.offer(update.entry)
+
+    def _offer(self, entry: ScoreEntry):
+        for i, current in enumerate(self._entries):
+            if current.session_id == entry.session_id:
+                if current.score > entry.score:
+                    return
+                self._entries[i] = entry
+                break
+        else:
+            if len(self._entries) >= self.capacity and \
+                    self._sort_key(entry) >= self._sort_key(self._entries[-1]):
+                return
+            self._entries.append(entry)
+        self._entries.sort(key=self._sort_key)
+        del self._entries[self.capacity:]
+
+    def load(self, entries: Iterable[ScoreEntry]):
+        """Reemplaza el contenido (resync desde la DB)."""
+        loaded = sorted(entries, key=self._sort_key)[:self.capacity]
+        with self._lock:
+            self._entries = loaded
+            self._loaded_at = time.monotonic()
+
+    def top(self, n: int) -> List[ScoreEntry]:
+        """Las mejores `n` sesiones (recarga desde la DB si el cache venció)."""
+        self._maybe_resync()
+        with self._lock:
+            return self._entries[:n]
+
+    def warm(self):
+        """Carga el top si todavía no está cargado (p. ej. al arrancar la API)."""
+        self._maybe_resync()
+
+    def _stale(self) -> bool:
+        return self._loaded_at is None or self._expired or (
+            self.resync_seconds > 0 and time.monotonic() - self._loaded_at >= self.resync_seconds
+        )
+
+    def _maybe_resync(self):
+        if self.loader is None or not self._stale():
+            return
+        if self._loaded_at is None:
+            # Primera carga: hay que esperarla
+            self._reload()
+        elif self._reload_lock.acquire(blocking=False):
+            # Resync: se lee en segundo plano y mientras tanto se sirve el top actual
+            self._reload_lock.release()
+            threading.Thread(target=self._reload, name="top-scores-resync", daemon=True).start()
+
+    def _reload(self):
+        with self._reload_lock:
+            if not self._stale():
+                return
+            with self._lock:
+                self._during_reload = []
+                self._expired = False
+            try:
+                loaded = sorted(self.loader(self.capacity), key=self._sort_key)[:self.capacity]
+                with self._lock:
+                    self._entries = loaded
+                    self._loaded_at = time.monotonic()
+                    for entry in self._during_reload:
+                        self._offer(entry)
+            finally:
+                with self._lock:
+                    self._during_reload = None
+
+    def invalidate(self):
+        """Fuerza una recarga en la próxima lectura."""
+        with self._lock:
+            self._loaded_at = None
+
+    def expire(self):
+        """Recarga en segundo plano en la próxima lectura (sin esperar a `resync_seconds`)."""
+        with self._lock:
+            self._expired = True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "capacity": self.capacity}
+
+
+class ScoreFeed:
+    """
+    Cambios de puntaje de todos los workers/réplicas, leídos de la DB compartida.
+
+    Cada UPDATE de puntaje agrega en la misma transacción una fila a la tabla de
+    cambios (sesión, puntaje anterior, puntaje nuevo) con id creciente. `poll` lee las
+    filas posteriores a la última vista y les pasa a los destinos (top-N, RankIndex) el
+    total ACTUAL de cada sesión tocada junto con los puntajes que tuvo antes: aplicarlo
+    es idempotente y no depende del orden, así que un cambio leído dos veces o que ya
+    trajo una recarga no duplica nada.
+
+    Las lecturas llaman a `poll`, que va a la DB como mucho cada `poll_seconds`; una
+    escritura del propio proceso (`changed`) hace que la próxima lectura vaya sin
+    esperar, así que se ve al instante sin sumarle una query a la escritura. Si faltan filas (se podaron antes
+    de leerlas, o se empieza a leer con los destinos ya cargados) los destinos se
+    recargan en segundo plano. En SQLite los ids siguen el orden de commit (un escritor
+    a la vez); con otro motor un hueco en la secuencia también fuerza una recarga.
+
+    Args:
+        reader (Callable): Filas con id > `after_id` (hasta `limit`, ordenadas por id) con
+            `id`, `session_id`, `previous_score`, `total_score`, `current_score`,
+            `player_name` y `start_time`.
+        head (Callable): Id del último cambio (0 si no hay).
+        targets (list): Destinos con `apply(updates)` y `expire()`.
+        poll_seconds (float): Intervalo mínimo entre lecturas no forzadas.
+        batch_size (int): Filas por lectura.
+        prune (Callable): Borra los cambios con id <= el recibido (None = no se poda).
+        retention (int): Cambios que se conservan para workers atrasados.
+        prune_seconds (float): Intervalo entre podas.
+    """
+
+    def __init__(self, reader: Callable[[int, int], Sequence], head: Callable[[], int], targets: list,
+                 poll_seconds: float = 0.1, batch_size: int = 1000,
+                 prune: Optional[Callable[[int], None]] = None, retention: int = 100_000,
+                 prune_seconds: float = 30.0):
+        self.reader = reader
+        self.head = head
+        self.targets = targets
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.prune = prune
+        self.retention = retention
+        self.prune_seconds = prune_seconds
+        self._last: Optional[int] = None
+        self._next_poll = 0.0
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+        self._counters = Counter()
+
+    def poll(self, force: bool = False):
+        """Aplica los cambios nuevos (sin `force`, solo si pasó `poll_seconds` desde la última vez)."""
+        if not force and time.monotonic() < self._next_poll:
+            return
+        with self._lock:
+            if not force and time.monotonic() < self._next_poll:
+                return
+            self._next_poll = time.monotonic() + self.poll_seconds
+            if self._last is None:
+                # Primera lectura: lo anterior a este punto solo lo trae una recarga
+                self._last = self.head()
+                self._expire_targets()
+                return
+            while True:
+                rows = self.reader(self._last, self.batch_size)
+                if not rows:
+                    break
+                if rows[0].id > self._last + 1:
+                    self._counters["gaps"] += 1
+                    self._expire_targets()
+                updates = _collapse(rows)
+                for target in self.targets:
+                    target.apply(updates)
+                self._last = rows[-1].id
+                self._counters["changes"] += len(rows)
+                if len(rows) < self.batch_size:
+                    break
+            if self.prune is not None and time.monotonic() >= self._next_prune:
+                self._next_prune = time.monotonic() + self.prune_seconds
+                self.prune(self._last - self.retention)
+
+    def changed(self):
+        """Este proceso escribió un puntaje: la próxima lectura consulta la tabla sin esperar."""
+        self._next_poll = 0.0
+
+    def reset(self):
+        """Vuelve a empezar desde el último cambio actual (p. ej. con otra DB)."""
+        with self._lock:
+            self._last = None
+            self._next_poll = 0.0
+
+    def _expire_targets(self):
+        for target in self.targets:
+            target.expire()
+
+    def stats(self) -> dict:
+        return {"last_change": self._last, "changes": self._counters["changes"], "gaps": self._counters["gaps"]}
+
+
+def _collapse(rows: Sequence) -> List[ScoreUpdate]:
+    """Un `ScoreUpdate` por sesión: su total actual y todos los puntajes que aparecen en sus cambios."""
+    latest, seen = {}, {}
+    for row in rows:
+        latest[row.session_id] = row
+        scores = seen.setdefault(row.session_id, set())
+        scores.update(score for score in (row.previous_score, row.total_score) if score is not None)
+    return [
+        ScoreUpdate(
+            entry=ScoreEntry(session_id=session_id, player_name=row.player_name,
+                             score=row.current_score, start_time=row.start_time),
+            previous_scores=tuple(sorted(seen[session_id] - {row.current_score})),
+        )
+        for session_id, row in latest.items()
+    ]
@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple, Type
+
+from src.config import settings
+from src.metrics import llm_call_seconds, llm_calls, llm_tokens, record_span
+
+logger = logging.getLogger(__name__)
+
+# Clientes del LLM, uno por modelo: se construyen recién en el primer uso. Importar
+# langchain/Vertex AI lleva varios segundos y no hace falta para servir el leaderboard.
+_clients: Dict[str, Any] = {}
+# LLM falso instalado con set_llm (tests y benchmarks): uno para todos los modelos o un
+# dict nombre de modelo -> LLM falso
+_fake: Optional[Any] = None
+# Un wrapper `with_structured_output` por (schema, modelo), creado una sola vez
+_structured: Dict[Tuple[Type, str], Any] = {}
+_lock = threading.RLock()
+
+# Canal gRPC compartido por todos los modelos (ver ensure_transport). Un canal grpc.aio
+# pertenece a un event loop.
+_channel: Optional[Any] = None
+_channel_loop: Optional[asyncio.AbstractEventLoop] = None
+_async_client: Optional[Any] = None
+_warmup: Dict[str, Any] = {"mode": settings.LLM_WARMUP, "state": "pending", "ms": None}
+
+
+def get_llm(model_name: Optional[str] = None):
+    """Devuelve el cliente del LLM (ChatVertexAI) de `model_name` (o MODEL_NAME), creándolo la primera vez."""
+    name = model_name or settings.MODEL_NAME
+    if _fake is not None:
+        return _fake[name] if isinstance(_fake, dict) else _fake
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                from langchain_google_vertexai import ChatVertexAI
+
+                extra = {}
+                if settings.LLM_API_ENDPOINT:
+                    extra["api_endpoint"] = settings.LLM_API_ENDPOINT
+                if settings.LLM_API_INSECURE:
+                    from google.auth.credentials import AnonymousCredentials
+                    extra["credentials"] = AnonymousCredentials()
+
+                client = _clients[name] = ChatVertexAI(
+                    model_name=name,
+                    temperature=0.8, # temperatura alta para más variedad
+                    project=settings.PROJECT_ID or None,
+                    location=settings.REGION,
+                    max_retries=0, # reintentos, deadline y hedging: src/resilience.py
+                    **extra
+                )
+    return client
+
+
+def structured_llm(schema: Type, model_name: Optional[str] = None):
+    """
+    Runnable del LLM con salida estructurada `schema`.
+
+    Args:
+        schema (Type): Modelo Pydantic de la respuesta (p. ej. QuestionSchema).
+        model_name (str): Modelo a usar (por defecto MODEL_NAME).
+
+    Returns:
+        Runnable: `get_llm(model_name).with_structured_output(schema, include_raw=True)`,
+        cacheado por (schema, modelo). Devuelve `raw` (con el uso de tokens), `parsed` y
+        `parsing_error`.
+    """
+    key = (schema, model_name or settings.MODEL_NAME)
+    runnable = _structured.get(key)
+    if runnable is None:
+        with _lock:
+            runnable = _structured.get(key)
+            if runnable is None:
+                runnable = _structured[key] = get_llm(model_name).with_structured_output(schema, include_raw=True)
+    return runnable
+
+
+async def ainvoke_structured(schema: Type, prompt: str, model_name: Optional[str] = None):
+    """
+    Llamada al LLM con salida estructurada, por el canal compartido del event loop.
+
+    Registra la llamada (resultado y latencia) y los tokens de prompt y respuesta en las
+    métricas (ver src/metrics.py).
+    """
+    name = model_name or settings.MODEL_NAME
+    await ensure_transport(model_name)
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        result = await structured_llm(schema, model_name).ainvoke(prompt)
+        if result["parsing_error"] is not None:
+            raise result["parsing_error"]
+        outcome = "ok"
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        llm_calls.labels(model=name, schema=schema.__name__, outcome=outcome).inc()
+        llm_call_seconds.labels(model=name, schema=schema.__name__).observe(elapsed)
+        record_span(f"llm.{schema.__name__}", elapsed)
+
+    usage = getattr(result["raw"], "usage_metadata", None) or {}
+    llm_tokens.labels(model=name, kind="prompt").inc(usage.get("input_tokens", 0))
+    llm_tokens.labels(model=name, kind="response").inc(usage.get("output_tokens", 0))
+    return result["parsed"]
+
+
+def set_llm(model):
+    """
+    Reemplaza los clientes por un LLM falso (tests y benchmarks) y descarta los wrappers
+    cacheados. `model` puede ser un dict nombre de modelo -> LLM falso; None vuelve a Vertex AI.
+    """
+    global _fake, _channel, _channel_loop, _async_client
+    with _lock:
+        _fake = model
+        _clients.clear()
+        _structured.clear()
+        _channel = _channel_loop = _async_client = None
+
+
+# --- Transporte: canal gRPC compartido con keep-alive ---
+
+def _channel_options() -> list:
+    options = [
+        # Sin límite de tamaño de mensaje (igual que el cliente generado de Vertex)
+        ("grpc.max_send_message_length", -1),
+        ("grpc.max_receive_message_length", -1),
+    ]
+    if settings.LLM_KEEPALIVE_SECONDS > 0:
+        options += [
+            ("grpc.keepalive_time_ms", settings.LLM_KEEPALIVE_SECONDS * 1000),
+            ("grpc.keepalive_timeout_ms", 20000),
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.max_pings_without_data", 0),
+        ]
+    return options
+
+
+async def ensure_transport(model_name: Optional[str] = None):
+    """
+    Instala en el cliente de `model_name` un canal gRPC propio para el event loop actual.
+
+    Todas las llamadas del proceso (de todos los modelos) multiplexan sobre esa conexión
+    HTTP/2 (sin handshake TLS ni token nuevo por turno) y los pings de keep-alive evitan
+    que el balanceador la cierre entre turnos de un jugador. No hace nada con un LLM
+    falso o con LLM_SHARED_CHANNEL=False.
+
+    Usa atributos internos de ChatVertexAI (`async_client`, `endpoint_version`; versión
+    fijada en requirements.txt). Si faltan, se loguea y se usa el cliente por defecto.
+
+    Returns:
+        grpc.aio.Channel | None: El canal instalado.
+    """
+    global _channel, _channel_loop, _async_client
+    client = get_llm(model_name)
+    if not settings.LLM_SHARED_CHANNEL or _fake is not None:
+        return None
+    if not hasattr(client, "async_client") or getattr(client, "endpoint_version", None) is None:
+        logger.warning("ChatVertexAI sin async_client/endpoint_version: se usa su cliente por defecto")
+        return None
+    loop = asyncio.get_running_loop()
+    if _channel_loop is not loop:
+        import grpc
+        from importlib import import_module
+
+        package = f"google.cloud.aiplatform_{client.endpoint_version}.services.prediction_service"
+        try:
+            client_cls = import_module(package).PredictionServiceAsyncClient
+            transport_cls = import_module(f"{package}.transports.grpc_asyncio").PredictionServiceGrpcAsyncIOTransport
+        except (ImportError, AttributeError):
+            logger.warning("No se encontró el cliente gRPC de %s: se usa el cliente por defecto", package)
+            return None
+
+        host = settings.LLM_API_ENDPOINT or f"{settings.REGION}-aiplatform.googleapis.com"
+        if ":" not in host:
+            host += ":443"
+        if settings.LLM_API_INSECURE:
+            channel = grpc.aio.insecure_channel(host, options=_channel_options())
+        else:
+            credentials = client.credentials
+            if credentials is None:
+                # Resolver las credenciales por defecto es bloqueante (metadata server / archivos)
+                import google.auth
+                credentials, _ = await asyncio.to_thread(google.auth.default, scopes=transport_cls.AUTH_SCOPES)
+            channel = transport_cls.create_channel(host, credentials=credentials, options=_channel_options())
+
+        with _lock:
+            _async_client = client_cls(transport=transport_cls(host=host, channel=channel))
+            _channel, _channel_loop = channel, loop
+    if client.async_client is not _async_client:
+        client.async_client = _async_client
+    return _channel
+
+
+async def warm_up(mode: Optional[str] = None, models: Iterable[str] = ()):
+    """
+    Prepara el camino a los modelos (`models`, por defecto MODEL_NAME) antes del primer
+    turno (se llama al arrancar la API).
+
+    - "connect": crea el canal y espera la conexión (TCP + TLS).
+    - "request": además manda un prompt mínimo (token OAuth y primera llamada al modelo).
+    - "off": no hace nada; el primer turno paga el costo.
+
+    Los errores se registran y no se propagan: el primer turno reintenta solo.
+    """
+    mode = mode or settings.LLM_WARMUP
+    _warmup["mode"] = mode
+    if mode == "off":
+        _warmup["state"] = "skipped"
+        return
+    started = time.perf_counter()
+    models = list(models) or [settings.MODEL_NAME]
+    try:
+        for model_name in models:
+            channel = await ensure_transport(model_name)
+        if channel is not None:
+            await asyncio.wait_for(channel.channel_ready(), settings.LLM_WARMUP_TIMEOUT_SECONDS)
+        if mode == "request":
+            await asyncio.wait_for(
+                asyncio.gather(*(get_llm(name).ainvoke("Responde solo: ok") for name in models)),
+                settings.LLM_WARMUP_TIMEOUT_SECONDS
+            )
+        _warmup["state"] = "done"
+    except Exception:
+        logger.exception("Falló el warm-up del LLM (%s); el primer turno crea la conexión", mode)
+        _warmup["state"] = "failed"
+    finally:
+        _warmup["ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def llm_stats() -> dict:
+    """Estado del transporte y del warm-up (para /stats)."""
+    return {
+        "shared_channel": _channel is not None,
+        "models": sorted(_clients),
+        "endpoint": settings.LLM_API_ENDPOINT or f"{settings.REGION}-aiplatform.googleapis.com",
+        "keepalive_seconds": settings.LLM_KEEPALIVE_SECONDS,
+        "structured_runnables": len(_structured),
+        "warmup": dict(_warmup),
+    }
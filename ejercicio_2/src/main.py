@@ -1,16 +1,18 @@
+import asyncio
 import sys
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 
 from src.config import settings
-from src.models import init_db, create_session, get_leaderboard
+from src.models import init_db, create_session, get_leaderboard, get_session_rank
 from src.agents import app 
 from src.state import TriviaState 
 
 console = Console()
 
-def run_game():
+async def run_game(console: Console = console):
+    # `console` se reemplaza para jugar sin terminal (benchmarks/loadtest.py --mode cli)
     init_db()
     console.print(Panel(f"🚀 Iniciando Trivia Tech Lead\nTema: {settings.TRIVIA_TOPIC}", style="bold blue"))
     
@@ -23,17 +25,21 @@ def run_game():
     
     # Estado inicial con los datos del jugador
     initial_state: TriviaState = { 
-        "messages": [], "question_count": 0, "score": 0, "game_over": False,
+        "recent_questions": [], "asked_fingerprints": set(),
+        "question_count": 0, "score": 0, "game_over": False,
         "session_id": session_id, "player_name": player_name,
-        "current_question": "", "current_answer": "", "user_answer": "", "last_feedback": ""
+        "current_question": "", "current_answer": "", "user_answer": "", "last_feedback": "",
+        "last_correct": False, "last_points": 0,
+        "next_question": "", "next_answer": ""
     }
 
     # Primer arranque
-    app.invoke(initial_state, config=thread_config)
+    await app.ainvoke(initial_state, config=thread_config)
+    final_score = 0
     
     # Bucle de interacción
     while True:
-        current_state_snapshot = app.get_state(thread_config)
+        current_state_snapshot = await app.aget_state(thread_config)
         state_values = current_state_snapshot.values
         
         if not state_values or state_values.get("game_over"):
@@ -49,8 +55,9 @@ def run_game():
         user_input = console.input("\n[bold cyan]Tu respuesta > [/bold cyan]")
         
         # Reanudar
-        app.update_state(thread_config, {"user_answer": user_input})
-        result = app.invoke(None, config=thread_config)
+        await app.aupdate_state(thread_config, {"user_answer": user_input})
+        result = await app.ainvoke(None, config=thread_config)
+        final_score = result.get("score", final_score)
         
         # Feedback
         feedback = result.get("last_feedback")
@@ -62,7 +69,7 @@ def run_game():
             break
 
     # --- REPORTE FINAL Y RANKING ---
-    final_score = app.get_state(thread_config).values.get('score', 0)
+    # (el checkpointer libera el hilo al terminar, el puntaje sale del último resultado)
     console.print(Panel(f"🏆 Juego Terminado, {player_name}!\nPuntaje Final: {final_score}", style="bold green"))
     
     console.print("\n[bold magenta]📊 LEADERBOARD - TOP JUGADORES[/bold magenta]")
@@ -85,11 +92,25 @@ def run_game():
             player.start_time.strftime("%Y-%m-%d %H:%M"),
             style=style
         )
+
+    # Si el jugador no entró al Top, mostramos igual su posición
+    if all(player.id != session_id for player in top_players):
+        own = get_session_rank(session_id)
+        if own:
+            rank, total, game = own
+            table.add_row("...", "", "", "")
+            table.add_row(
+                f"{rank}/{total}",
+                f"{game.player_name} (Tú)",
+                str(game.total_score),
+                game.start_time.strftime("%Y-%m-%d %H:%M"),
+                style="bold green"
+            )
     
     console.print(table)
 
 if __name__ == "__main__":
     try:
-        run_game()
+        asyncio.run(run_game())
     except Exception as e:
         console.print(f"\n[bold red]Error crítico:[/bold red] {e}")
\ No newline at end of file
@@ -0,0 +1,215 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Palabras que no aportan al significado de una respuesta corta
+STOPWORDS = {
+    "el", "la", "los", "las", "lo", "un", "una", "unos", "unas", "de", "del", "al",
+    "the", "a", "an", "of",
+}
+
+UNITS = {
+    "cero": 0, "uno": 1, "una": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5, "seis": 6,
+    "siete": 7, "ocho": 8, "nueve": 9, "diez": 10, "once": 11, "doce": 12, "trece": 13,
+    "catorce": 14, "quince": 15, "dieciseis": 16, "diecisiete": 17, "dieciocho": 18,
+    "diecinueve": 19, "veinte": 20, "veintiuno": 21, "veintidos": 22, "veintitres": 23,
+    "veinticuatro": 24, "veinticinco": 25, "veintiseis": 26, "veintisiete": 27,
+    "veintiocho": 28, "veintinueve": 29,
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13,
+    "fourteen": 14, "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18,
+    "nineteen": 19, "twenty": 20,
+}
+TENS = {
+    "treinta": 30, "cuarenta": 40, "cincuenta": 50, "sesenta": 60, "setenta": 70,
+    "ochenta": 80, "noventa": 90,
+    "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+HUNDREDS = {
+    "cien": 100, "ciento": 100, "doscientos": 200, "trescientos": 300, "cuatrocientos": 400,
+    "quinientos": 500, "seiscientos": 600, "setecientos": 700, "ochocientos": 800,
+    "novecientos": 900, "hundred": 100,
+}
+THOUSAND = {"mil", "thousand"}
+MILLION = {"millon", "millones", "million", "millions"}
+CONNECTORS = {"y", "and"}
+
+# Umbral de similitud (1 - distancia de edición normalizada) para aceptar un error de tipeo
+MATCH_THRESHOLD = 0.85
+
+# Respuestas que no intentan responder (ya normalizadas): se dan por incorrectas sin Juez
+NON_ANSWERS = {
+    "no se", "ni idea", "no idea", "no tengo idea", "paso", "pass", "idk", "i dont know", "dont know", "no se ni idea",
+}
+ROMAN_NUMERAL = re.compile(r"^m{0,3}(cm|cd|d?c{0,3})(xc|xl|l?x{0,3})(ix|iv|v?i{0,3})$")
+ROMAN_VALUES = {"i": 1, "v": 5, "x": 10, "l": 50, "c": 100, "d": 500, "m": 1000}
+
+CORRECT_FEEDBACK = "¡Correcto! La respuesta es {answer}."
+INCORRECT_FEEDBACK = "No es correcto. La respuesta correcta era: {answer}."
+
+
+@dataclass
+class MatcherStats:
+    """Contadores del matcher local para medir cuántas llamadas al Juez ahorra."""
+    local_matches: int = 0
+    local_mismatches: int = 0
+    llm_fallbacks: int = 0
+
+    def record(self, verdict: Optional[bool]):
+        if verdict is True:
+            self.local_matches += 1
+        elif verdict is False:
+            self.local_mismatches += 1
+        else:
+            self.llm_fallbacks += 1
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.local_matches + self.local_mismatches + self.llm_fallbacks
+        return (self.local_matches + self.local_mismatches) / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "local_matches": self.local_matches,
+            "local_mismatches": self.local_mismatches,
+            "llm_fallbacks": self.llm_fallbacks,
+            "hit_rate": self.hit_rate,
+        }
+
+
+matcher_stats = MatcherStats()
+
+
+def normalize_answer(text: str) -> str:
+    """
+    Normaliza una respuesta corta para compararla de forma determinista.
+
+    Quita acentos, mayúsculas, puntuación y artículos, y convierte números
+    escritos en palabras a dígitos ("mil novecientos noventa y nueve" -> "1999").
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    tokens = re.sub(r"[^a-z0-9ñ]+", " ", text).split()
+    tokens = _numbers_to_digits(tokens)
+    return " ".join(token for token in tokens if token not in STOPWORDS)
+
+
+def match_answer(user_answer: str, correct_answer: str) -> Optional[bool]:
+    """
+    Decide localmente si la respuesta del usuario es correcta.
+
+    Args:
+        user_answer (str): Lo que escribió el jugador.
+        correct_answer (str): La respuesta correcta generada por el QuizMaster.
+
+    Returns:
+        Optional[bool]: True si es claramente correcta, False si está vacía o no
+        intenta responder ("no sé"), None si debe decidir el Juez (LLM).
+
+    Una respuesta distinta no se rechaza localmente: alias, siglas y traducciones
+    ("Meli", "NYC") se parecen poco a la respuesta y aun así pueden ser correctas.
+    Si los números (o números romanos) no coinciden tampoco se acepta por tipeo:
+    "PlayStation 3" y "PlayStation 2" se parecen mucho pero son otra respuesta.
+    """
+    user, correct = normalize_answer(user_answer), normalize_answer(correct_answer)
+    if not user:
+        return False
+    if user == correct or sorted(user.split()) == sorted(correct.split()):
+        return True
+    if user in NON_ANSWERS:
+        return False
+    if _numbers(user) != _numbers(correct):
+        return None
+
+    if _similarity(user, correct) >= MATCH_THRESHOLD and len(correct) >= 4:
+        return True  # error de tipeo
+    return None
+
+
+def canned_feedback(is_correct: bool, correct_answer: str) -> str:
+    template = CORRECT_FEEDBACK if is_correct else INCORRECT_FEEDBACK
+    return template.format(answer=correct_answer)
+
+
+def _numbers_to_digits(tokens: List[str]) -> List[str]:
+    """Colapsa secuencias de números en palabras a un único token numérico."""
+    result, total, current, in_number = [], 0, 0, False
+
+    def flush():
+        nonlocal total, current, in_number
+        if in_number:
+            result.append(str(total + current))
+        total, current, in_number = 0, 0, False
+
+    for index, token in enumerate(tokens):
+        following = tokens[index + 1] if index + 1 < len(tokens) else ""
+        if token.isdigit():
+            # "1 millon", "3 mil": el número en dígitos también se multiplica
+            if in_number:
+                flush()
+            current = int(token)
+        elif token in ("un", "una") and not in_number:
+            # Artículo, salvo delante de un multiplicador: "un millon" -> 1000000
+            if following not in THOUSAND | MILLION:
+                result.append(token)
+                continue
+            current = 1
+        elif token in UNITS:
+            current += UNITS[token]
+        elif token in TENS:
+            current += TENS[token]
+        elif token in HUNDREDS:
+            current = (current or 1) * 100 if token == "hundred" else current + HUNDREDS[token]
+        elif token in THOUSAND:
+            total += (current or 1) * 1000
+            current = 0
+        elif token in MILLION:
+            total = ((total + current) or 1) * 1_000_000
+            current = 0
+        elif token in CONNECTORS and in_number:
+            continue
+        else:
+            flush()
+            result.append(token)
+            continue
+        in_number = True
+    flush()
+    return result
+
+
+def _numbers(text: str) -> List[int]:
+    """Números de la respuesta (dígitos y romanos: "viii" -> 8), ordenados."""
+    values = []
+    for token in text.split():
+        if token.isdigit():
+            values.append(int(token))
+        elif ROMAN_NUMERAL.match(token):
+            values.append(_roman_value(token))
+    return sorted(values)
+
+
+def _roman_value(token: str) -> int:
+    total = 0
+    for char, following in zip(token, token[1:] + " "):
+        value = ROMAN_VALUES[char]
+        total += -value if ROMAN_VALUES.get(following, 0) > value else value
+    return total
+
+
+def _similarity(a: str, b: str) -> float:
+    if not a and not b:
+        return 1.0
+    return 1 - _levenshtein(a, b) / max(len(a), len(b))
+
+
+def _levenshtein(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
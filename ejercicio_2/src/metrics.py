@@ -0,0 +1,153 @@
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+from src.config import settings
+
+# Métricas Prometheus del proceso (GET /metrics) y traza de tiempos por request
+# (header X-Trace-Timing: 1 -> Server-Timing). Con varios workers, cada uno expone
+# las suyas: Prometheus las junta por instancia.
+
+# --- 1. Métricas ---
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+http_request_seconds = Histogram(
+    "trivia_http_request_duration_seconds", "Latencia de las requests por endpoint (hasta los headers)",
+    ["method", "endpoint", "status"], buckets=LATENCY_BUCKETS
+)
+node_seconds = Histogram(
+    "trivia_graph_node_duration_seconds", "Duración de cada nodo del grafo", ["node"], buckets=LATENCY_BUCKETS
+)
+llm_calls = Counter(
+    "trivia_llm_calls", "Llamadas al LLM por modelo, schema y resultado (ok, error, cancelled)",
+    ["model", "schema", "outcome"]
+)
+llm_call_seconds = Histogram(
+    "trivia_llm_call_duration_seconds", "Latencia de las llamadas al LLM", ["model", "schema"], buckets=LATENCY_BUCKETS
+)
+llm_tokens = Counter(
+    "trivia_llm_tokens", "Tokens del LLM según usage_metadata (prompt o response)", ["model", "kind"]
+)
+db_commit_seconds = Histogram(
+    "trivia_db_commit_duration_seconds", "Latencia de los commits a la DB por operación", ["operation"],
+    buckets=DB_BUCKETS
+)
+checkpoint_threads = Gauge(
+    "trivia_checkpointer_threads", "Hilos vivos en el checkpointer (partidas en curso y salas)"
+)
+
+
+def render() -> Tuple[bytes, str]:
+    """Cuerpo y content type de GET /metrics."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+# --- 2. Traza por request ---
+
+TRACE_HEADER = "x-trace-timing"
+
+# Tramos (nombre, segundos) de la request en curso; None = la request no pidió traza.
+# Las tareas y los hilos de asyncio.to_thread heredan la lista (los nodos del grafo
+# incluidos), las tareas creadas con contexto vacío (salas, lotes del Juez) no.
+_trace: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("trivia_trace", default=None)
+
+
+def record_span(name: str, seconds: float):
+    spans = _trace.get()
+    if spans is not None:
+        spans.append((name, seconds))
+
+
+@contextmanager
+def timed(histogram: Histogram, span: str, **labels):
+    """Mide el bloque en `histogram` (con `labels`) y lo suma a la traza como `span`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        histogram.labels(**labels).observe(elapsed)
+        record_span(span, elapsed)
+
+
+def instrument_node(name: str, node: Callable) -> Callable:
+    """Envuelve un nodo del grafo (sync o async) para medir su duración."""
+    if inspect.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def timed_node(*args, **kwargs):
+            with timed(node_seconds, f"node.{name}", node=name):
+                return await node(*args, **kwargs)
+    else:
+        @functools.wraps(node)
+        def timed_node(*args, **kwargs):
+            with timed(node_seconds, f"node.{name}", node=name):
+                return node(*args, **kwargs)
+    return timed_node
+
+
+def server_timing(spans: List[Tuple[str, float]], total: float) -> str:
+    """
+    Header Server-Timing con los tramos sumados por nombre
+    (p. ej. `node.judge;dur=12.3, llm.EvaluationSchema;dur=480.1;desc="x2", total;dur=501.0`).
+    """
+    merged = {}
+    for name, seconds in spans:
+        count, accumulated = merged.get(name, (0, 0.0))
+        merged[name] = (count + 1, accumulated + seconds)
+    parts = [
+        f"{name};dur={accumulated * 1000:.1f}" + (f';desc="x{count}"' if count > 1 else "")
+        for name, (count, accumulated) in merged.items()
+    ]
+    return ", ".join(parts + [f"total;dur={total * 1000:.1f}"])
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI: latencia por endpoint y, si la request trae `X-Trace-Timing: 1`,
+    el desglose de tiempos en el header `Server-Timing` de la respuesta.
+
+    El desglose sale con los headers: en los endpoints SSE solo cubre lo que pasó antes
+    del primer evento.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        traced = settings.TRACE_TIMING_ENABLED and (dict(scope["headers"]).get(TRACE_HEADER.encode()) == b"1")
+        spans = [] if traced else None
+        token = _trace.set(spans)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - started
+                http_request_seconds.labels(
+                    method=scope["method"], endpoint=_endpoint_name(scope), status=str(message["status"])
+                ).observe(elapsed)
+                if traced:
+                    header = server_timing(spans, elapsed)
+                    message = {**message, "headers": [*message.get("headers", []),
+                                                      (b"server-timing", header.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _trace.reset(token)
+
+
+def _endpoint_name(scope) -> str:
+    # Nombre de la función del endpoint (cardinalidad acotada, sin ids de la URL)
+    endpoint = scope.get("endpoint")
+    return getattr(endpoint, "__name__", "unmatched")
@@ -1,8 +1,21 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
 from datetime import datetime
 from typing import Optional, List
-from sqlmodel import Field, SQLModel, create_engine, Session, select, func, desc
+from sqlalchemy import Index, event, literal, or_, and_, text
+from sqlalchemy.engine import Engine
+from sqlmodel import Field, SQLModel, create_engine, Session, select, func, desc, update, delete
 
-from src.config import settings
+from src.config import Settings, settings
+from src.leaderboard import ScoreEntry, ScoreFeed, TopScores
+from src.metrics import db_commit_seconds, timed
+from src.ranking import RankIndex, rank_key
+
+logger = logging.getLogger(__name__)
 
 # --- Tablas ---
 
@@ -13,6 +26,10 @@ class GameSession(SQLModel, table=True):
     total_score: int = 0
     start_time: datetime = Field(default_factory=datetime.utcnow)
 
+# Índice compuesto del ranking: (total_score DESC, id). Sirve al top-N, a la paginación
+# keyset y a la carga ordenada del RankIndex
+Index("ix_gamesession_score_id", GameSession.total_score.desc(), GameSession.id)
+
 class QuestionLog(SQLModel, table=True):
     """Detalle de cada pregunta dentro de una sesión."""
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -25,12 +42,73 @@ class QuestionLog(SQLModel, table=True):
     score_awarded: int
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
+class ScoreChange(SQLModel, table=True):
+    """Cambio de puntaje de una sesión; cada worker los lee para su top-N y RankIndex (ver ScoreFeed)."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    session_id: int
+    previous_score: Optional[int] = None  # None = sesión nueva
+    total_score: int
+
 # --- Motor DB ---
-sqlite_url = f"sqlite:///{settings.DB_NAME}"
-engine = create_engine(sqlite_url)
+def make_engine(config: Settings = settings) -> Engine:
+    """
+    Crea el engine de SQLAlchemy según la configuración.
+
+    - SQLite (DATABASE_URL vacío): con el perfil "tuned" activa WAL (lectores y un
+      escritor no se bloquean entre sí), synchronous=NORMAL (un fsync por checkpoint
+      del WAL, no por commit), busy_timeout y mmap. Las conexiones se comparten entre
+      hilos (asyncio.to_thread, threadpool de FastAPI, AuditWriter).
+    - Otro motor (p. ej. Postgres en Cloud SQL): pool dimensionado, pre-ping para
+      descartar conexiones muertas y reciclado periódico.
+
+    Args:
+        config (Settings): Configuración a usar (por defecto, la global).
+
+    Returns:
+        Engine: El engine listo para usar con `Session`.
+    """
+    url = config.DATABASE_URL or f"sqlite:///{config.DB_NAME}"
+    if not url.startswith("sqlite"):
+        return create_engine(
+            url,
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            pool_recycle=config.DB_POOL_RECYCLE_SECONDS,
+        )
+
+    if config.DB_SQLITE_PROFILE != "tuned":
+        return create_engine(url)
+
+    sqlite_engine = create_engine(
+        url,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": config.DB_BUSY_TIMEOUT_MS / 1000,
+        },
+    )
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _apply_pragmas(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(config.DB_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(config.DB_MMAP_BYTES)}")
+        cursor.close()
+
+    return sqlite_engine
+
+engine = make_engine()
 
 def init_db():
     SQLModel.metadata.create_all(engine)
+    # create_all no agrega índices a tablas que ya existían (DBs anteriores)
+    for index in GameSession.__table__.indexes:
+        index.create(engine, checkfirst=True)
+    top_scores.invalidate()
+    rank_index.invalidate()
+    score_feed.reset()
 
 # --- Funciones de Analítica ---
 
@@ -47,25 +125,279 @@ def create_session(player_name: str) -> int:
     with Session(engine) as session:
         game = GameSession(player_name=player_name)
         session.add(game)
-        session.commit()
-        session.refresh(game)
-        return game.id
+        session.flush()
+        session_id = game.id
+        session.add(ScoreChange(session_id=session_id, total_score=0))
+        with _commit_timer("create_session"):
+            session.commit()
+    score_feed.changed()
+    return session_id
 
 def update_session_score(session_id: int, points: int):
-    """Suma puntos a la sesión actual."""
+    """Suma puntos a la sesión actual (UPDATE atómico, sin leer la fila)."""
     with Session(engine) as session:
-        game = session.get(GameSession, session_id)
-        if game:
-            game.total_score += points
-            session.add(game)
+        _log_score_changes(session, session.exec(_score_increment(session_id, points)).all())
+        with _commit_timer("update_session_score"):
             session.commit()
+    score_feed.changed()
+
+def record_answer(log: QuestionLog):
+    """
+    Guarda el Audit Log de una respuesta y suma sus puntos en UNA transacción.
+
+    Args:
+        log (QuestionLog): Detalle de la respuesta evaluada (incluye session_id y puntos).
+    """
+    with Session(engine) as session:
+        session.add(log)
+        _log_score_changes(session, session.exec(_score_increment(log.session_id, log.score_awarded)).all())
+        with _commit_timer("record_answer"):
+            session.commit()
+    score_feed.changed()
+
+def _commit_timer(operation: str):
+    """Mide un commit (histograma por operación y traza de la request)."""
+    return timed(db_commit_seconds, f"db.{operation}", operation=operation)
+
+def _score_increment(session_id: int, points: int):
+    # UPDATE gamesession SET total_score = total_score + :points WHERE id = :session_id
+    # RETURNING trae el total anterior y el nuevo para la tabla de cambios sin otra query
+    return (
+        update(GameSession)
+        .where(GameSession.id == session_id)
+        .values(total_score=GameSession.total_score + points)
+        .returning(
+            GameSession.id, GameSession.total_score,
+            (GameSession.total_score - literal(points)).label("previous_score")
+        )
+    )
+
+def _log_score_changes(session: Session, rows):
+    # En la misma transacción que el UPDATE: un cambio se ve en la tabla solo si se commiteó
+    session.add_all([
+        ScoreChange(session_id=row.id, previous_score=row.previous_score, total_score=row.total_score)
+        for row in rows
+    ])
+
+class AuditWriter:
+    """
+    Cola write-behind para el Audit Log.
+
+    Los nodos encolan el `QuestionLog` y siguen; un hilo de fondo agrupa las filas
+    y las escribe en lotes (group commit): todos los logs del lote más un UPDATE
+    por sesión con la suma de sus puntos, en una sola transacción.
+
+    Un lote que falla (p. ej. "database is locked") se reintenta con backoff; si sigue
+    fallando se escribe fila por fila con `record_answer`, así una fila mala no se lleva
+    el resto del lote ni sus puntos. Las filas que no se pudieron escribir se cuentan
+    en `rows_failed` (`/stats`).
+
+    Args:
+        batch_size (int): Máximo de filas por transacción.
+        flush_interval (float): Segundos que se espera a juntar más filas.
+        max_retries (int): Reintentos de un lote antes de pasar a fila por fila.
+        retry_backoff (float): Espera (segundos) antes del primer reintento; se duplica.
+    """
+
+    def __init__(self, batch_size: int = 100, flush_interval: float = 0.05,
+                 max_retries: int = 3, retry_backoff: float = 0.1):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queue: "queue.Queue[Optional[QuestionLog]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.rows_written = 0
+        self.batches_written = 0
+        self.batches_retried = 0
+        self.rows_failed = 0
+
+    def submit(self, log: QuestionLog):
+        """Encola una fila (no bloquea)."""
+        self._ensure_started()
+        self._queue.put(log)
+
+    def flush(self):
+        """Bloquea hasta que todo lo encolado esté escrito."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Vacía la cola y detiene el hilo (se llama al apagar la API y en atexit)."""
+        with self._lock:
+            if self._thread is None:
+                return
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch = [item] if item is not None else []
+            stop = item is None
+            deadline = self.flush_interval
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=deadline)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+                deadline = 0  # ya hay lote: solo drenamos lo que esté encolado
+            if batch:
+                self._write_batch(batch)
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[QuestionLog]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                rows = self._commit_batch(batch)
+            except Exception:
+                if attempt < self.max_retries:
+                    self.batches_retried += 1
+                    time.sleep(self.retry_backoff * 2 ** attempt)
+                    continue
+                logger.exception("No se pudo escribir un lote de %d filas del Audit Log; se escribe fila por fila", len(batch))
+                self._write_rows(batch)
+                return
+            score_feed.changed()
+            self.rows_written += len(batch)
+            self.batches_written += 1
+            return
+
+    def _commit_batch(self, batch: List[QuestionLog]) -> list:
+        points_by_session = defaultdict(int)
+        for log in batch:
+            points_by_session[log.session_id] += log.score_awarded
+        rows = []
+        # Copias: si el commit falla, las filas originales quedan intactas para el reintento
+        with Session(engine) as session:
+            session.add_all([_copy_log(log) for log in batch])
+            for session_id, points in points_by_session.items():
+                if points:
+                    rows += session.exec(_score_increment(session_id, points)).all()
+            _log_score_changes(session, rows)
+            with _commit_timer("audit_batch"):
+                session.commit()
+        return rows
+
+    def _write_rows(self, batch: List[QuestionLog]):
+        for log in batch:
+            try:
+                record_answer(_copy_log(log))
+                self.rows_written += 1
+            except Exception:
+                self.rows_failed += 1
+                logger.exception("Se perdió una fila del Audit Log (sesión %s)", log.session_id)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._queue.qsize(),
+            "rows_written": self.rows_written,
+            "batches_written": self.batches_written,
+            "batches_retried": self.batches_retried,
+            "rows_failed": self.rows_failed,
+        }
+
+def _copy_log(log: QuestionLog) -> QuestionLog:
+    return QuestionLog(**log.model_dump(exclude={"id"}))
+
+audit_writer = AuditWriter(
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_MS / 1000
+)
+atexit.register(audit_writer.close)
+
+def _to_entries(games) -> List[ScoreEntry]:
+    return [
+        ScoreEntry(session_id=g.id, player_name=g.player_name, score=g.total_score, start_time=g.start_time)
+        for g in games
+    ]
+
+def _load_top_scores(limit: int) -> List[ScoreEntry]:
+    """Mejores `limit` sesiones desde la DB (usa el índice de total_score)."""
+    with Session(engine) as session:
+        statement = (
+            select(GameSession)
+            .order_by(desc(GameSession.total_score), GameSession.id)
+            .limit(limit)
+        )
+        return _to_entries(session.exec(statement).all())
+
+def _load_rank_keys():
+    """Todas las sesiones como claves del ranking, ya ordenadas (recorre el índice compuesto)."""
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=10_000).execute(
+            text("SELECT id, total_score FROM gamesession ORDER BY total_score DESC, id")
+        )
+        for session_id, score in result:
+            yield rank_key(score, session_id)
+
+def _read_score_changes(after_id: int, limit: int):
+    """Cambios de puntaje posteriores a `after_id`, con el total actual de cada sesión."""
+    with Session(engine) as session:
+        return session.exec(
+            select(
+                ScoreChange.id, ScoreChange.session_id, ScoreChange.previous_score, ScoreChange.total_score,
+                GameSession.total_score.label("current_score"), GameSession.player_name, GameSession.start_time
+            )
+            .join(GameSession, GameSession.id == ScoreChange.session_id)
+            .where(ScoreChange.id > after_id)
+            .order_by(ScoreChange.id)
+            .limit(limit)
+        ).all()
+
+def _last_score_change() -> int:
+    with Session(engine) as session:
+        return session.exec(select(func.max(ScoreChange.id))).one() or 0
+
+def _prune_score_changes(up_to_id: int):
+    with Session(engine) as session:
+        session.exec(delete(ScoreChange).where(ScoreChange.id <= up_to_id))
+        session.commit()
+
+# Top-N en memoria: lo actualizan los cambios de puntaje de todos los workers (ScoreFeed)
+# y se resincroniza periódicamente desde la DB
+top_scores = TopScores(
+    capacity=settings.LEADERBOARD_CACHE_SIZE,
+    loader=_load_top_scores,
+    resync_seconds=settings.LEADERBOARD_RESYNC_SECONDS
+)
+
+# Posición de cada sesión en O(log n); igual que el top-N
+rank_index = RankIndex(loader=_load_rank_keys, resync_seconds=settings.RANK_RESYNC_SECONDS)
+
+# Cambios de puntaje de este y de los demás workers/réplicas, desde la tabla scorechange
+score_feed = ScoreFeed(
+    reader=_read_score_changes,
+    head=_last_score_change,
+    targets=[top_scores, rank_index],
+    poll_seconds=settings.SCORE_FEED_POLL_MS / 1000,
+    prune=_prune_score_changes,
+    retention=settings.SCORE_FEED_RETENTION
+)
 
 def get_leaderboard(top_n: int = 5):
     """
     Genera el reporte de ranking comparando el desempeño de los participantes.
     
     Cumple con el requisito de análisis de resultados y generación de reporte.
-    Ordena las sesiones por puntaje total de forma descendente.
+    Ordena las sesiones por puntaje total de forma descendente. Se sirve desde el
+    top-N en memoria (`top_scores`); solo va a la DB si se piden más posiciones.
 
     Args:
         top_n (int, optional): Cantidad de jugadores a mostrar. Por defecto 5.
@@ -73,8 +405,87 @@ def get_leaderboard(top_n: int = 5):
     Returns:
         List[GameSession]: Lista de objetos de sesión ordenados por puntaje.
     """
+    score_feed.poll()
+    entries = top_scores.top(top_n) if top_n <= top_scores.capacity else _load_top_scores(top_n)
+    return [
+        GameSession(id=e.session_id, player_name=e.player_name, total_score=e.score, start_time=e.start_time)
+        for e in entries
+    ]
+
+def get_leaderboard_page(offset: int = 0, limit: int = 5) -> List[ScoreEntry]:
+    """
+    Página del ranking (puntaje desc, id asc) sin escanear con OFFSET.
+
+    La primera página sale del top-N en memoria. Para el resto, el RankIndex da la
+    clave (puntaje, id) de la posición `offset` en O(log n) y la DB devuelve la página
+    por keyset sobre el índice compuesto.
+
+    Args:
+        offset (int): Posición inicial (0-based).
+        limit (int): Cantidad de filas.
+
+    Returns:
+        List[ScoreEntry]: Las filas de la página (vacía si `offset` supera el total).
+    """
+    score_feed.poll()
+    if offset == 0 and limit <= top_scores.capacity:
+        return top_scores.top(limit)
+
+    with Session(engine) as session:
+        if not settings.RANK_INDEX_ENABLED:
+            statement = (
+                select(GameSession)
+                .order_by(desc(GameSession.total_score), GameSession.id)
+                .offset(offset).limit(limit)
+            )
+            return _to_entries(session.exec(statement).all())
+
+        start = rank_index.key_at(offset)
+        if start is None:
+            return []
+        score, session_id = start
+        # Dos búsquedas por el índice compuesto (un OR haría que SQLite recorra los empates):
+        # 1) mismo puntaje desde el id de arranque, 2) los puntajes menores
+        page = session.exec(
+            select(GameSession)
+            .where(GameSession.total_score == score, GameSession.id >= session_id)
+            .order_by(GameSession.id)
+            .limit(limit)
+        ).all()
+        if len(page) < limit:
+            page += session.exec(
+                select(GameSession)
+                .where(GameSession.total_score < score)
+                .order_by(desc(GameSession.total_score), GameSession.id)
+                .limit(limit - len(page))
+            ).all()
+        return _to_entries(page)
+
+def get_session_rank(session_id: int):
+    """
+    Posición de una sesión en el ranking.
+
+    Args:
+        session_id (int): ID de la sesión.
+
+    Returns:
+        Optional[Tuple[int, int, GameSession]]: (posición 1-based, total de sesiones, sesión),
+        o None si la sesión no existe.
+    """
     with Session(engine) as session:
-        # Query para obtener las mejores sesiones
-        statement = select(GameSession).order_by(desc(GameSession.total_score)).limit(top_n)
-        results = session.exec(statement).all()
-        return results
\ No newline at end of file
+        game = session.get(GameSession, session_id)
+        if game is None:
+            return None
+        if settings.RANK_INDEX_ENABLED:
+            score_feed.poll()
+            rank, total = rank_index.rank(game.id, game.total_score)
+        else:
+            ahead = session.exec(
+                select(func.count()).select_from(GameSession).where(or_(
+                    GameSession.total_score > game.total_score,
+                    and_(GameSession.total_score == game.total_score, GameSession.id < game.id)
+                ))
+            ).one()
+            total = session.exec(select(func.count()).select_from(GameSession)).one()
+            rank = ahead + 1
+        return rank, total, game
@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# generator(topic, preguntas_a_evitar) -> (pregunta, respuesta)
+QuestionGenerator = Callable[[str, List[str]], Awaitable[tuple]]
+
+
+def question_fingerprint(text: str) -> str:
+    """Huella corta de una pregunta, insensible a mayúsculas y espacios."""
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class PooledQuestion:
+    """Pregunta pre-generada lista para servirse."""
+    question: str
+    answer: str
+    fingerprint: str
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class QuestionPool:
+    """
+    Pool de preguntas pre-generadas por tema con reposición en segundo plano.
+
+    Cada tema fijo del frontend tiene una cola FIFO acotada. Las sesiones sacan
+    (y consumen) la primera pregunta que todavía no vieron; una tarea de fondo
+    vuelve a llenar la cola. Los temas libres no están en el pool y caen a la
+    generación en vivo.
+
+    Args:
+        generator: Corrutina que genera una pregunta para un tema.
+        topics: Temas a mantener pre-generados.
+        max_size: Tamaño máximo de la cola de cada tema (se desaloja la más vieja).
+        ttl_seconds: Antigüedad máxima de una pregunta antes de descartarla.
+        refill_interval: Segundos entre pasadas de reposición si nadie la despierta.
+        refill_concurrency: Generaciones simultáneas durante la reposición.
+    """
+
+    def __init__(self, generator: QuestionGenerator, topics: Iterable[str], max_size: int = 10,
+                 ttl_seconds: float = 1800, refill_interval: float = 30, refill_concurrency: int = 4):
+        self.generator = generator
+        self.topics: Set[str] = set(topics)
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.refill_interval = refill_interval
+        self.refill_concurrency = refill_concurrency
+        self._queues: Dict[str, Deque[PooledQuestion]] = {t: deque() for t in self.topics}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def supports(self, topic: str) -> bool:
+        return topic in self.topics
+
+    def draw(self, topic: str, seen: Set[str]) -> Optional[PooledQuestion]:
+        """
+        Saca del pool la primera pregunta vigente que la sesión no haya visto.
+
+        Args:
+            topic (str): Tema de la sesión.
+            seen (Set[str]): Huellas (`question_fingerprint`) de las preguntas ya hechas.
+
+        Returns:
+            Optional[PooledQuestion]: La pregunta, o None si hay que generarla en vivo.
+        """
+        queue = self._queues.get(topic)
+        if queue is None:
+            return None
+        self._evict_expired(queue)
+        for entry in queue:
+            if entry.fingerprint not in seen:
+                queue.remove(entry)
+                self._hits += 1
+                self._request_refill()
+                return entry
+        self._misses += 1
+        self._request_refill()
+        return None
+
+    def add(self, topic: str, question: str, answer: str) -> bool:
+        """Agrega una pregunta al pool del tema. Devuelve False si era repetida."""
+        queue = self._queues.setdefault(topic, deque())
+        fingerprint = question_fingerprint(question)
+        if any(entry.fingerprint == fingerprint for entry in queue):
+            return False
+        queue.append(PooledQuestion(question, answer, fingerprint))
+        while len(queue) > self.max_size:
+            queue.popleft()
+            self._evictions += 1
+        return True
+
+    async def refill(self, topic: str):
+        """Genera preguntas hasta completar el pool de un tema."""
+        queue = self._queues.setdefault(topic, deque())
+        self._evict_expired(queue)
+        missing = self.max_size - len(queue)
+        if missing <= 0:
+            return
+        avoid = [entry.question for entry in queue]
+        semaphore = asyncio.Semaphore(self.refill_concurrency)
+
+        async def generate_one():
+            async with semaphore:
+                return await self.generator(topic, avoid)
+
+        results = await asyncio.gather(*(generate_one() for _ in range(missing)), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.warning("Fallo al reponer el pool de '%s': %s", topic, result)
+                continue
+            self.add(topic, *result)
+
+    def start(self):
+        """Lanza la tarea de reposición en el event loop actual."""
+        if self._task is None and self.topics:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        served = self._hits + self._misses
+        return {
+            "sizes": {topic: len(queue) for topic, queue in self._queues.items()},
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / served if served else 0.0,
+            "evictions": self._evictions,
+        }
+
+    async def _refill_loop(self):
+        while True:
+            for topic in sorted(self.topics):
+                await self.refill(topic)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refill_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _request_refill(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _evict_expired(self, queue: Deque[PooledQuestion]):
+        deadline = time.monotonic() - self.ttl_seconds
+        while queue and queue[0].created_at < deadline:
+            queue.popleft()
+            self._evictions += 1
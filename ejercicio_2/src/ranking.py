@@ -0,0 +1,303 @@
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from src.leaderboard import ScoreUpdate
+
+# Clave de orden de una sesión en el ranking: puntaje desc, id asc, empaquetados en
+# un int64 para guardarlos en arrays compactos ( ~8 bytes por sesión ).
+_SCORE_CAP = 1 << 30
+_ID_BITS = 32
+
+
+def rank_key(score: int, session_id: int) -> int:
+    """Clave ordenable: menor clave = mejor posición."""
+    return ((_SCORE_CAP - score) << _ID_BITS) | session_id
+
+
+def decode_key(key: int) -> Tuple[int, int]:
+    """Inversa de `rank_key`: (score, session_id)."""
+    return _SCORE_CAP - (key >> _ID_BITS), key & ((1 << _ID_BITS) - 1)
+
+
+class OrderStatisticIndex:
+    """
+    Lista ordenada por bloques con un árbol de Fenwick sobre el tamaño de cada bloque.
+
+    - `rank(key)`: cuántas claves son menores  -> O(log n)
+    - `select(k)`: la k-ésima clave (0-based)   -> O(log n)
+    - `add` / `discard`: O(log n) para ubicar + O(block_size) de memmove en el array
+
+    Args:
+        block_size (int): Tamaño objetivo de cada bloque (se parte al doble).
+    """
+
+    def __init__(self, block_size: int = 1024):
+        self.block_size = block_size
+        self._blocks: List[array] = []
+        self._maxes: List[int] = []
+        self._tree: List[int] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def load(self, ordered_keys: Iterable[int]):
+        """
+        Reconstruye el índice desde claves YA ordenadas (p. ej. leídas por el índice
+        compuesto de la DB), en bloques y sin materializar una lista de Python.
+        """
+        blocks, block, previous = [], array("q"), None
+        for key in ordered_keys:
+            if previous is not None and key < previous:
+                raise ValueError("Las claves deben venir ordenadas")
+            previous = key
+            block.append(key)
+            if len(block) == self.block_size:
+                blocks.append(block)
+                block = array("q")
+        if block:
+            blocks.append(block)
+        self._blocks = blocks
+        self._maxes = [b[-1] for b in blocks]
+        self._len = sum(len(b) for b in blocks)
+        self._rebuild_tree()
+
+    def add(self, key: int):
+        if not self._blocks:
+            self._blocks, self._maxes = [array("q", [key])], [key]
+            self._len = 1
+            self._rebuild_tree()
+            return
+        pos = min(bisect_left(self._maxes, key), len(self._blocks) - 1)
+        block = self._blocks[pos]
+        insort(block, key)
+        self._maxes[pos] = block[-1]
+        self._len += 1
+        if len(block) > 2 * self.block_size:
+            half = len(block) // 2
+            self._blocks[pos:pos + 1] = [block[:half], block[half:]]
+            self._maxes[pos:pos + 1] = [block[half - 1], block[-1]]
+            self._rebuild_tree()
+        else:
+            self._tree_add(pos, 1)
+
+    def discard(self, key: int) -> bool:
+        """Quita la clave si existe. Devuelve True si la encontró."""
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._blocks):
+            return False
+        block = self._blocks[pos]
+        i = bisect_left(block, key)
+        if i == len(block) or block[i] != key:
+            return False
+        del block[i]
+        self._len -= 1
+        if block:
+            self._maxes[pos] = block[-1]
+            self._tree_add(pos, -1)
+        else:
+            del self._blocks[pos]
+            del self._maxes[pos]
+            self._rebuild_tree()
+        return True
+
+    def __contains__(self, key: int) -> bool:
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._blocks):
+            return False
+        block = self._blocks[pos]
+        i = bisect_left(block, key)
+        return i < len(block) and block[i] == key
+
+    def nbytes(self) -> int:
+        """Memoria aproximada del índice: arrays de claves + listas de bloques, máximos y Fenwick."""
+        return (
+            sum(sys.getsizeof(block) for block in self._blocks)
+            + sys.getsizeof(self._blocks) + sys.getsizeof(self._maxes) + sys.getsizeof(self._tree)
+            + sum(sys.getsizeof(value) for value in self._maxes) + sum(sys.getsizeof(value) for value in self._tree)
+        )
+
+    def rank(self, key: int) -> int:
+        """Cantidad de claves estrictamente menores que `key`."""
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._blocks):
+            return self._len
+        return self._prefix(pos) + bisect_left(self._blocks[pos], key)
+
+    def select(self, k: int) -> int:
+        """La clave en la posición `k` (0-based)."""
+        if not 0 <= k < self._len:
+            raise IndexError(k)
+        # Descenso por el Fenwick: último bloque cuyo prefijo acumulado es <= k
+        pos, remaining = 0, k
+        step = 1 << (len(self._tree).bit_length() - 1) if self._tree else 0
+        while step:
+            nxt = pos + step
+            if nxt <= len(self._tree) and self._tree[nxt - 1] <= remaining:
+                pos = nxt
+                remaining -= self._tree[nxt - 1]
+            step >>= 1
+        return self._blocks[pos][remaining]
+
+    # --- Fenwick (1-based sobre la lista, guardado 0-based) ---
+
+    def _rebuild_tree(self):
+        tree = [len(block) for block in self._blocks]
+        for i in range(1, len(tree) + 1):
+            parent = i + (i & -i)
+            if parent <= len(tree):
+                tree[parent - 1] += tree[i - 1]
+        self._tree = tree
+
+    def _tree_add(self, pos: int, delta: int):
+        i = pos + 1
+        while i <= len(self._tree):
+            self._tree[i - 1] += delta
+            i += i & -i
+
+    def _prefix(self, pos: int) -> int:
+        """Suma de tamaños de los bloques [0, pos)."""
+        total, i = 0, pos
+        while i > 0:
+            total += self._tree[i - 1]
+            i -= i & -i
+        return total
+
+
+class RankIndex:
+    """
+    Índice de posiciones del leaderboard en memoria (thread-safe).
+
+    Se carga completo desde la DB con `loader` y se mantiene con los cambios de
+    puntaje de todos los workers, que llegan por `ScoreFeed` (`apply`). Además se
+    recarga cada `resync_seconds`: solo la primera carga bloquea; las siguientes se
+    arman en un hilo aparte y reemplazan al índice de golpe.
+
+    Cada cambio trae los puntajes anteriores de la sesión según la DB, sin guardar un
+    mapa id -> puntaje aparte: se quitan esas claves y se agrega la del puntaje nuevo
+    si no está (una recarga pudo haberlo traído), así una sesión nunca aparece dos
+    veces. Los cambios que llegan durante una recarga se vuelven a aplicar sobre el
+    índice nuevo antes del reemplazo (la lectura de la DB pudo no verlos).
+
+    Args:
+        loader (Callable): Devuelve todas las claves (`rank_key`) ordenadas, desde la DB.
+        resync_seconds (float): Antigüedad máxima antes de recargar (0 = nunca).
+        block_size (int): Tamaño de bloque del OrderStatisticIndex.
+    """
+
+    def __init__(self, loader: Callable[[], Iterable[int]], resync_seconds: float = 0,
+                 block_size: int = 1024):
+        self.loader = loader
+        self.resync_seconds = resync_seconds
+        self.block_size = block_size
+        self._index = OrderStatisticIndex(block_size)
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        self._expired = False
+        self._during_reload: Optional[List[Tuple[int, Tuple[int, ...], int]]] = None
+
+    def add_session(self, session_id: int, score: int = 0):
+        self._apply(session_id, (), score)
+
+    def update_score(self, session_id: int, old_score: int, new_score: int):
+        """`old_score` es el puntaje previo según la DB (lo devuelve el UPDATE)."""
+        self._apply(session_id, (old_score,), new_score)
+
+    def apply(self, updates: Sequence[ScoreUpdate]):
+        """Puntajes nuevos leídos por `ScoreFeed`."""
+        for update in updates:
+            self._apply(update.entry.session_id, update.previous_scores, update.entry.score)
+
+    def _apply(self, session_id: int, old_scores: Tuple[int, ...], new_score: int):
+        with self._lock:
+            if self._during_reload is not None:
+                self._during_reload.append((session_id, old_scores, new_score))
+            if self._loaded_at is not None:
+                _move(self._index, session_id, old_scores, new_score)
+
+    def rank(self, session_id: int, score: int) -> Tuple[int, int]:
+        """Posición 1-based de la sesión y total de sesiones."""
+        self._maybe_resync()
+        with self._lock:
+            return self._index.rank(rank_key(score, session_id)) + 1, len(self._index)
+
+    def key_at(self, offset: int) -> Optional[Tuple[int, int]]:
+        """(score, session_id) de la sesión en la posición `offset` (0-based), o None."""
+        self._maybe_resync()
+        with self._lock:
+            if offset >= len(self._index):
+                return None
+            return decode_key(self._index.select(offset))
+
+    def __len__(self) -> int:
+        self._maybe_resync()
+        with self._lock:
+            return len(self._index)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def expire(self):
+        """Recarga en segundo plano en la próxima lectura (sin esperar a `resync_seconds`)."""
+        with self._lock:
+            self._expired = True
+
+    def warm(self):
+        """Carga el índice si todavía no está cargado (p. ej. al arrancar la API)."""
+        self._maybe_resync()
+
+    def _stale(self) -> bool:
+        return self._loaded_at is None or self._expired or (
+            self.resync_seconds > 0 and time.monotonic() - self._loaded_at >= self.resync_seconds
+        )
+
+    def _maybe_resync(self):
+        if not self._stale():
+            return
+        if self._loaded_at is None:
+            # Primera carga: hay que esperarla
+            self._reload()
+        elif self._reload_lock.acquire(blocking=False):
+            # Resync: se arma en segundo plano y mientras tanto se sirve el índice actual
+            self._reload_lock.release()
+            threading.Thread(target=self._reload, name="rank-index-resync", daemon=True).start()
+
+    def _reload(self):
+        with self._reload_lock:
+            if not self._stale():
+                return
+            with self._lock:
+                self._during_reload = []
+                self._expired = False
+            try:
+                fresh = OrderStatisticIndex(self.block_size)
+                fresh.load(self.loader())
+                with self._lock:
+                    for session_id, old_scores, new_score in self._during_reload:
+                        _move(fresh, session_id, old_scores, new_score)
+                    self._index = fresh
+                    self._loaded_at = time.monotonic()
+            finally:
+                with self._lock:
+                    self._during_reload = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"loaded": self._loaded_at is not None, "sessions": len(self._index),
+                    "bytes": self._index.nbytes()}
+
+
+def _move(index: OrderStatisticIndex, session_id: int, old_scores: Tuple[int, ...], new_score: int):
+    """Pasa la sesión de cualquiera de `old_scores` a `new_score` sin duplicarla."""
+    for old_score in old_scores:
+        if old_score != new_score:
+            index.discard(rank_key(old_score, session_id))
+    # Si una recarga ya trajo el puntaje nuevo no se agrega de nuevo
+    if rank_key(new_score, session_id) not in index:
+        index.add(rank_key(new_score, session_id))
@@ -0,0 +1,160 @@
+import asyncio
+import random
+import time
+from collections import Counter, deque
+from typing import Awaitable, Callable, Deque, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LLMUnavailable(Exception):
+    """
+    El LLM no respondió dentro del deadline del nodo (o falló con un error reintentable
+    en todos los intentos). El turno no queda escrito en la DB (se persiste al cerrarse,
+    en 'advance') y se puede reintentar.
+    """
+
+    def __init__(self, operation: str, reason: str):
+        super().__init__(f"LLM no disponible para '{operation}' ({reason})")
+        self.operation = operation
+        self.reason = reason
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Errores transitorios de Vertex AI (cuota, no disponible, timeout del servidor)."""
+    from google.api_core import exceptions as gexc
+
+    return isinstance(exc, (
+        gexc.TooManyRequests, gexc.ServiceUnavailable, gexc.InternalServerError,
+        gexc.GatewayTimeout, gexc.DeadlineExceeded, gexc.Aborted, ConnectionError,
+    ))
+
+
+class HedgeBudget:
+    """
+    Limita los hedges a una fracción de las llamadas: cada llamada suma `ratio` tokens
+    (hasta `burst`) y cada hedge gasta uno. Así la carga extra sobre el modelo queda
+    acotada (p. ej. 5%) aunque el p95 se dispare.
+    """
+
+    def __init__(self, ratio: float = 0.05, burst: float = 10):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+
+    def earn(self):
+        self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+
+class CallPolicy:
+    """
+    Deadline, reintentos con jitter y hedging para las llamadas al LLM de un nodo.
+
+    - Deadline: tope para toda la llamada (intentos + esperas); si se pasa, LLMUnavailable.
+    - Reintentos: solo para errores transitorios (`is_retryable`), con backoff exponencial
+      y full jitter, mientras quede deadline.
+    - Hedging: si la llamada no respondió en el percentil `hedge_quantile` de las últimas
+      latencias, se lanza una copia y gana la primera en responder (la otra se cancela).
+      Solo con `min_samples` latencias medidas y mientras haya presupuesto de hedges.
+
+    Args:
+        name (str): Nombre de la operación (métricas y errores).
+        deadline (float): Segundos máximos para la llamada completa.
+        max_attempts (int): Intentos ante errores reintentables.
+        backoff_base (float): Base del backoff (segundos) del primer reintento.
+        backoff_max (float): Tope de una espera entre intentos.
+        hedge (bool): Habilita el hedging.
+        hedge_quantile (float): Percentil de latencia a partir del cual se hace hedge.
+        hedge_budget (float): Hedges por llamada (0.05 = hasta 5% de llamadas extra).
+        min_samples (int): Latencias necesarias antes de empezar a hacer hedge.
+        window (int): Latencias recientes que se usan para el percentil.
+    """
+
+    def __init__(self, name: str, deadline: float, max_attempts: int = 3,
+                 backoff_base: float = 0.25, backoff_max: float = 2.0, hedge: bool = True,
+                 hedge_quantile: float = 0.95, hedge_budget: float = 0.05,
+                 min_samples: int = 20, window: int = 512):
+        self.name = name
+        self.deadline = deadline
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.budget = HedgeBudget(ratio=hedge_budget, burst=max(1.0, hedge_budget * 100))
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._counters = Counter()
+        self._rng = random.Random()
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """Ejecuta `call` (una fábrica de corrutinas: cada intento/hedge crea una nueva)."""
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + self.deadline
+        self._counters["calls"] += 1
+        self.budget.earn()
+        for attempt in range(self.max_attempts):
+            remaining = deadline_at - loop.time()
+            try:
+                return await asyncio.wait_for(self._hedged(call), remaining)
+            except asyncio.TimeoutError:
+                self._counters["deadline_exceeded"] += 1
+                raise LLMUnavailable(self.name, f"deadline de {self.deadline:g}s") from None
+            except Exception as exc:
+                if not is_retryable(exc):
+                    raise
+                backoff = self._rng.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                if attempt == self.max_attempts - 1 or loop.time() + backoff >= deadline_at:
+                    self._counters["failed"] += 1
+                    raise LLMUnavailable(self.name, type(exc).__name__) from exc
+                self._counters["retries"] += 1
+                await asyncio.sleep(backoff)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Espera antes de lanzar el hedge (percentil de latencia), o None si no corresponde."""
+        if not self.hedge or len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(self.hedge_quantile * len(ordered)))]
+
+    async def _hedged(self, call: Callable[[], Awaitable[T]]) -> T:
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(call())
+        tasks = [primary]
+        try:
+            delay = self.hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done and self.budget.try_spend():
+                    self._counters["hedges"] += 1
+                    tasks.append(asyncio.ensure_future(call()))
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self._counters["hedge_wins"] += 1
+                        self._latencies.append(time.perf_counter() - started)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict:
+        delay = self.hedge_delay()
+        return {
+            "deadline_seconds": self.deadline,
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+            **{key: self._counters[key] for key in
+               ("calls", "retries", "hedges", "hedge_wins", "deadline_exceeded", "failed")},
+        }
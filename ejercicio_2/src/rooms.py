@@ -0,0 +1,166 @@
+import asyncio
+import contextvars
+import logging
+import uuid
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from src.shared_results import SharedResults
+
+logger = logging.getLogger(__name__)
+
+
+class RoomNotFound(Exception):
+    """La sala no existe o ya se liberó del checkpointer."""
+
+    def __init__(self, room_id: str):
+        super().__init__(f"Sala {room_id!r} no encontrada")
+        self.room_id = room_id
+
+
+class _Room:
+    """Copia local de una sala: preguntas ya generadas y la generación en curso de cada ronda."""
+
+    def __init__(self, topic: str, questions: List[Tuple[str, str]]):
+        self.topic = topic
+        self.questions = questions
+        self.lock = asyncio.Lock()  # una generación a la vez por sala (la ronda n+1 deduplica contra la n)
+        self.pending: Dict[int, asyncio.Task] = {}
+
+
+class RoomHub:
+    """
+    Salas multijugador: cada ronda se genera una sola vez y la reciben todos los miembros.
+
+    Cada sala es un hilo (`room:<id>`) del grafo de salas, en el mismo checkpointer que
+    las partidas: cada corrida del grafo genera la pregunta de la ronda siguiente y la
+    suma a `questions`. Los miembros juegan su propia partida (Juez, puntaje y Audit Log
+    por `session_id`), pero sus nodos de pregunta piden la ronda a la sala en vez de
+    llamar al LLM.
+
+    Dentro del proceso, los pedidos de una misma ronda esperan una sola generación
+    (single-flight). La generación corre en su propia tarea: si el miembro que la pidió
+    se desconecta, los demás la siguen esperando. Con varios workers, `shared` reserva
+    cada ronda en el backend del checkpointer: un solo worker la genera y los demás
+    esperan y sirven esa misma pregunta.
+
+    Args:
+        graph: Grafo de salas compilado (estado `RoomState`).
+        max_cached (int): Salas con sus preguntas en memoria (LRU).
+        max_rounds (int): Rondas de una sala (las preguntas de una partida); una ronda
+            posterior se rechaza, así la sala no crece sin límite.
+        shared (SharedResults): Reserva de cada ronda entre workers (None = un solo worker).
+    """
+
+    def __init__(self, graph, max_cached: int = 1024, max_rounds: int = 10,
+                 shared: Optional[SharedResults] = None):
+        self.graph = graph
+        self.max_cached = max_cached
+        self.max_rounds = max_rounds
+        self.shared = shared
+        self._rooms: "OrderedDict[str, _Room]" = OrderedDict()
+        self._counters = Counter()
+
+    @staticmethod
+    def _config(room_id: str) -> dict:
+        return {"configurable": {"thread_id": f"room:{room_id}"}}
+
+    def _remember(self, room_id: str, room: _Room) -> _Room:
+        self._rooms[room_id] = room
+        self._rooms.move_to_end(room_id)
+        while len(self._rooms) > self.max_cached:
+            self._rooms.popitem(last=False)
+        return room
+
+    async def _room(self, room_id: str) -> _Room:
+        room = self._rooms.get(room_id)
+        if room is not None:
+            self._rooms.move_to_end(room_id)
+            return room
+        snapshot = await self.graph.aget_state(self._config(room_id))
+        if not snapshot.values:
+            raise RoomNotFound(room_id)
+        if room_id in self._rooms:
+            # Otro pedido la cargó mientras tanto: se comparte (mismo lock y generaciones en curso)
+            return self._rooms[room_id]
+        return self._remember(room_id, _Room(snapshot.values["topic"], list(snapshot.values["questions"])))
+
+    async def create(self, topic: str) -> str:
+        """Crea una sala y genera su primera pregunta. Devuelve el ID de la sala."""
+        room_id = uuid.uuid4().hex[:12]
+        output = await self.graph.ainvoke(
+            {"room_id": room_id, "topic": topic, "questions": [], "recent_questions": [], "asked_fingerprints": set()},
+            config=self._config(room_id)
+        )
+        self._remember(room_id, _Room(topic, list(output["questions"])))
+        self._counters["created"] += 1
+        self._counters["generated"] += 1
+        return room_id
+
+    async def topic(self, room_id: str) -> Optional[str]:
+        """Tema de la sala, o None si no existe."""
+        try:
+            return (await self._room(room_id)).topic
+        except RoomNotFound:
+            return None
+
+    async def question(self, room_id: str, round_index: int) -> Tuple[str, str]:
+        """Pregunta y respuesta de la ronda `round_index` (0 = primera) de la sala."""
+        if not 0 <= round_index < self.max_rounds:
+            raise ValueError(f"La sala tiene {self.max_rounds} rondas, no existe la ronda {round_index}")
+        room = await self._room(room_id)
+        if round_index < len(room.questions):
+            self._counters["served"] += 1
+            return tuple(room.questions[round_index])
+
+        task = room.pending.get(round_index)
+        if task is None:
+            # Contexto vacío: el grafo de salas no hereda la config del nodo que lo pidió
+            task = asyncio.create_task(self._generate(room_id, room, round_index), context=contextvars.Context())
+            room.pending[round_index] = task
+            task.add_done_callback(lambda done: self._finished(room, round_index, done))
+        else:
+            self._counters["coalesced"] += 1
+        return tuple(await asyncio.shield(task))
+
+    async def _generate(self, room_id: str, room: _Room, round_index: int) -> Tuple[str, str]:
+        async with room.lock:
+            if round_index < len(room.questions):
+                return room.questions[round_index]
+            if self.shared is None:
+                return await self._generate_round(room_id, room, round_index)
+            question = tuple(await self.shared.run(
+                (room_id, round_index), lambda: self._generate_round(room_id, room, round_index)
+            ))
+            if round_index >= len(room.questions):
+                # La generó otro worker: su checkpoint ya tiene la ronda (se publica después de guardarlo)
+                await self._reload(room_id, room)
+            return question
+
+    async def _reload(self, room_id: str, room: _Room):
+        snapshot = await self.graph.aget_state(self._config(room_id))
+        if not snapshot.values:
+            raise RoomNotFound(room_id)
+        room.questions = list(snapshot.values["questions"])
+
+    async def _generate_round(self, room_id: str, room: _Room, round_index: int) -> Tuple[str, str]:
+        # Otro worker pudo haber generado la ronda: se relee la sala antes de llamar al LLM
+        await self._reload(room_id, room)
+        while round_index >= len(room.questions):
+            output = await self.graph.ainvoke({}, config=self._config(room_id))
+            room.questions = list(output["questions"])
+            self._counters["generated"] += 1
+        return room.questions[round_index]
+
+    @staticmethod
+    def _finished(room: _Room, round_index: int, task: asyncio.Task):
+        room.pending.pop(round_index, None)
+        # Si falló (p. ej. LLMUnavailable), el próximo pedido de la ronda vuelve a intentar
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("No se pudo generar la ronda %d de una sala: %r", round_index, task.exception())
+
+    def stats(self) -> dict:
+        return {
+            "cached_rooms": len(self._rooms),
+            **{key: self._counters[key] for key in ("created", "generated", "served", "coalesced")},
+        }
@@ -0,0 +1,169 @@
+import asyncio
+import random
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Type
+
+from src.llm import ainvoke_structured
+
+
+class ModelHealth:
+    """EWMA de latencia y de tasa de error de un modelo, más sus contadores."""
+
+    def __init__(self):
+        self.latency: Optional[float] = None  # segundos; None = todavía sin medir
+        self.error_rate = 0.0
+        self.down_until = 0.0  # monotonic; mientras no pase, el modelo está degradado
+        self.counters = Counter()
+
+
+class ModelRouter:
+    """
+    Elige el modelo de cada llamada al LLM entre los candidatos de un nodo.
+
+    - Va al modelo más rápido según el EWMA de latencia de las llamadas exitosas. Con
+      `latency_slack` se prefiere el primero de la lista (p. ej. el más barato) mientras
+      no sea más de un `latency_slack` más lento que el más rápido.
+    - Si el EWMA de errores de un modelo pasa `error_threshold`, queda degradado durante
+      `cooldown` segundos y el tráfico pasa al siguiente. Al vencer vuelve a recibir
+      llamadas, pero un solo error más lo vuelve a sacar.
+    - Con probabilidad `explore_rate` manda la llamada a otro modelo sano, para notar
+      cuando un modelo lento se recupera.
+
+    Args:
+        name (str): Nombre del nodo (métricas).
+        candidates (List[str]): Modelos en orden de preferencia.
+        alpha (float): Peso de la última muestra en los EWMA.
+        error_threshold (float): Tasa de error (EWMA) a partir de la cual el modelo se degrada.
+        cooldown (float): Segundos que un modelo degradado queda fuera.
+        explore_rate (float): Proporción de llamadas que van a un modelo que no es el elegido.
+        latency_slack (float): Margen de latencia (0.2 = 20%) para preferir el orden de la lista.
+    """
+
+    def __init__(self, name: str, candidates: List[str], alpha: float = 0.2,
+                 error_threshold: float = 0.3, cooldown: float = 30.0,
+                 explore_rate: float = 0.05, latency_slack: float = 0.0, seed: Optional[int] = None):
+        if not candidates:
+            raise ValueError(f"El router '{name}' necesita al menos un modelo")
+        self.name = name
+        self.candidates = list(dict.fromkeys(candidates))
+        self.alpha = alpha
+        self.error_threshold = error_threshold
+        self.cooldown = cooldown
+        self.explore_rate = explore_rate
+        self.latency_slack = latency_slack
+        self._models: Dict[str, ModelHealth] = {model: ModelHealth() for model in self.candidates}
+        self._rng = random.Random(seed)
+
+    def healthy(self, model: str, now: Optional[float] = None) -> bool:
+        health = self._models[model]
+        if health.down_until == 0.0:
+            return True
+        if (now if now is not None else time.monotonic()) < health.down_until:
+            return False
+        # Terminó el cooldown: vuelve a recibir tráfico justo por debajo del umbral
+        health.down_until = 0.0
+        health.error_rate = min(health.error_rate, self.error_threshold / 2)
+        return True
+
+    def _ranked(self, models: List[str]) -> List[str]:
+        """Modelos por preferencia: los que no tienen latencia medida primero, después por velocidad."""
+        measured = [self._models[m].latency for m in models if self._models[m].latency is not None]
+        if not measured:
+            return models
+        limit = min(measured) * (1 + self.latency_slack)
+        return sorted(models, key=lambda m: (
+            0.0 if self._models[m].latency is None or self._models[m].latency <= limit else self._models[m].latency
+        ))
+
+    def choose(self, exclude: Iterable[str] = ()) -> str:
+        """
+        Modelo para la próxima llamada.
+
+        `exclude` son los modelos ya usados por esta llamada (reintentos y hedges prueban
+        otro); si no queda ninguno se vuelve a considerar a todos.
+        """
+        now = time.monotonic()
+        pool = [m for m in self.candidates if m not in exclude] or self.candidates
+        healthy = [m for m in pool if self.healthy(m, now)]
+        if not healthy:
+            # Todos degradados: el que menos falla
+            model = min(pool, key=lambda m: self._models[m].error_rate)
+            self._models[model].counters["fallback"] += 1
+        else:
+            ranked = self._ranked(healthy)
+            model = ranked[0]
+            if len(ranked) > 1 and self._rng.random() < self.explore_rate:
+                model = self._rng.choice(ranked[1:])
+                self._models[model].counters["explored"] += 1
+            elif model != self.candidates[0]:
+                self._models[model].counters["fallback"] += 1
+        self._models[model].counters["selected"] += 1
+        return model
+
+    def record(self, model: str, latency: float, ok: bool):
+        """Registra el resultado de una llamada: solo las exitosas actualizan la latencia."""
+        health = self._models[model]
+        health.counters["calls"] += 1
+        if ok:
+            health.latency = latency if health.latency is None else (
+                self.alpha * latency + (1 - self.alpha) * health.latency
+            )
+        else:
+            health.counters["errors"] += 1
+        health.error_rate = self.alpha * (0.0 if ok else 1.0) + (1 - self.alpha) * health.error_rate
+        if health.error_rate > self.error_threshold and health.down_until == 0.0:
+            health.down_until = time.monotonic() + self.cooldown
+            health.counters["degraded"] += 1
+
+    def record_cancelled(self, model: str, elapsed: float):
+        """
+        Llamada cancelada (perdió el hedge o venció el deadline): no es un error del modelo,
+        pero tardó al menos `elapsed`, así que solo puede subir su latencia.
+        """
+        health = self._models[model]
+        health.counters["cancelled"] += 1
+        if health.latency is None or elapsed > health.latency:
+            health.latency = elapsed if health.latency is None else (
+                self.alpha * elapsed + (1 - self.alpha) * health.latency
+            )
+
+    async def ainvoke(self, model: str, schema: Type, prompt: str) -> Any:
+        """Llamada estructurada a `model`, registrando latencia y resultado."""
+        started = time.perf_counter()
+        try:
+            result = await ainvoke_structured(schema, prompt, model)
+        except asyncio.CancelledError:
+            self.record_cancelled(model, time.perf_counter() - started)
+            raise
+        except Exception:
+            self.record(model, time.perf_counter() - started, ok=False)
+            raise
+        self.record(model, time.perf_counter() - started, ok=True)
+        return result
+
+    def caller(self, schema: Type, prompt: str) -> Callable[[], Awaitable[Any]]:
+        """
+        Fábrica de llamadas para CallPolicy.run: cada intento (reintento o hedge) elige
+        modelo de nuevo, prefiriendo uno que esta llamada todavía no usó.
+        """
+        tried: Set[str] = set()
+
+        def call():
+            model = self.choose(exclude=tried)
+            tried.add(model)
+            return self.ainvoke(model, schema, prompt)
+        return call
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            model: {
+                "healthy": self.healthy(model, now),
+                "ewma_latency_ms": round(health.latency * 1000, 1) if health.latency is not None else None,
+                "error_rate": round(health.error_rate, 3),
+                **{key: health.counters[key] for key in
+                   ("selected", "calls", "errors", "cancelled", "fallback", "explored", "degraded")},
+            }
+            for model, health in self._models.items()
+        }
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Generic, Hashable, Optional, Protocol, Set, TypeVar
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+# Valor de una clave reservada cuyo resultado todavía se está calculando
+_PENDING = ""
+
+
+class ClaimBackend(Protocol):
+    """
+    Key-value con expiración compartido por todos los workers, con alta condicional.
+
+    `add` es atómico entre procesos: de varios workers que reservan la misma clave,
+    uno solo lo logra. `blocking` indica que las operaciones hacen I/O (se corren en
+    un hilo para no frenar el event loop).
+    """
+
+    blocking: bool
+
+    def add(self, key: str, value: str, ttl_seconds: float) -> bool: ...
+
+    def get(self, key: str) -> Optional[str]: ...
+
+    def set(self, key: str, value: str, ttl_seconds: float): ...
+
+    def delete(self, key: str): ...
+
+
+class SQLiteClaims:
+    """
+    Claves compartidas en una tabla del archivo SQLite del checkpointer (todos los
+    workers de la máquina). Las vencidas se borran como mucho una vez cada `prune_seconds`.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000, prune_seconds: float = 30.0):
+        self.prune_seconds = prune_seconds
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=busy_timeout_ms / 1000,
+                                     check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS shared_results ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def add(self, key: str, value: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        with self._lock:
+            # Alta si no existe o si la que estaba ya venció (p. ej. la reserva de un worker caído)
+            cursor = self._conn.execute(
+                "INSERT INTO shared_results (key, value, expires_at) VALUES (?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at"
+                " WHERE shared_results.expires_at < ?",
+                (key, value, now + ttl_seconds, now),
+            )
+            return cursor.rowcount == 1
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM shared_results WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def set(self, key: str, value: str, ttl_seconds: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO shared_results (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + ttl_seconds),
+            )
+            if time.monotonic() >= self._next_prune:
+                self._next_prune = time.monotonic() + self.prune_seconds
+                self._conn.execute("DELETE FROM shared_results WHERE expires_at < ?", (now,))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM shared_results WHERE key = ?", (key,))
+
+
+class RedisClaims:
+    """Claves compartidas en Redis (`SET NX` con expiración). Requiere el paquete opcional `redis`."""
+
+    blocking = True
+
+    def __init__(self, url: str, pool_size: int = 8, prefix: str = "trivia:"):
+        try:
+            import redis
+        except ImportError as exc:
+            raise ImportError("CHECKPOINTER=redis requiere `pip install redis`") from exc
+        self.prefix = prefix
+        pool = redis.ConnectionPool.from_url(url, max_connections=pool_size)
+        self._redis = redis.Redis(connection_pool=pool)
+
+    def add(self, key: str, value: str, ttl_seconds: float) -> bool:
+        return bool(self._redis.set(self._key(key), value, nx=True, px=int(ttl_seconds * 1000)))
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._redis.get(self._key(key))
+        return None if value is None else value.decode()
+
+    def set(self, key: str, value: str, ttl_seconds: float):
+        self._redis.set(self._key(key), value, px=int(ttl_seconds * 1000))
+
+    def delete(self, key: str):
+        self._redis.delete(self._key(key))
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}shared:{key}"
+
+
+class SharedResults(Generic[R]):
+    """
+    Resultados que se calculan una sola vez entre todos los workers/réplicas.
+
+    Antes de calcular, el worker reserva la clave en el backend compartido (`claim`).
+    El que la consigue calcula y publica el resultado; los demás esperan a que aparezca
+    (consultando cada `poll_seconds`, con backoff) y lo usan en vez de calcularlo otra
+    vez. Si el cálculo falla, la reserva se libera y el próximo intento lo vuelve a
+    calcular. Una reserva de un worker caído vence a los `claim_ttl_seconds`.
+
+    Args:
+        backend (ClaimBackend): Dónde se guardan reservas y resultados (el del checkpointer).
+        prefix (str): Espacio de claves (p. ej. "turn:" o "room:").
+        dumps / loads: Serialización del resultado a texto y de vuelta.
+        claim_ttl_seconds (float): Duración máxima de un cálculo; también lo que espera un duplicado.
+        result_ttl_seconds (float): Vigencia del resultado publicado.
+        poll_seconds (float): Primera espera entre consultas de un duplicado (se duplica hasta 0.5 s).
+    """
+
+    def __init__(self, backend: ClaimBackend, prefix: str, dumps: Callable[[R], str],
+                 loads: Callable[[str], R], claim_ttl_seconds: float = 60,
+                 result_ttl_seconds: float = 600, poll_seconds: float = 0.02):
+        self.backend = backend
+        self.prefix = prefix
+        self.dumps = dumps
+        self.loads = loads
+        self.claim_ttl_seconds = claim_ttl_seconds
+        self.result_ttl_seconds = result_ttl_seconds
+        self.poll_seconds = poll_seconds
+        self._claims: Set[str] = set()
+
+    def _key(self, key: Hashable) -> str:
+        parts = key if isinstance(key, tuple) else (key,)
+        return self.prefix + ":".join(str(part) for part in parts)
+
+    async def claim(self, key: Hashable) -> Optional[R]:
+        """
+        Reserva `key`. Devuelve None si el cálculo le toca a este proceso (después hay que
+        llamar a `publish` o `release`); si otro worker ya lo calculó o lo está calculando,
+        devuelve su resultado. Si no aparece en `claim_ttl_seconds`, TimeoutError.
+        """
+        shared_key = self._key(key)
+        deadline = time.monotonic() + self.claim_ttl_seconds
+        delay = self.poll_seconds
+        while True:
+            if await self._call(self.backend.add, shared_key, _PENDING, self.claim_ttl_seconds):
+                self._claims.add(shared_key)
+                return None
+            value = await self._call(self.backend.get, shared_key)
+            if value:
+                return self.loads(value)
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"El resultado de {shared_key!r} no apareció a tiempo")
+            # Sigue en curso en otro worker (o la reserva se liberó y se vuelve a intentar)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def publish(self, key: Hashable, result: R):
+        """Publica el resultado de una clave reservada por este proceso (bloqueante)."""
+        shared_key = self._key(key)
+        if shared_key in self._claims:
+            self._claims.discard(shared_key)
+            self.backend.set(shared_key, self.dumps(result), self.result_ttl_seconds)
+
+    def release(self, key: Hashable):
+        """Libera una reserva de este proceso sin resultado (el cálculo falló; bloqueante)."""
+        shared_key = self._key(key)
+        if shared_key in self._claims:
+            self._claims.discard(shared_key)
+            self.backend.delete(shared_key)
+
+    def publish_later(self, key: Hashable, result: R):
+        """`publish` en un hilo, sin esperar (para llamar desde código sincrónico del event loop)."""
+        self._later(self.publish, key, result)
+
+    def release_later(self, key: Hashable):
+        """`release` en un hilo, sin esperar."""
+        self._later(self.release, key)
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[R]]) -> R:
+        """El resultado de `key`: el de otro worker o uno nuevo calculado con `compute`."""
+        result = await self.claim(key)
+        if result is not None:
+            return result
+        try:
+            result = await compute()
+        except BaseException:
+            await self._call(self.release, key)
+            raise
+        await self._call(self.publish, key, result)
+        return result
+
+    async def _call(self, operation, *args):
+        if getattr(self.backend, "blocking", False):
+            return await asyncio.to_thread(operation, *args)
+        return operation(*args)
+
+    def _later(self, operation, *args):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            operation(*args)
+            return
+        future = loop.run_in_executor(None, operation, *args)
+        future.add_done_callback(
+            lambda done: done.cancelled() or done.exception() is None
+            or logger.warning("No se pudo actualizar un resultado compartido: %r", done.exception())
+        )
+
+    def stats(self) -> dict:
+        return {"claims_held": len(self._claims)}
+
+
+def build_claim_backend(settings) -> Optional[ClaimBackend]:
+    """
+    Backend compartido del mismo tipo que el checkpointer: SQLite o Redis. Con un
+    checkpointer en memoria ("bounded"/"memory") no hay estado compartido (un solo worker).
+    """
+    if settings.CHECKPOINTER == "sqlite":
+        return SQLiteClaims(settings.CHECKPOINT_SQLITE_PATH)
+    if settings.CHECKPOINTER == "redis":
+        return RedisClaims(settings.CHECKPOINT_REDIS_URL, pool_size=settings.CHECKPOINT_POOL_SIZE)
+    return None
@@ -1,26 +1,45 @@
 import operator
-from typing import Annotated, List, TypedDict
+from typing import Annotated, List, Set, Tuple, TypedDict
+
+from src.config import settings
+
+
+def keep_recent(left: List[str], right: List[str]) -> List[str]:
+    """Reducer de ventana: suma los mensajes nuevos y conserva solo los últimos PROMPT_HISTORY_SIZE."""
+    return (left + right)[-settings.PROMPT_HISTORY_SIZE:] if settings.PROMPT_HISTORY_SIZE > 0 else []
+
+def room_rounds(left: List[Tuple[str, str]], right: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Reducer de las rondas de una sala: suma las nuevas hasta MAX_QUESTIONS (las rondas de una partida)."""
+    return (left + right)[:settings.MAX_QUESTIONS]
 
 class TriviaState(TypedDict):
     """
     Define la estructura completa del estado del juego que fluye a través del grafo.
     
     Attributes:
-        messages (List[str]): Historial de conversación (Append-only).
+        recent_questions (List[str]): Últimas preguntas del Host (ventana acotada, para el prompt).
+        asked_fingerprints (Set[str]): Huellas (`question_fingerprint`) de todas las preguntas hechas.
         question_count (int): Contador actual de preguntas realizadas.
         game_over (bool): Bandera para detener el ciclo de juego.
         session_id (int): ID de la base de datos para persistencia.
         player_name (str): Nombre del jugador actual.
         topic (str): Tema seleccionado para la trivia.
+        room_id (str): Sala multijugador de la partida ("" = partida individual).
         current_question (str): Última pregunta generada por el Host.
         current_answer (str): Respuesta correcta de la última pregunta (Ground Truth).
         user_answer (str): Último input proporcionado por el usuario.
+        next_question (str): Pregunta pre-generada en paralelo con el Juez.
+        next_answer (str): Respuesta correcta de la pregunta pre-generada.
         score (int): Puntaje acumulado de la sesión.
         last_feedback (str): Última retroalimentación generada por el Juez.
+        last_correct (bool): Veredicto del Juez en el turno en curso.
+        last_points (int): Puntos del turno en curso ('advance' los persiste).
     """
-    # Historial de mensajes (Chat)
-    # los nuevos mensajes se suman a la lista, no la reemplazan
-    messages: Annotated[List[str], operator.add] 
+    # Historial compacto: el checkpoint y el prompt no crecen con el largo de la partida
+    # - ventana de las últimas preguntas (contexto del prompt del QuizMaster)
+    # - conjunto de huellas de todas las preguntas hechas (dedup, unión de conjuntos)
+    recent_questions: Annotated[List[str], keep_recent]
+    asked_fingerprints: Annotated[Set[str], operator.or_]
     
     # Control del flujo del juego
     question_count: int
@@ -30,12 +49,37 @@ class TriviaState(TypedDict):
     session_id: int 
     player_name: str
     topic: str  
+    room_id: str
 
     # Datos de la ronda actual
     current_question: str
     current_answer: str       # Esto NO se muestra al usuario
     user_answer: str          # Lo que el humano escribe
+
+    # Siguiente ronda (se genera mientras el Juez evalúa)
+    next_question: str
+    next_answer: str
     
     # Puntuación y Feedback
     score: int                # Score interno
-    last_feedback: str        # Explicación educativa
\ No newline at end of file
+    last_feedback: str        # Explicación educativa
+    last_correct: bool        # Veredicto del turno (se escribe en la DB al cerrar el turno)
+    last_points: int
+
+class RoomState(TypedDict):
+    """
+    Estado de una sala multijugador: la secuencia de preguntas que comparten sus miembros.
+
+    Attributes:
+        room_id (str): ID de la sala (el hilo del grafo de salas es `room:<room_id>`).
+        topic (str): Tema de la sala.
+        questions (List[Tuple[str, str]]): Pregunta y respuesta correcta de cada ronda, en orden
+            (como mucho MAX_QUESTIONS: ningún miembro juega más rondas).
+        recent_questions (List[str]): Últimas preguntas de la sala (contexto del prompt).
+        asked_fingerprints (Set[str]): Huellas de todas las preguntas de la sala (dedup).
+    """
+    room_id: str
+    topic: str
+    questions: Annotated[List[Tuple[str, str]], room_rounds]
+    recent_questions: Annotated[List[str], keep_recent]
+    asked_fingerprints: Annotated[Set[str], operator.or_]
@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Protocol
+
+from src.matcher import normalize_answer
+
+
+class CacheBackend(Protocol):
+    """
+    Almacenamiento clave-valor con expiración usado por `VerdictCache`.
+
+    `blocking` indica que las operaciones hacen I/O: el cache las corre en un hilo
+    para no frenar el event loop.
+    """
+
+    blocking: bool
+
+    def get(self, key: str) -> Optional[str]: ...
+
+    def set(self, key: str, value: str, ttl_seconds: float): ...
+
+    def __len__(self) -> int: ...
+
+
+class MemoryBackend:
+    """LRU en memoria del proceso con TTL por entrada."""
+
+    blocking = False
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl_seconds: float):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl_seconds)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """
+    Key-value local sobre un archivo SQLite: sobrevive reinicios y lo comparten
+    todos los workers de la misma máquina. El desalojo es LRU por `last_access`.
+
+    El tamaño no se controla en cada `set` (sería un `COUNT(*)` por escritura): se poda
+    como mucho una vez cada `prune_seconds`, así que puede pasarse de `max_size` por lo
+    que se escribe en ese intervalo.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_size: int, prune_seconds: float = 30.0):
+        self.max_size = max_size
+        self.prune_seconds = prune_seconds
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_verdicts_lru ON verdicts (last_access)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM verdicts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM verdicts WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE verdicts SET last_access = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: str, ttl_seconds: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verdicts (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl_seconds, now),
+            )
+            if time.monotonic() >= self._next_prune:
+                self._prune()
+
+    def _prune(self):
+        self._next_prune = time.monotonic() + self.prune_seconds
+        overflow = len(self) - self.max_size
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM verdicts WHERE key IN"
+                " (SELECT key FROM verdicts ORDER BY last_access LIMIT ?)", (overflow,)
+            )
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+
+
+class VerdictCache:
+    """
+    Cache de veredictos del Juez (caching semántico aplicado a la evaluación).
+
+    La clave es (pregunta, respuesta correcta, respuesta del usuario), normalizadas: la
+    misma respuesta equivocada a la misma pregunta no vuelve a pagar una llamada al LLM,
+    y una pregunta con el mismo texto pero otra respuesta correcta no reusa el veredicto.
+    La interfaz es async: con un backend que hace I/O (SQLite) la consulta corre en un
+    hilo y no frena el event loop.
+
+    Args:
+        backend (CacheBackend): Dónde se guardan los veredictos serializados.
+        ttl_seconds (float): Vigencia de cada veredicto.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: float):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(question: str, correct_answer: str, user_answer: str) -> str:
+        raw = "\x1f".join(normalize_answer(text) for text in (question, correct_answer, user_answer))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, question: str, correct_answer: str, user_answer: str) -> Optional[dict]:
+        value = await self._call(self.backend.get, self.make_key(question, correct_answer, user_answer))
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value)
+
+    async def set(self, question: str, correct_answer: str, user_answer: str, verdict: dict):
+        key = self.make_key(question, correct_answer, user_answer)
+        await self._call(self.backend.set, key, json.dumps(verdict), self.ttl_seconds)
+
+    async def _call(self, operation, *args):
+        if getattr(self.backend, "blocking", False):
+            return await asyncio.to_thread(operation, *args)
+        return operation(*args)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def build_verdict_cache(backend: str, max_size: int, ttl_seconds: float, path: str) -> Optional[VerdictCache]:
+    """Construye el cache según configuración ("memory", "sqlite" o "none")."""
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return VerdictCache(MemoryBackend(max_size), ttl_seconds)
+    if backend == "sqlite":
+        return VerdictCache(SQLiteBackend(path, max_size), ttl_seconds)
+    raise ValueError(f"VERDICT_CACHE_BACKEND desconocido: {backend!r}")
@@ -0,0 +1,25 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Todo lo que la app escribe en data/ (DB, checkpoints, cache de veredictos, índice de
+# MeLi Expert) va a un directorio temporal de la corrida. Tiene que estar antes de
+# importar `src`: `settings` se construye al importar.
+_DATA_DIR = Path(tempfile.mkdtemp(prefix="trivia-tests-"))
+os.environ.update({
+    "DB_NAME": str(_DATA_DIR / "trivia_game.db"),
+    "CHECKPOINT_SQLITE_PATH": str(_DATA_DIR / "checkpoints.db"),
+    "VERDICT_CACHE_PATH": str(_DATA_DIR / "verdict_cache.db"),
+    "MELI_KNOWLEDGE_INDEX": str(_DATA_DIR / "meli_knowledge.npz"),
+})
+
+from src.llm import set_llm  # noqa: E402
+
+
+@pytest.fixture
+def use_llm():
+    """Instala un LLM falso durante el test y vuelve al cliente real (lazy) al terminar."""
+    yield set_llm
+    set_llm(None)
@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.stub_llm import StubChatModel
+from src import agents
+from src.config import settings
+from src.dedup import QuestionIndex
+from src.models import GameSession, QuestionLog, engine, init_db, create_session
+from src.resilience import LLMUnavailable
+from sqlmodel import Session, select
+
+init_db()
+
+
+@pytest.fixture(autouse=True)
+def fresh_question_index(monkeypatch):
+    """Cada test arranca con el índice de repetidas vacío (el LLM falso repite sus preguntas)."""
+    monkeypatch.setattr(agents, "question_index", QuestionIndex())
+
+
+def _initial_state(session_id: int) -> dict:
+    return {
+        "recent_questions": [], "asked_fingerprints": set(),
+        "question_count": 0, "score": 0, "game_over": False,
+        "session_id": session_id, "player_name": "tester", "topic": "Testing",
+        "current_question": "", "current_answer": "", "user_answer": "", "last_feedback": "",
+        "last_correct": False, "last_points": 0,
+        "next_question": "", "next_answer": ""
+    }
+
+
+async def _play_game():
+    """Juega una partida completa respondiendo siempre bien. Devuelve duración de cada turno."""
+    session_id = create_session("tester")
+    config = {"configurable": {"thread_id": f"test-{session_id}"}}
+    output = await agents.app.ainvoke(_initial_state(session_id), config=config)
+    turn_times = []
+    while not output["game_over"]:
+        await agents.app.aupdate_state(config, {"user_answer": output["current_answer"]})
+        start = time.perf_counter()
+        output = await agents.app.ainvoke(None, config=config)
+        turn_times.append(time.perf_counter() - start)
+    return output, turn_times
+
+
+def test_turn_runs_judge_and_next_question_in_parallel(monkeypatch, use_llm):
+    """Un turno intermedio tarda ~1 llamada al LLM, no 2."""
+    stub = StubChatModel(latency=0.2)
+    use_llm(stub)
+    monkeypatch.setattr(settings, "ANSWER_MATCHER_ENABLED", False)  # forzar al Juez LLM
+
+    output, turn_times = asyncio.run(_play_game())
+
+    assert output["score"] == 10 * settings.MAX_QUESTIONS
+    assert len(turn_times) == settings.MAX_QUESTIONS
+    assert max(turn_times) < 0.35
+    # 1 pregunta inicial + (juez + siguiente) por turno, sin pregunta extra en el último
+    assert stub.calls == 1 + 2 * (settings.MAX_QUESTIONS - 1) + 1
+
+
+def test_turn_that_fails_halfway_is_persisted_once_on_retry(monkeypatch, use_llm):
+    """El Juez termina, la siguiente pregunta falla (503) y el reintento completa el turno."""
+    use_llm(StubChatModel(latency=0))
+    session_id = create_session("tester")
+    config = {"configurable": {"thread_id": f"test-{session_id}"}}
+    first = asyncio.run(agents.app.ainvoke(_initial_state(session_id), config=config))
+    next_question = agents._next_question
+
+    async def unavailable(state, round_index):
+        await asyncio.sleep(0.05)  # el Juez (matcher, sin LLM) termina antes
+        raise LLMUnavailable("next_question", "deadline")
+
+    async def answer():
+        await agents.app.aupdate_state(config, {"user_answer": first["current_answer"]})
+        return await agents.app.ainvoke(None, config=config)
+
+    def persisted():
+        with Session(engine) as session:
+            logs = session.exec(select(QuestionLog).where(QuestionLog.session_id == session_id)).all()
+            return len(logs), session.get(GameSession, session_id).total_score
+
+    monkeypatch.setattr(agents, "_next_question", unavailable)
+    with pytest.raises(LLMUnavailable):
+        asyncio.run(answer())
+    assert persisted() == (0, 0)
+
+    monkeypatch.setattr(agents, "_next_question", next_question)
+    output = asyncio.run(answer())
+
+    assert output["score"] == 10 and output["question_count"] == 1
+    assert persisted() == (1, 10)
+
+
+def test_exact_answers_skip_the_llm_judge(use_llm):
+    stub = StubChatModel(latency=0)
+    use_llm(stub)
+
+    output, _ = asyncio.run(_play_game())
+
+    assert output["score"] == 10 * settings.MAX_QUESTIONS
+    assert stub.calls == settings.MAX_QUESTIONS  # solo el QuizMaster
+
+
+def test_history_is_bounded_but_dedup_remembers_every_question(monkeypatch, use_llm):
+    use_llm(StubChatModel(latency=0))
+    monkeypatch.setattr(settings, "MAX_QUESTIONS", 6)
+    monkeypatch.setattr(settings, "PROMPT_HISTORY_SIZE", 2)
+
+    output, _ = asyncio.run(_play_game())
+
+    assert len(output["recent_questions"]) == 2
+    assert output["recent_questions"][-1] == output["current_question"]
+    assert len(output["asked_fingerprints"]) == 6
@@ -0,0 +1,75 @@
+import asyncio
+
+from benchmarks.stub_llm import StubChatModel
+from src import agents
+from src.batching import MicroBatcher
+
+
+class RecordingFlush:
+    """flush falso: guarda cada lote y devuelve los items en mayúsculas."""
+
+    def __init__(self, error: Exception = None):
+        self.batches = []
+        self.error = error
+
+    async def __call__(self, items):
+        self.batches.append(list(items))
+        await asyncio.sleep(0)
+        if self.error:
+            raise self.error
+        return [item.upper() for item in items]
+
+
+def test_requests_in_the_same_window_share_a_batch():
+    flush = RecordingFlush()
+    batcher = MicroBatcher("test", flush, window=0.05, max_size=3)
+
+    async def scenario():
+        first = await asyncio.gather(*(batcher.submit(item) for item in ["a", "b", "c", "d"]))
+        late = await batcher.submit("e")
+        return first, late
+
+    first, late = asyncio.run(scenario())
+
+    assert first == ["A", "B", "C", "D"] and late == "E"
+    # El lote lleno sale sin esperar la ventana; el resto, al cerrarla
+    assert flush.batches == [["a", "b", "c"], ["d"], ["e"]]
+    assert batcher.stats()["batches"] == 3 and batcher.stats()["max_batch_size"] == 3
+
+
+def test_a_failed_batch_fails_every_request():
+    batcher = MicroBatcher("test", RecordingFlush(error=RuntimeError("503")), window=0.01, max_size=10)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(item) for item in "ab"), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert batcher.stats()["failed_batches"] == 1
+
+
+def test_batched_judge_makes_one_call_and_routes_each_verdict(monkeypatch, use_llm):
+    llm = StubChatModel(latency=0)
+    use_llm(llm)
+    monkeypatch.setattr(agents, "judge_batcher", MicroBatcher("judge", agents._judge_batch, window=0.05, max_size=16))
+    monkeypatch.setattr(agents, "verdict_cache", None)
+    prompts = []
+    caller = agents.judge_router.caller
+    monkeypatch.setattr(agents.judge_router, "caller", lambda schema, prompt: prompts.append(prompt) or caller(schema, prompt))
+    question = "¿Quién fundó la empresa del lote?"
+    answers = ["Galperin", "Kazah", "galperin", "Tolda"]
+
+    async def scenario():
+        return await asyncio.gather(*(
+            agents._llm_evaluation(question, "Galperin", answer, player=f"p{i}") for i, answer in enumerate(answers)
+        ))
+
+    verdicts = asyncio.run(scenario())
+
+    assert llm.calls == 1
+    assert [verdict.is_correct for verdict in verdicts] == [True, False, True, False]
+    assert verdicts[1].feedback == "La respuesta era Galperin."
+    # "Galperin" y "galperin" normalizan igual: van una sola vez, bajo una sola pregunta
+    assert prompts[0].count("Usuario:") == 3 and prompts[0].count(question) == 1
+
@@ -0,0 +1,222 @@
+import asyncio
+import multiprocessing
+import os
+import sqlite3
+
+import pytest
+from langgraph.graph import END, StateGraph
+from typing_extensions import TypedDict
+
+from src.checkpoint import BoundedMemorySaver, LatestCheckpointSaver, RedisSaver, SQLiteSaver
+
+
+class _State(TypedDict):
+    count: int
+    game_over: bool
+
+
+def _graph(saver, turns: int = 3):
+    def step(state: _State):
+        return {"count": state["count"] + 1, "game_over": state["count"] + 1 >= turns}
+
+    workflow = StateGraph(_State)
+    workflow.add_node("step", step)
+    workflow.set_entry_point("step")
+    workflow.add_conditional_edges("step", lambda s: END if s["game_over"] else "step", ["step", END])
+    return workflow.compile(checkpointer=saver, interrupt_before=["step"])
+
+
+async def _start(app, thread_id: str):
+    config = {"configurable": {"thread_id": thread_id}}
+    await app.ainvoke({"count": 0, "game_over": False}, config=config)
+    return config
+
+
+def test_keeps_latest_checkpoint_and_drops_finished_threads():
+    saver = BoundedMemorySaver()
+    app = _graph(saver)
+
+    async def play():
+        config = await _start(app, "t1")
+        output = await app.ainvoke(None, config=config)
+        assert output["count"] == 1
+        assert len(list(saver.list(config))) == 1  # solo el último checkpoint
+        while not output["game_over"]:
+            output = await app.ainvoke(None, config=config)
+        return config
+
+    config = asyncio.run(play())
+    assert saver.get_tuple(config) is None
+    assert saver.stats()["live_threads"] == 0
+    assert saver.stats()["approx_bytes"] == 0
+    assert saver.stats()["evicted"]["finished"] == 1
+
+
+def test_evicts_idle_and_least_recently_used_threads():
+    saver = BoundedMemorySaver(max_threads=2)
+    app = _graph(saver)
+
+    async def run():
+        first = await _start(app, "a")
+        await _start(app, "b")
+        await app.aget_state(first)  # "a" pasa a ser el más reciente
+        await _start(app, "c")
+
+    asyncio.run(run())
+    assert sorted(saver._threads) == ["a|", "c|"]
+    assert saver.stats()["evicted"]["budget"] == 1
+
+    saver.idle_ttl_seconds = -1
+    asyncio.run(_start(app, "d"))
+    assert saver.stats()["live_threads"] == 0
+
+
+def test_sqlite_saver_round_trip(tmp_path):
+    saver = SQLiteSaver(str(tmp_path / "ckpt.db"), pool_size=2, compress_min_bytes=0)
+    app = _graph(saver)
+
+    async def play():
+        config = await _start(app, "t1")
+        output = await app.ainvoke(None, config=config)
+        assert output["count"] == 1
+        # Otro proceso/worker abriría el mismo archivo con un saver nuevo
+        other = _graph(SQLiteSaver(str(tmp_path / "ckpt.db")))
+        output = await other.ainvoke(None, config=config)
+        assert output["count"] == 2
+        assert saver.stats()["live_threads"] == 1
+        await other.ainvoke(None, config=config)
+        return config
+
+    config = asyncio.run(play())
+    assert saver.get_tuple(config) is None  # partida terminada -> liberada
+
+
+def test_redis_saver_round_trip():
+    fakeredis = pytest.importorskip("fakeredis")
+    saver = RedisSaver("redis://fake", compress_min_bytes=0)
+    saver._redis = fakeredis.FakeRedis()
+    app = _graph(saver)
+
+    async def play():
+        config = await _start(app, "t1")
+        output = await app.ainvoke(None, config=config)
+        assert output["count"] == 1 and saver.stats()["live_threads"] == 1
+        return config
+
+    asyncio.run(play())
+
+
+def _serve_turn(env: dict, session_id, answer_correctly: bool):
+    """Ejecuta UN turno del grafo real en un proceso nuevo (simula otro worker)."""
+    os.environ.update(env)
+    from benchmarks.stub_llm import StubChatModel
+    from src import agents
+    from src.llm import set_llm
+    from src.models import create_session, init_db
+
+    set_llm(StubChatModel(latency=0))
+    init_db()
+
+    async def turn():
+        nonlocal session_id
+        if session_id is None:
+            session_id = create_session("multi-worker")
+            config = {"configurable": {"thread_id": str(session_id)}}
+            return await agents.app.ainvoke({
+                "recent_questions": [], "asked_fingerprints": set(),
+                "question_count": 0, "score": 0, "game_over": False,
+                "session_id": session_id, "player_name": "multi-worker", "topic": "Testing",
+                "current_question": "", "current_answer": "", "user_answer": "", "last_feedback": "",
+                "next_question": "", "next_answer": ""
+            }, config=config)
+        config = {"configurable": {"thread_id": str(session_id)}}
+        state = (await agents.app.aget_state(config)).values
+        answer = state["current_answer"] if answer_correctly else "no sé"
+        await agents.app.aupdate_state(config, {"user_answer": answer})
+        return await agents.app.ainvoke(None, config=config)
+
+    output = asyncio.run(turn())
+    return os.getpid(), output["session_id"], output["score"], output["game_over"]
+
+
+def test_game_survives_turns_served_by_different_processes(tmp_path):
+    env = {
+        "PROJECT_ID": "test",
+        "CHECKPOINTER": "sqlite",
+        "CHECKPOINT_SQLITE_PATH": str(tmp_path / "ckpt.db"),
+        "DB_NAME": str(tmp_path / "game.db"),
+        "QUESTION_POOL_ENABLED": "false",
+        "MAX_QUESTIONS": "3",
+    }
+    ctx = multiprocessing.get_context("spawn")
+    pids = set()
+    with ctx.Pool(1, maxtasksperchild=1) as pool:  # cada turno en un proceso nuevo
+        pid, session_id, score, game_over = pool.apply(_serve_turn, (env, None, True))
+        pids.add(pid)
+        for answer_correctly in (True, False, True):
+            pid, _, score, game_over = pool.apply(_serve_turn, (env, session_id, answer_correctly))
+            pids.add(pid)
+
+    assert len(pids) == 4
+    assert game_over and score == 20
+
+
+def _api_call(env: dict, path: str, payload: dict, barrier=None, results=None):
+    """Un pedido a la API real en un proceso nuevo (otro worker); con `barrier`, todos salen juntos."""
+    os.environ.update(env)
+    from fastapi.testclient import TestClient
+    from benchmarks.stub_llm import StubChatModel
+    from src.api import app_api
+    from src.llm import set_llm
+
+    set_llm(StubChatModel(latency=0.2))
+    client = TestClient(app_api)
+    if barrier is not None:
+        barrier.wait(60)
+    response = client.post(path, json=payload)
+    results.put((response.status_code, response.json()))
+
+
+def test_duplicate_turn_in_two_processes_is_applied_once(tmp_path):
+    env = {
+        "PROJECT_ID": "test",
+        "CHECKPOINTER": "sqlite",
+        "CHECKPOINT_SQLITE_PATH": str(tmp_path / "ckpt.db"),
+        "DB_NAME": str(tmp_path / "game.db"),
+        "QUESTION_POOL_ENABLED": "false",
+        "MELI_KNOWLEDGE_INDEX": str(tmp_path / "meli.npz"),
+    }
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+
+    start = ctx.Process(target=_api_call, args=(env, "/start_game", {"player_name": "dup", "topic": "Workers"}),
+                        kwargs={"results": results})
+    start.start()
+    status, body = results.get(timeout=120)
+    start.join()
+    assert status == 200
+
+    # El mismo turno llega a la vez a dos workers (reintento del cliente)
+    barrier = ctx.Barrier(2)
+    payload = {"session_id": body["session_id"], "user_answer": "no sé", "turn": 1}
+    workers = [ctx.Process(target=_api_call, args=(env, "/submit_answer", payload, barrier, results))
+               for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    answers = [results.get(timeout=120) for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    assert answers[0] == answers[1] and answers[0][0] == 200
+    with sqlite3.connect(env["DB_NAME"]) as conn:
+        logs = conn.execute("SELECT COUNT(*) FROM questionlog WHERE session_id = ?", (body["session_id"],)).fetchone()[0]
+    assert logs == 1
+
+
+def test_a_backend_missing_a_hook_fails_when_built():
+    class Incomplete(LatestCheckpointSaver):
+        def _load(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,54 @@
+import asyncio
+
+from src import agents
+from src.dedup import QuestionIndex
+
+
+def test_rewritten_question_is_a_duplicate_and_a_new_one_is_not():
+    index = QuestionIndex(threshold=0.8)
+    for question in ["¿Quién fundó MercadoLibre?", "¿En qué año salió el primer Zelda?",
+                     "¿Qué color tiene el logo de Mercado Pago?", "¿Cuál es el juego más vendido de la historia?"]:
+        index.add("MeLi", question)
+
+    assert index.find_duplicate("MeLi", "¡Pregunta rápida! ¿Quién fundó Mercadolibre?") == "¿Quién fundó MercadoLibre?"
+    assert index.find_duplicate("MeLi", "¿En qué año se fundó Mercado Pago?") is None
+    # Cada tema tiene su propio índice
+    assert index.find_duplicate("Cine", "¿Quién fundó MercadoLibre?") is None
+    assert index.stats()["duplicates"] == 1
+
+
+def test_ring_buffer_forgets_the_oldest_questions():
+    index = QuestionIndex(capacity=3, mode="lsh")
+    for name in ["Kalimba", "Tortuga", "Pirámide", "Zeppelin"]:
+        index.add("General", f"¿Quién inventó la {name}?")
+
+    assert index.find_duplicate("General", "¿Quién inventó la Kalimba?") is None
+    assert index.find_duplicate("General", "¿Quién inventó la Zeppelin?") == "¿Quién inventó la Zeppelin?"
+    assert index.stats()["stored"] == 3
+
+
+class RepeatingQuizMaster:
+    """QuizMaster falso: primero repite una pregunta conocida y después inventa una nueva."""
+
+    def __init__(self, *questions):
+        self.questions = list(questions)
+        self.prompts = []
+
+    async def __call__(self, topic, previous_questions, player):
+        self.prompts.append(list(previous_questions))
+        return self.questions.pop(0), "respuesta"
+
+
+def test_near_duplicate_from_another_session_is_regenerated(monkeypatch):
+    index = QuestionIndex()
+    index.add("MeLi Expert", "¿Quién fundó MercadoLibre?")
+    quiz_master = RepeatingQuizMaster("¡Hola! ¿Quién fundó Mercado Libre?", "¿Qué significa el logo del apretón de manos?")
+    monkeypatch.setattr(agents, "question_index", index)
+    monkeypatch.setattr(agents, "_ask_quiz_master", quiz_master)
+
+    question, _ = asyncio.run(agents._generate_question("MeLi Expert", []))
+
+    assert question == "¿Qué significa el logo del apretón de manos?"
+    # El reintento prohíbe explícitamente la repetida, sin mandar todo el historial
+    assert quiz_master.prompts == [[], ["¿Quién fundó MercadoLibre?"]]
+    assert index.find_duplicate("MeLi Expert", question) == question
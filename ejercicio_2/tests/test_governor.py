@@ -0,0 +1,180 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.stub_llm import StubChatModel
+from src import api
+from src.governor import LLMGovernor, LLMOverloaded
+from src.resilience import CallPolicy
+
+
+async def _call(governor: LLMGovernor, player: str, order: list, hold: float = 0.01):
+    async with governor.slot(player):
+        order.append(player)
+        await asyncio.sleep(hold)
+
+
+def test_waiting_players_take_turns():
+    """Con un solo lugar, un jugador con muchos pedidos no tapa a los que llegan después."""
+    governor = LLMGovernor(max_concurrent=1, max_queue_per_player=10)
+    order = []
+
+    async def scenario():
+        calls = [asyncio.create_task(_call(governor, "ana", order)) for _ in range(4)]
+        await asyncio.sleep(0)
+        calls.append(asyncio.create_task(_call(governor, "beto", order)))
+        await asyncio.gather(*calls)
+
+    asyncio.run(scenario())
+
+    assert order == ["ana", "ana", "beto", "ana", "ana"]
+    stats = governor.stats()
+    assert stats["granted"] == 5 and stats["queued"] == 4
+    assert stats["max_queue_depth"] == 4 and stats["queue_depth"] == 0 and stats["active"] == 0
+
+
+def test_full_queue_and_player_limit_are_rejected_fast():
+    governor = LLMGovernor(max_concurrent=1, max_queue=3, max_queue_per_player=2)
+
+    async def scenario():
+        holder = asyncio.create_task(_call(governor, "ana", [], hold=0.2))
+        waiters = [asyncio.create_task(_call(governor, "ana", [])) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(LLMOverloaded) as player_limit:
+            await governor.acquire("ana")
+        waiters.append(asyncio.create_task(_call(governor, "beto", [])))
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        with pytest.raises(LLMOverloaded) as queue_full:
+            await governor.acquire("carla")
+        rejected_in = time.perf_counter() - start
+        await asyncio.gather(holder, *waiters)
+        return player_limit.value, queue_full.value, rejected_in
+
+    player_limit, queue_full, rejected_in = asyncio.run(scenario())
+
+    assert player_limit.reason == "player_limit"
+    assert queue_full.reason == "queue_full" and queue_full.retry_after >= 1
+    assert rejected_in < 0.01
+    assert governor.stats()["rejected_queue_full"] == 1
+
+
+def test_admission_only_counts_real_llm_pressure():
+    """Los pedidos HTTP en curso no ocupan lugar: se rechaza recién con la cola del LLM llena."""
+    governor = LLMGovernor(max_concurrent=1, max_queue=1)
+
+    async def scenario():
+        with governor.admission("ana"), governor.admission("beto"), governor.admission("carla"):
+            assert governor.stats()["admitted_requests"] == 3
+        holder = asyncio.create_task(_call(governor, "ana", [], hold=0.1))
+        waiter = asyncio.create_task(_call(governor, "beto", [], hold=0))
+        await asyncio.sleep(0)
+        with pytest.raises(LLMOverloaded) as rejected:
+            with governor.admission("carla"):
+                pass
+        await asyncio.gather(holder, waiter)
+        return rejected.value
+
+    assert asyncio.run(scenario()).reason == "queue_full"
+    assert governor.stats()["admitted_requests"] == 0
+
+
+def test_admission_rejects_when_the_rate_cannot_drain_the_queue():
+    governor = LLMGovernor(max_concurrent=10, max_wait=0.5, rate_per_second=1, burst=1)
+
+    async def scenario():
+        await governor.acquire("ana")  # se lleva el único token
+        governor.release()
+        with pytest.raises(LLMOverloaded) as rejected:
+            governor.check_capacity("beto")
+        return rejected.value
+
+    assert asyncio.run(scenario()).reason == "rate_limit"
+    assert governor.stats()["rejected_admission"] == 1
+
+
+def test_queue_wait_is_bounded():
+    governor = LLMGovernor(max_concurrent=1, max_wait=0.05)
+
+    async def scenario():
+        holder = asyncio.create_task(_call(governor, "ana", [], hold=0.3))
+        await asyncio.sleep(0)
+        with pytest.raises(LLMOverloaded) as timeout:
+            await governor.acquire("beto")
+        await holder
+        return timeout.value
+
+    assert asyncio.run(scenario()).reason == "timeout"
+    stats = governor.stats()
+    assert stats["timeouts"] == 1 and stats["queue_depth"] == 0 and stats["active"] == 0
+
+
+def test_token_bucket_paces_calls():
+    governor = LLMGovernor(max_concurrent=10, rate_per_second=20, burst=1)
+    order = []
+
+    async def scenario():
+        start = time.perf_counter()
+        await asyncio.gather(*(_call(governor, f"p{i}", order, hold=0) for i in range(5)))
+        return time.perf_counter() - start
+
+    # 1 token de entrada + 4 a 20/s -> ~0.2 s
+    assert 0.15 < asyncio.run(scenario()) < 0.5
+    assert len(order) == 5
+
+
+def test_api_answers_429_with_retry_after_when_saturated(monkeypatch):
+    monkeypatch.setattr(api, "llm_governor", LLMGovernor(max_concurrent=0, max_queue=0))
+    client = TestClient(api.app_api)
+
+    response = client.post("/start_game", json={"player_name": "ana", "topic": "Testing"})
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.json()["retry_after"] >= 1
+
+
+def test_stream_start_is_admitted_with_its_player(monkeypatch, use_llm):
+    use_llm(StubChatModel(latency=0))
+    players = []
+
+    class RecordingGovernor(LLMGovernor):
+        def check_capacity(self, player=None):
+            players.append(player)
+            super().check_capacity(player)
+
+    monkeypatch.setattr(api, "llm_governor", RecordingGovernor())
+    client = TestClient(api.app_api)
+
+    client.post("/start_game", json={"player_name": "ana", "topic": "Testing"})
+    client.post("/start_game/stream", json={"player_name": "beto", "topic": "Testing"})
+
+    assert players == ["ana", "beto", "beto"]
+
+
+def test_hedges_and_retries_take_their_own_slot():
+    """Un hedge no corre por fuera del límite: espera su propio lugar como cualquier llamada."""
+    governor = LLMGovernor(max_concurrent=1, max_queue_per_player=10)
+    policy = CallPolicy("test", deadline=5, hedge_budget=1.0, min_samples=1)
+    running, peak = [0], [0]
+
+    def factory(hold: float):
+        async def call():
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            try:
+                await asyncio.sleep(hold)
+            finally:
+                running[0] -= 1
+            return hold
+        return call
+
+    async def scenario():
+        await policy.run(governor.per_attempt("ana", factory(0.01)))  # aprende la latencia
+        return await policy.run(governor.per_attempt("ana", factory(0.1)))
+
+    assert asyncio.run(scenario()) == 0.1
+    assert policy.stats()["hedges"] == 1
+    assert peak[0] == 1 and governor.stats()["active"] == 0
@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from benchmarks.stub_llm import StubChatModel
+from src import agents
+from src.api import _replay_turn, app_api
+from src.governor import LLMOverloaded
+from src.models import GameSession, QuestionLog, audit_writer, engine
+from src.resilience import LLMUnavailable
+
+client = TestClient(app_api)
+
+
+def _current_answer(session_id: int) -> str:
+    config = {"configurable": {"thread_id": str(session_id)}}
+    return asyncio.run(agents.app.aget_state(config)).values["current_answer"]
+
+
+def _logs(session_id: int) -> list:
+    audit_writer.flush()
+    with Session(engine) as session:
+        return session.exec(select(QuestionLog).where(QuestionLog.session_id == session_id)).all()
+
+
+def test_replayed_turn_returns_the_same_result_without_applying_it_again(use_llm):
+    llm = StubChatModel(latency=0)
+    use_llm(llm)
+    session_id = client.post("/start_game", json={"player_name": "retry", "topic": "Reintentos"}).json()["session_id"]
+    payload = {"session_id": session_id, "user_answer": _current_answer(session_id), "turn": 1}
+
+    first = client.post("/submit_answer", json=payload)
+    calls = llm.calls
+    replay = client.post("/submit_answer", json=payload)
+    replay_stream = client.post("/submit_answer/stream", json=payload)
+
+    assert replay.status_code == 200 and replay.json() == first.json()
+    assert first.json()["score"] == 10
+    assert replay_stream.text == f"event: done\ndata: {json.dumps(first.json(), ensure_ascii=False)}\n\n"
+    assert llm.calls == calls
+    assert len(_logs(session_id)) == 1
+    with Session(engine) as session:
+        assert session.get(GameSession, session_id).total_score == 10
+
+
+def test_concurrent_duplicates_share_one_computation(use_llm):
+    llm = StubChatModel(latency=0.05)
+    use_llm(llm)
+    session_id = client.post("/start_game", json={"player_name": "dup", "topic": "Duplicados"}).json()["session_id"]
+    calls = llm.calls
+    payload = {"session_id": session_id, "user_answer": "no sé", "turn": 1}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_api)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*(http.post("/submit_answer", json=payload) for _ in range(3)))
+
+    responses = asyncio.run(scenario())
+
+    assert len({res.text for res in responses}) == 1 and responses[0].status_code == 200
+    # Una sola pregunta siguiente (el matcher resuelve "no sé" sin Juez) y una sola fila
+    assert llm.calls - calls == 1
+    assert len(_logs(session_id)) == 1
+
+
+def test_turn_that_is_not_the_current_one_is_rejected(use_llm):
+    use_llm(StubChatModel(latency=0))
+    session_id = client.post("/start_game", json={"player_name": "stale", "topic": "Turnos"}).json()["session_id"]
+
+    ahead = client.post("/submit_answer", json={"session_id": session_id, "user_answer": "x", "turn": 2})
+
+    assert ahead.status_code == 409
+    # El turno rechazado no quedó guardado: el actual se puede responder
+    assert client.post("/submit_answer", json={"session_id": session_id, "user_answer": "x", "turn": 1}).status_code == 200
+
+
+def _fail_next_question(monkeypatch):
+    async def unavailable(state, round_index):
+        await asyncio.sleep(0.05)  # el Juez (matcher, sin LLM) termina antes
+        raise LLMUnavailable("next_question", "deadline")
+
+    monkeypatch.setattr(agents, "_next_question", unavailable)
+    return lambda: monkeypatch.undo()
+
+
+def test_retry_after_a_half_applied_turn_completes_it_once(monkeypatch, use_llm):
+    use_llm(StubChatModel(latency=0))
+    session_id = client.post("/start_game", json={"player_name": "half", "topic": "Medio turno"}).json()["session_id"]
+    payload = {"session_id": session_id, "user_answer": _current_answer(session_id), "turn": 1}
+
+    restore = _fail_next_question(monkeypatch)
+    failed = client.post("/submit_answer", json=payload)
+    restore()
+    retry = client.post("/submit_answer", json=payload)
+
+    assert failed.status_code == 503
+    assert retry.status_code == 200 and retry.json()["score"] == 10
+    assert len(_logs(session_id)) == 1
+    with Session(engine) as session:
+        assert session.get(GameSession, session_id).total_score == 10
+    # El turno siguiente sigue siendo respondible con su número
+    assert client.post("/submit_answer", json={**payload, "turn": 2}).status_code == 200
+
+
+def test_stream_retry_after_a_half_applied_turn_completes_it_once(monkeypatch, use_llm):
+    use_llm(StubChatModel(latency=0))
+    session_id = client.post("/start_game", json={"player_name": "half-sse", "topic": "Medio turno"}).json()["session_id"]
+    payload = {"session_id": session_id, "user_answer": _current_answer(session_id), "turn": 1}
+
+    restore = _fail_next_question(monkeypatch)
+    failed = client.post("/submit_answer/stream", json=payload)
+    restore()
+    retry = client.post("/submit_answer/stream", json=payload)
+
+    assert "event: error" in failed.text and '"status": 503' in failed.text
+    assert "event: done" in retry.text and '"score": 10' in retry.text
+    assert len(_logs(session_id)) == 1
+
+
+def test_replay_of_an_overloaded_turn_keeps_the_429():
+    async def replay():
+        future = asyncio.get_running_loop().create_future()
+        future.set_exception(LLMOverloaded(7, "queue_full"))
+        return [event async for event in _replay_turn(future)]
+
+    events = asyncio.run(replay())
+
+    assert len(events) == 1 and '"status": 429' in events[0] and '"retry_after": 7' in events[0]
@@ -0,0 +1,60 @@
+from src import agents
+from src.knowledge import KnowledgeBase, ingest, load_chunks
+
+DOCS = """# Mercado Libre
+
+## Fundación
+- Marcos Galperin fundó Mercado Libre en 1999 en un garaje de Saavedra.
+- Hernán Kazah fue parte del equipo fundador junto a Marcos Galperin.
+
+## Mercado Pago
+- Mercado Pago nació en 2003 para cobrar las compras del marketplace.
+- Mercado Pago ofrece una billetera digital con pagos por código QR.
+
+## Logística
+- Mercado Envíos Full guarda los productos en centros de distribución propios.
+"""
+
+
+def _knowledge_base(tmp_path, seed=0):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "meli.md").write_text(DOCS, encoding="utf-8")
+    return KnowledgeBase.load(str(tmp_path / "index.npz"), str(docs), seed=seed)
+
+
+def test_ingest_chunks_each_fact_and_the_index_round_trips(tmp_path):
+    knowledge = _knowledge_base(tmp_path)
+
+    chunks = load_chunks(str(tmp_path / "docs"))
+    assert [chunk.section for chunk in chunks] == ["Fundación", "Fundación", "Mercado Pago", "Mercado Pago", "Logística"]
+    assert knowledge.texts == [chunk.text for chunk in chunks]
+    assert knowledge.stats() == {"chunks": 5, "documents": 1, "seeds_used": 0}
+    # Lo que se carga es lo mismo que se indexó
+    assert ingest(str(tmp_path / "docs"), str(tmp_path / "again.npz")) == 5
+    assert KnowledgeBase.load(str(tmp_path / "again.npz"), str(tmp_path / "docs")).vectors.tolist() == knowledge.vectors.tolist()
+
+
+def test_sample_returns_related_facts_and_avoids_the_ones_already_asked(tmp_path):
+    knowledge = _knowledge_base(tmp_path)
+    asked = ["¿Quién fundó Mercado Libre en 1999?", "¿Quién fue parte del equipo fundador de Mercado Libre?",
+             "¿Qué ofrece la billetera digital de Mercado Pago?", "¿En qué año nació Mercado Pago?"]
+
+    # Sesiones nuevas (sin usos acumulados): casi todo el peso queda en el hecho que no se preguntó
+    seeds = [
+        KnowledgeBase(knowledge.vectors, knowledge.df, knowledge.texts, knowledge.sources, seed=seed).sample(2, avoid=asked)[0]
+        for seed in range(20)
+    ]
+    assert seeds.count("Mercado Envíos Full guarda los productos en centros de distribución propios.") >= 15
+    facts = knowledge.sample(2)
+    assert len(facts) == 2 and len(set(facts)) == 2
+
+
+def test_meli_prompt_carries_retrieved_facts_instead_of_a_fixed_block():
+    prompt = agents._quiz_master_prompt("MeLi Expert", [])
+    facts = [line.strip()[2:] for line in prompt.splitlines() if line.strip().startswith("- ")]
+
+    assert "CONTEXTO MERCADO LIBRE" in prompt
+    assert len(facts) == agents.settings.MELI_CONTEXT_CHUNKS
+    assert set(facts) <= set(agents.meli_knowledge.texts)
+    assert "CONTEXTO MERCADO LIBRE" not in agents._quiz_master_prompt("Cine", [])
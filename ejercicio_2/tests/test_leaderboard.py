@@ -0,0 +1,114 @@
+import threading
+import time
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, func, select
+
+from src.api import app_api
+from src import models
+from src.leaderboard import ScoreEntry, ScoreFeed, TopScores
+from src.models import create_session, top_scores, update_session_score
+from src.ranking import RankIndex
+
+NOW = datetime(2024, 1, 1)
+
+
+def _entry(session_id: int, score: int) -> ScoreEntry:
+    return ScoreEntry(session_id=session_id, player_name=f"p{session_id}", score=score, start_time=NOW)
+
+
+def test_top_scores_incremental_updates():
+    top = TopScores(capacity=3)
+    for session_id, score in [(1, 10), (2, 30), (3, 20), (4, 5)]:
+        top.offer(_entry(session_id, score))
+    assert [e.session_id for e in top.top(3)] == [2, 3, 1]
+
+    # Una sesión fuera del top sube y entra; la misma sesión no se duplica
+    top.offer(_entry(4, 40))
+    top.offer(_entry(2, 50))
+    assert [(e.session_id, e.score) for e in top.top(3)] == [(2, 50), (4, 40), (3, 20)]
+
+    # Empate: gana la sesión más antigua (id menor)
+    top.offer(_entry(5, 20))
+    assert [e.session_id for e in top.top(3)] == [2, 4, 3]
+
+
+def test_top_scores_resyncs_from_loader():
+    calls = []
+    top = TopScores(capacity=2, loader=lambda n: calls.append(n) or [_entry(9, 90)], resync_seconds=0)
+    assert top.top(5) == [_entry(9, 90)]
+    top.top(5)
+    assert calls == [2]  # resync_seconds=0: solo la carga inicial
+
+
+def test_stale_top_is_served_while_it_reloads_in_the_background():
+    release = threading.Event()
+    db = [_entry(1, 10)]
+
+    def loader(n):
+        snapshot = list(db)  # la lectura de la DB empieza antes de que llegue el total nuevo
+        release.wait(5)
+        return snapshot
+
+    top = TopScores(capacity=3, loader=loader, resync_seconds=0.01)
+    release.set()
+    top.warm()
+    release.clear()
+    db.append(_entry(2, 50))
+    time.sleep(0.02)
+
+    # La lectura vencida no espera la recarga; lo que llega durante la recarga no se pierde
+    start = time.perf_counter()
+    assert top.top(3) == [_entry(1, 10)]
+    assert time.perf_counter() - start < 0.5
+    db.append(_entry(3, 30))
+    top.offer(_entry(3, 30))
+    release.set()
+    for _ in range(100):
+        if len(top.top(3)) == 3:
+            break
+        time.sleep(0.01)
+    assert [e.session_id for e in top.top(3)] == [2, 3, 1]
+
+
+def test_another_worker_follows_the_scores_through_the_change_feed():
+    # Otro worker: su top-N y su RankIndex solo se enteran por la tabla de cambios
+    top = TopScores(capacity=3, loader=models._load_top_scores)
+    index = RankIndex(loader=models._load_rank_keys)
+    feed = ScoreFeed(models._read_score_changes, models._last_score_change, [top, index], poll_seconds=0)
+    feed.poll()
+    top.warm()
+    index.warm()
+
+    ids = [create_session(f"feed-{i}") for i in range(3)]
+    update_session_score(ids[0], 5_000)
+    update_session_score(ids[1], 4_000)
+    update_session_score(ids[0], 1_000)
+    feed.poll()
+    feed.poll()  # leer dos veces lo mismo no duplica nada
+
+    assert [(e.session_id, e.score) for e in top.top(2)] == [(ids[0], 6_000), (ids[1], 4_000)]
+    with Session(models.engine) as session:
+        total = session.exec(select(func.count()).select_from(models.GameSession)).one()
+    assert len(index) == total
+    assert index.rank(ids[0], 6_000) == (1, total) and index.rank(ids[1], 4_000) == (2, total)
+
+
+def test_leaderboard_endpoint_etag_revalidation():
+    client = TestClient(app_api)
+    session_id = create_session("etag-player")
+    update_session_score(session_id, 10_000)
+
+    first = client.get("/leaderboard")
+    assert first.status_code == 200
+    assert first.json()[0]["player_name"] == "etag-player"
+    assert "max-age" in first.headers["cache-control"]
+
+    etag = first.headers["etag"]
+    assert client.get("/leaderboard", headers={"If-None-Match": etag}).status_code == 304
+
+    update_session_score(session_id, 10)
+    changed = client.get("/leaderboard", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert top_scores.top(1)[0].score >= 10_010
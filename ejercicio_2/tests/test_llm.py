@@ -0,0 +1,58 @@
+import asyncio
+
+import grpc
+
+from benchmarks.common import free_port
+from benchmarks.stub_vertex import serve
+from src import llm
+from src.agents import QuestionSchema
+from src.config import settings
+
+
+def test_structured_calls_share_one_channel_and_warm_up(monkeypatch, use_llm):
+    """ChatVertexAI real contra el stub gRPC: un solo canal por event loop y warm-up completo."""
+    port = free_port()
+    monkeypatch.setattr(settings, "LLM_API_ENDPOINT", f"127.0.0.1:{port}")
+    monkeypatch.setattr(settings, "LLM_API_INSECURE", True)
+    # Proyecto explícito: sin él ChatVertexAI busca credenciales por defecto (ADC)
+    monkeypatch.setattr(settings, "PROJECT_ID", "test-project")
+    use_llm(None)
+
+    async def scenario():
+        server = asyncio.create_task(serve(port, latency=0, connect_ms=0))
+        try:
+            await llm.warm_up("request")
+            channel = llm._channel
+            first = await llm.ainvoke_structured(QuestionSchema, "pregunta")
+            second = await llm.ainvoke_structured(QuestionSchema, "otra pregunta")
+            return channel, first, second
+        finally:
+            server.cancel()
+
+    channel, first, second = asyncio.run(scenario())
+
+    assert isinstance(channel, grpc.aio.Channel)
+    assert llm._channel is channel
+    assert first.question.startswith("Pregunta") and second.question != first.question
+    stats = llm.llm_stats()
+    assert stats["warmup"]["state"] == "done"
+    assert stats["structured_runnables"] == 1
+
+
+def test_warm_up_is_a_no_op_with_a_fake_llm(use_llm):
+    from benchmarks.stub_llm import StubChatModel
+
+    use_llm(StubChatModel(latency=0))
+    asyncio.run(llm.warm_up("connect"))
+
+    assert llm._channel is None
+    assert llm.llm_stats()["warmup"]["state"] == "done"
+
+
+def test_shared_channel_falls_back_when_the_client_lacks_the_internals(monkeypatch, use_llm):
+    """Si ChatVertexAI cambia sus atributos internos se usa su cliente por defecto."""
+    use_llm(None)
+    monkeypatch.setattr(llm, "get_llm", lambda model_name=None: object())
+
+    assert asyncio.run(llm.ensure_transport()) is None
+    assert llm._channel is None
@@ -0,0 +1,48 @@
+from argparse import Namespace
+
+from benchmarks import loadtest
+from src.config import settings
+
+
+def _args(mode: str, **overrides) -> Namespace:
+    defaults = dict(mode=mode, players=4, latency="uniform:0:0.01", seed=0, topic="Carga", room=False,
+                    ramp=0.0, think=0.0, warmup=0)
+    return Namespace(**{**defaults, **overrides})
+
+
+def test_api_load_test_plays_every_game(use_llm):
+    report = loadtest.run(_args("api"))
+
+    assert report["games"] == 4 and report["errors"] == {}
+    assert set(report["endpoints"]) == {"/start_game", "/submit_answer"}
+    assert report["endpoints"]["/submit_answer"]["count"] == 4 * settings.MAX_QUESTIONS
+    assert report["throughput"]["games_per_s"] > 0
+
+
+def test_cli_load_test_drives_the_game_loop_headless(use_llm):
+    report = loadtest.run(_args("cli", players=2))
+
+    assert report["games"] == 2 and report["errors"] == {}
+    assert report["endpoints"]["start_game"]["count"] == 2
+    assert report["endpoints"]["game_over"]["count"] == 2
+
+
+def test_compare_flags_only_regressions_beyond_tolerance_and_noise():
+    baseline = {
+        "throughput": {"games_per_s": 10.0},
+        "endpoints": {"/start_game": {"count": 500, "p50_ms": 100.0, "p95_ms": 200.0, "p99_ms": 20.0},
+                      "/submit_answer": {"count": 10, "p50_ms": 100.0, "p95_ms": 100.0, "p99_ms": 100.0}},
+        "memory": {"growth_mb": 10.0},
+    }
+    report = {
+        "throughput": {"games_per_s": 9.0},
+        "endpoints": {"/start_game": {"count": 500, "p50_ms": 130.0, "p95_ms": 210.0, "p99_ms": 28.0},
+                      "/submit_answer": {"count": 10, "p50_ms": 100.0, "p95_ms": 900.0, "p99_ms": 900.0}},
+        "memory": {"growth_mb": 12.0},
+    }
+
+    worse = {metric for metric, _, _, regressed in loadtest.compare(report, baseline, tolerance=0.2) if regressed}
+
+    # El p99 sube 40% pero son 8 ms (ruido), la memoria sube justo la tolerancia y el
+    # p95/p99 de 10 muestras no se compara
+    assert worse == {"/start_game p50_ms"}
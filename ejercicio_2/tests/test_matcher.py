@@ -0,0 +1,47 @@
+from src.matcher import MatcherStats, match_answer, normalize_answer
+
+
+def test_normalization_handles_accents_case_articles_and_numbers():
+    assert normalize_answer("¡La Casa de Papel!") == "casa papel"
+    assert normalize_answer("Marcos Galperín") == "marcos galperin"
+    assert normalize_answer("mil novecientos noventa y nueve") == "1999"
+    assert normalize_answer("veintidós") == "22"
+
+
+def test_digits_and_articles_before_multipliers_normalize_to_the_same_number():
+    assert normalize_answer("1 millón") == normalize_answer("un millón") == "1000000"
+    assert normalize_answer("3 mil") == "3000"
+    assert normalize_answer("un perro") == "perro"
+
+
+def test_clear_matches_and_non_answers_are_decided_locally():
+    assert match_answer("marcos galperin", "Marcos Galperin") is True
+    assert match_answer("Marcoz Galperin", "Marcos Galperin") is True  # typo
+    assert match_answer("1 millón", "un millón") is True
+    assert match_answer("", "Zelda") is False
+    assert match_answer("No sé", "Zelda") is False
+    assert match_answer("no lo sé", "Zelda") is False
+
+
+def test_different_numbers_are_never_a_typo():
+    for user, correct in [("PlayStation 3", "PlayStation 2"), ("Windows 98", "Windows 95"),
+                          ("FIFA 98", "FIFA 99"), ("Final Fantasy VIII", "Final Fantasy VII"),
+                          ("Super Mario 64", "Super Mario 63"), ("2001", "1999")]:
+        assert match_answer(user, correct) is None, user
+
+
+def test_ambiguous_answers_go_to_the_llm():
+    assert match_answer("Galperin", "Marcos Galperin") is None
+    assert match_answer("Zelda", "The Legend of Zelda") is None
+    assert match_answer("EEUU", "Estados Unidos") is None
+    # Alias y siglas se parecen poco a la respuesta pero pueden ser correctos
+    assert match_answer("Meli", "Mercado Libre") is None
+    assert match_answer("NYC", "Nueva York") is None
+    assert match_answer("Pacman", "Mario Bros") is None
+
+
+def test_hit_rate():
+    stats = MatcherStats()
+    for verdict in (True, False, None, True):
+        stats.record(verdict)
+    assert stats.hit_rate == 0.75
@@ -0,0 +1,46 @@
+from fastapi.testclient import TestClient
+
+from benchmarks.stub_llm import StubChatModel
+from src.api import app_api
+from src.config import settings
+from src.metrics import server_timing
+
+client = TestClient(app_api)
+
+
+def test_metrics_cover_endpoints_nodes_llm_and_db(use_llm):
+    use_llm(StubChatModel(latency=0))
+    game = client.post("/start_game", json={"player_name": "metrics", "topic": "Observabilidad"}).json()
+    client.post("/submit_answer", json={"session_id": game["session_id"], "user_answer": "x"})
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    body = response.text
+    assert 'trivia_http_request_duration_seconds_count{endpoint="start_game",method="POST",status="200"}' in body
+    assert 'trivia_graph_node_duration_seconds_count{node="quiz_master"}' in body
+    assert 'trivia_graph_node_duration_seconds_count{node="judge"}' in body
+    model = settings.MODEL_NAME
+    assert f'trivia_llm_calls_total{{model="{model}",outcome="ok",schema="QuestionSchema"}}' in body
+    assert f'trivia_llm_tokens_total{{kind="prompt",model="{model}"}}' in body
+    assert 'trivia_db_commit_duration_seconds_count{operation="create_session"}' in body
+    assert "trivia_checkpointer_threads" in body
+
+
+def test_trace_header_returns_the_timing_breakdown(use_llm):
+    use_llm(StubChatModel(latency=0))
+
+    traced = client.post("/start_game", json={"player_name": "trace", "topic": "Trazas"},
+                         headers={"X-Trace-Timing": "1"})
+    plain = client.post("/start_game", json={"player_name": "plain", "topic": "Trazas"})
+
+    timing = traced.headers["Server-Timing"]
+    for span in ("node.quiz_master;dur=", "llm.QuestionSchema;dur=", "db.create_session;dur=", "total;dur="):
+        assert span in timing
+    assert "server-timing" not in plain.headers
+
+
+def test_server_timing_merges_repeated_spans():
+    header = server_timing([("llm.EvaluationSchema", 0.1), ("node.judge", 0.25), ("llm.EvaluationSchema", 0.2)], 0.5)
+
+    assert header == 'llm.EvaluationSchema;dur=300.0;desc="x2", node.judge;dur=250.0, total;dur=500.0'
@@ -0,0 +1,100 @@
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from src.config import settings
+
+from src.models import (
+    AuditWriter, GameSession, QuestionLog, create_session, engine, init_db, make_engine,
+    record_answer
+)
+
+
+def _log(session_id: int, points: int) -> QuestionLog:
+    return QuestionLog(
+        session_id=session_id, question_text="q", correct_answer="a", user_answer="a",
+        is_correct=points > 0, feedback="ok", score_awarded=points
+    )
+
+
+def _state(session_id: int):
+    with Session(engine) as session:
+        game = session.get(GameSession, session_id)
+        logs = session.exec(select(QuestionLog).where(QuestionLog.session_id == session_id)).all()
+        return game.total_score, len(logs)
+
+
+def test_record_answer_writes_log_and_score_together():
+    init_db()
+    session_id = create_session("audit-sync")
+    record_answer(_log(session_id, 10))
+    record_answer(_log(session_id, 0))
+    assert _state(session_id) == (10, 2)
+
+
+def test_audit_writer_batches_and_flushes_on_close():
+    init_db()
+    first, second = create_session("audit-a"), create_session("audit-b")
+    writer = AuditWriter(batch_size=50, flush_interval=0.05)
+    for _ in range(30):
+        writer.submit(_log(first, 10))
+        writer.submit(_log(second, 0))
+    writer.close()
+
+    assert _state(first) == (300, 30)
+    assert _state(second) == (0, 30)
+    stats = writer.stats()
+    assert stats["rows_written"] == 60 and stats["pending"] == 0
+    # Group commit: muchas filas por transacción
+    assert stats["batches_written"] < 60
+
+
+def test_make_engine_sqlite_profiles(tmp_path):
+    def pragmas(profile):
+        config = settings.model_copy(update={"DB_NAME": str(tmp_path / f"{profile}.db"), "DB_SQLITE_PROFILE": profile})
+        with make_engine(config).connect() as conn:
+            return (
+                conn.execute(text("PRAGMA journal_mode")).scalar(),
+                conn.execute(text("PRAGMA synchronous")).scalar(),
+            )
+
+    assert pragmas("tuned") == ("wal", 1)  # 1 = NORMAL
+    assert pragmas("default") == ("delete", 2)  # 2 = FULL
+
+
+def test_audit_writer_retries_a_failed_batch_and_falls_back_to_single_rows(monkeypatch):
+    init_db()
+    flaky, broken = create_session("audit-flaky"), create_session("audit-broken")
+    writer = AuditWriter(batch_size=50, flush_interval=0.05, max_retries=1, retry_backoff=0)
+    commit_batch = writer._commit_batch
+    failures = iter([True])
+
+    def fails_once(batch):
+        if next(failures, False):
+            raise RuntimeError("database is locked")
+        return commit_batch(batch)
+
+    monkeypatch.setattr(writer, "_commit_batch", fails_once)
+    for _ in range(3):
+        writer.submit(_log(flaky, 10))
+    writer.flush()
+    assert _state(flaky) == (30, 3)
+    assert writer.stats()["batches_retried"] == 1
+
+    # Un lote que falla siempre se escribe fila por fila; la fila que falla sola se cuenta
+    def always_fails(batch):
+        raise RuntimeError("database is locked")
+
+    def bad_row(log):
+        if log.feedback == "bad":
+            raise RuntimeError("fila inválida")
+        record_answer(log)
+
+    monkeypatch.setattr(writer, "_commit_batch", always_fails)
+    monkeypatch.setattr("src.models.record_answer", bad_row)
+    writer.submit(_log(broken, 10))
+    writer.submit(_log(broken, 0).model_copy(update={"feedback": "bad"}))
+    writer.submit(_log(broken, 5))
+    writer.close()
+
+    assert _state(broken) == (15, 2)
+    assert writer.stats()["rows_failed"] == 1 and writer.stats()["rows_written"] == 5
@@ -0,0 +1,40 @@
+import asyncio
+
+from src.question_pool import QuestionPool, question_fingerprint
+
+
+async def _fake_generator(topic, avoid):
+    _fake_generator.calls += 1
+    return f"{topic} pregunta {_fake_generator.calls}?", "respuesta"
+
+_fake_generator.calls = 0
+
+
+def test_refill_and_draw_skips_seen_questions():
+    pool = QuestionPool(_fake_generator, topics=["MeLi Expert"], max_size=3)
+    asyncio.run(pool.refill("MeLi Expert"))
+    assert pool.stats()["sizes"]["MeLi Expert"] == 3
+
+    first = list(pool._queues["MeLi Expert"])[0]
+    drawn = pool.draw("MeLi Expert", seen={first.fingerprint})
+    assert drawn is not None and drawn.fingerprint != first.fingerprint
+    assert pool.stats()["sizes"]["MeLi Expert"] == 2
+
+
+def test_custom_topics_fall_back_to_live_generation():
+    pool = QuestionPool(_fake_generator, topics=["MeLi Expert"])
+    assert not pool.supports("Física Cuántica")
+    assert pool.draw("Física Cuántica", seen=set()) is None
+
+
+def test_size_limit_and_ttl_evict_old_questions():
+    pool = QuestionPool(_fake_generator, topics=["Cine"], max_size=2, ttl_seconds=60)
+    for i in range(3):
+        pool.add("Cine", f"pregunta {i}", "r")
+    assert [e.question for e in pool._queues["Cine"]] == ["pregunta 1", "pregunta 2"]
+    assert not pool.add("Cine", "  PREGUNTA 2 ", "r")  # duplicada
+
+    pool.ttl_seconds = -1  # todo vencido
+    assert pool.draw("Cine", seen=set()) is None
+    assert pool.stats()["evictions"] == 3
+    assert question_fingerprint("Hola  Mundo") == question_fingerprint("hola mundo")
@@ -0,0 +1,94 @@
+import random
+from bisect import bisect_left
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, desc, select
+
+from src.api import app_api
+from src.models import GameSession, create_session, engine, update_session_score
+from src.ranking import OrderStatisticIndex, RankIndex, decode_key, rank_key
+
+
+def test_order_statistic_index_matches_sorted_list():
+    rng = random.Random(7)
+    index = OrderStatisticIndex(block_size=4)
+    reference = sorted(rng.sample(range(100_000), 200))
+    index.load(reference)
+
+    for _ in range(3000):
+        key = rng.randrange(100_000)
+        if rng.random() < 0.5 and key not in reference:
+            index.add(key)
+            reference.insert(bisect_left(reference, key), key)
+        elif reference and rng.random() < 0.5:
+            victim = rng.choice(reference)
+            assert index.discard(victim)
+            reference.remove(victim)
+        assert index.rank(key) == bisect_left(reference, key)
+        assert (key in index) == (key in reference)
+        if reference:
+            k = rng.randrange(len(reference))
+            assert index.select(k) == reference[k]
+    assert len(index) == len(reference)
+
+
+def test_rank_key_orders_by_score_desc_then_id():
+    assert rank_key(30, 5) < rank_key(20, 1) < rank_key(20, 2)
+    assert decode_key(rank_key(20, 2)) == (20, 2)
+
+
+def test_score_change_during_a_reload_keeps_one_key_per_session():
+    db = {1: 0, 2: 0}
+
+    def snapshot():
+        return sorted(rank_key(score, session_id) for session_id, score in db.items())
+
+    def reload_with(loader):
+        index.invalidate()
+        index.loader = loader
+        index.warm()
+
+    def sees_the_change():
+        # El puntaje nuevo de la sesión 1 llega mientras se lee y la lectura ya lo ve
+        db[1] = 30
+        index.update_score(1, 0, 30)
+        yield from snapshot()
+
+    def misses_the_change():
+        # La lectura ya pasó cuando llega el puntaje nuevo de la sesión 2
+        keys = snapshot()
+        index.update_score(2, 0, 50)
+        yield from keys
+
+    index = RankIndex(snapshot)
+    index.warm()
+
+    reload_with(sees_the_change)
+    assert len(index) == 2 and index.key_at(0) == (30, 1)
+
+    reload_with(misses_the_change)
+    assert len(index) == 2 and [index.key_at(0), index.key_at(1)] == [(50, 2), (30, 1)]
+
+
+def test_pagination_and_rank_match_sql():
+    client = TestClient(app_api)
+    ids = [create_session(f"rank-{i}") for i in range(12)]
+    for i, session_id in enumerate(ids):
+        update_session_score(session_id, (i % 4) * 10)
+
+    with Session(engine) as session:
+        ordered = session.exec(
+            select(GameSession).order_by(desc(GameSession.total_score), GameSession.id)
+        ).all()
+    expected_ids = [g.id for g in ordered]
+
+    page = client.get("/leaderboard", params={"offset": 3, "limit": 4}).json()
+    assert [row["player_name"] for row in page] == [g.player_name for g in ordered[3:7]]
+    assert client.get("/leaderboard", params={"offset": len(ordered) + 10}).json() == []
+
+    for session_id in ids:
+        body = client.get(f"/sessions/{session_id}/rank").json()
+        assert body["rank"] == expected_ids.index(session_id) + 1
+        assert body["total_sessions"] == len(ordered)
+
+    assert client.get("/sessions/999999999/rank").status_code == 404
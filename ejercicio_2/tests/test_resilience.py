@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from google.api_core import exceptions as gexc
+
+from src.resilience import CallPolicy, LLMUnavailable
+
+
+class FlakyCall:
+    """Fábrica de llamadas: cada intento toma el siguiente comportamiento de la lista."""
+
+    def __init__(self, *behaviours):
+        self.behaviours = list(behaviours)
+        self.attempts = 0
+
+    def __call__(self):
+        behaviour = self.behaviours[min(self.attempts, len(self.behaviours) - 1)]
+        self.attempts += 1
+        return self._run(behaviour)
+
+    async def _run(self, behaviour):
+        delay, outcome = behaviour
+        await asyncio.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def test_transient_errors_are_retried_until_success():
+    policy = CallPolicy("test", deadline=2, max_attempts=3, backoff_base=0.01, hedge=False)
+    call = FlakyCall((0, gexc.ServiceUnavailable("503")), (0, gexc.ResourceExhausted("429")), (0, "ok"))
+
+    assert asyncio.run(policy.run(call)) == "ok"
+    assert call.attempts == 3
+    assert policy.stats()["retries"] == 2
+
+
+def test_non_retryable_errors_fail_fast_and_exhausted_retries_raise_unavailable():
+    policy = CallPolicy("test", deadline=2, max_attempts=2, backoff_base=0.01, hedge=False)
+
+    bad_request = FlakyCall((0, ValueError("schema inválido")))
+    with pytest.raises(ValueError):
+        asyncio.run(policy.run(bad_request))
+    assert bad_request.attempts == 1
+
+    down = FlakyCall((0, gexc.ServiceUnavailable("503")))
+    with pytest.raises(LLMUnavailable) as exc:
+        asyncio.run(policy.run(down))
+    assert down.attempts == 2 and exc.value.reason == "ServiceUnavailable"
+
+
+def test_deadline_bounds_a_slow_call():
+    policy = CallPolicy("judge", deadline=0.05, hedge=False)
+
+    with pytest.raises(LLMUnavailable) as exc:
+        asyncio.run(policy.run(FlakyCall((1.0, "tarde"))))
+
+    assert exc.value.operation == "judge"
+    assert policy.stats()["deadline_exceeded"] == 1
+
+
+def test_slow_call_is_hedged_after_the_learned_p95():
+    policy = CallPolicy("test", deadline=5, hedge_budget=1.0, min_samples=5)
+    fast = FlakyCall((0.01, "ok"))
+
+    async def scenario():
+        for _ in range(5):
+            await policy.run(fast)
+        # La primera copia se cuelga; el hedge sale al p95 (~10 ms) y responde rápido
+        straggler = FlakyCall((1.0, "lenta"), (0.01, "hedge"))
+        started = asyncio.get_running_loop().time()
+        result = await policy.run(straggler)
+        return result, asyncio.get_running_loop().time() - started
+
+    result, elapsed = asyncio.run(scenario())
+
+    assert result == "hedge" and elapsed < 0.5
+    stats = policy.stats()
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_hedge_budget_caps_duplicate_calls():
+    policy = CallPolicy("test", deadline=5, hedge_budget=0.01, min_samples=5)
+    policy.budget._tokens = 1  # un solo hedge disponible
+
+    async def scenario():
+        for _ in range(5):
+            await policy.run(FlakyCall((0.01, "ok")))
+        for _ in range(3):
+            await policy.run(FlakyCall((0.05, "lenta"), (0.01, "hedge")))
+
+    asyncio.run(scenario())
+
+    assert policy.stats()["hedges"] == 1
@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from benchmarks.stub_llm import StubChatModel
+from src import agents
+from src.api import app_api
+from src.config import settings
+from src.models import QuestionLog, engine
+from src.rooms import RoomHub
+from src.shared_results import SharedResults, SQLiteClaims
+from src.state import room_rounds
+
+client = TestClient(app_api)
+
+
+def _question(message: str) -> str:
+    return message.split("Siguiente Pregunta: ")[-1]
+
+
+def test_room_generates_each_round_once_and_judges_each_member(use_llm):
+    llm = StubChatModel(latency=0)
+    use_llm(llm)
+
+    room = client.post("/rooms", json={"topic": "Salas"}).json()
+    members = [client.post("/start_game", json={"player_name": f"p{i}", "room_id": room["room_id"]}).json()
+               for i in range(3)]
+    assert len({member["message"] for member in members}) == 1
+
+    seen = [[member["message"]] for member in members]
+    for _ in range(settings.MAX_QUESTIONS - 1):
+        for i, member in enumerate(members):
+            turn = client.post("/submit_answer", json={"session_id": member["session_id"], "user_answer": "no sé"}).json()
+            seen[i].append(_question(turn["message"]))
+    assert seen[0] == seen[1] == seen[2]
+
+    # Una pregunta por ronda para toda la sala, no una por jugador
+    assert llm.calls == settings.MAX_QUESTIONS
+    with Session(engine) as session:
+        for member in members:
+            logs = session.exec(select(QuestionLog).where(QuestionLog.session_id == member["session_id"])).all()
+            assert [log.question_text for log in logs] == seen[0][:-1]
+
+
+def test_concurrent_members_share_one_generation(use_llm):
+    llm = StubChatModel(latency=0.05)
+    use_llm(llm)
+
+    async def scenario():
+        room_id = await agents.room_hub.create("Concurrencia")
+        return await asyncio.gather(*(agents.room_hub.question(room_id, 1) for _ in range(10)))
+
+    questions = asyncio.run(scenario())
+
+    assert len(set(questions)) == 1
+    assert llm.calls == 2  # ronda 0 (al crear la sala) y ronda 1
+
+
+def test_a_round_is_generated_once_across_workers(tmp_path, use_llm):
+    llm = StubChatModel(latency=0.05)
+    use_llm(llm)
+    claims = str(tmp_path / "claims.db")
+
+    def worker():
+        # Cada worker con su cache local; comparten el hilo de la sala y las reservas
+        shared = SharedResults(SQLiteClaims(claims), "room:", dumps=json.dumps, loads=json.loads)
+        return RoomHub(agents.room_hub.graph, max_rounds=settings.MAX_QUESTIONS, shared=shared)
+
+    first, second = worker(), worker()
+
+    async def scenario():
+        room_id = await first.create("Workers")
+        await second.topic(room_id)  # el segundo worker ya tiene la sala (ronda 0) en memoria
+        return await asyncio.gather(*(hub.question(room_id, 1) for hub in (first, second, first, second)))
+
+    questions = asyncio.run(scenario())
+
+    assert len(set(questions)) == 1
+    assert llm.calls == 2
+
+
+def test_rooms_stop_growing_after_the_last_round(use_llm):
+    use_llm(StubChatModel(latency=0))
+
+    async def scenario():
+        room_id = await agents.room_hub.create("Rondas")
+        for round_index in range(settings.MAX_QUESTIONS):
+            await agents.room_hub.question(room_id, round_index)
+        with pytest.raises(ValueError):
+            await agents.room_hub.question(room_id, settings.MAX_QUESTIONS)
+        return await agents.room_hub.graph.aget_state(agents.room_hub._config(room_id))
+
+    snapshot = asyncio.run(scenario())
+
+    assert len(snapshot.values["questions"]) == settings.MAX_QUESTIONS
+    rounds = [(f"q{i}", "a") for i in range(settings.MAX_QUESTIONS)]
+    assert room_rounds(rounds, [("extra", "a")]) == rounds
+
+
+def test_unknown_room_is_a_404():
+    response = client.post("/start_game", json={"player_name": "p", "room_id": "no-existe"})
+    assert response.status_code == 404
+    assert client.post("/start_game", json={"player_name": "p"}).status_code == 422
@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+from benchmarks.stub_llm import StubChatModel
+from src.agents import QuestionSchema
+from src.resilience import CallPolicy
+from src.router import ModelRouter
+
+
+def test_calls_go_to_the_fastest_model():
+    router = ModelRouter("test", ["flash", "pro"], explore_rate=0)
+    router.record("flash", 0.5, ok=True)
+    router.record("pro", 0.2, ok=True)
+
+    assert router.choose() == "pro"
+    # Con margen de latencia se queda con el primero de la lista (el más barato)
+    router.latency_slack = 2.0
+    assert router.choose() == "flash"
+
+
+def test_degraded_model_is_skipped_until_cooldown():
+    router = ModelRouter("test", ["flash", "pro"], error_threshold=0.3, cooldown=0.05, explore_rate=0)
+    router.record("flash", 0.1, ok=True)
+    router.record("pro", 0.3, ok=True)
+    for _ in range(2):
+        router.record("flash", 0.1, ok=False)
+
+    assert router.choose() == "pro"
+    stats = router.stats()["flash"]
+    assert stats["healthy"] is False and stats["degraded"] == 1
+
+    time.sleep(0.06)
+    assert router.choose() == "flash"
+    # Un error más después del cooldown lo vuelve a sacar
+    router.record("flash", 0.1, ok=False)
+    assert router.choose() == "pro"
+
+
+def test_retries_fall_back_to_another_model(use_llm):
+    flaky = StubChatModel(latency=0, fail_rate=1.0)
+    backup = StubChatModel(latency=0)
+    use_llm({"flash": flaky, "pro": backup})
+    router = ModelRouter("test", ["flash", "pro"], explore_rate=0)
+    policy = CallPolicy("test", deadline=2, backoff_base=0.01, hedge=False)
+
+    response = asyncio.run(policy.run(router.caller(QuestionSchema, "El tema elegido es: Testing.")))
+
+    assert response.question
+    assert flaky.requests == 1 and backup.requests == 1
+    stats = router.stats()
+    assert stats["flash"]["errors"] == 1 and stats["pro"]["calls"] == 1
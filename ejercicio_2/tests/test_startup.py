@@ -0,0 +1,16 @@
+import subprocess
+import sys
+from pathlib import Path
+
+
+def test_api_import_does_not_load_the_graph():
+    """El leaderboard no necesita LangGraph ni el LLM: importar src.api no debe cargarlos."""
+    code = (
+        "import sys, src.api; "
+        "print([m for m in ('src.agents', 'langgraph', 'langchain_google_vertexai') if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from benchmarks.stub_llm import StubChatModel
+from src import agents
+from src.api import app_api
+from src.config import settings
+
+client = TestClient(app_api)
+
+
+def _events(response) -> list:
+    """Parsea un cuerpo text/event-stream en [(evento, datos)]."""
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def _current_answer(session_id: int) -> str:
+    config = {"configurable": {"thread_id": str(session_id)}}
+    return asyncio.run(agents.app.aget_state(config)).values["current_answer"]
+
+
+def test_stream_emits_feedback_then_score_then_question(use_llm):
+    use_llm(StubChatModel(latency=0))
+
+    start = client.post("/start_game/stream", json={"player_name": "sse", "topic": "Streaming"})
+    assert start.headers["content-type"].startswith("text/event-stream")
+    start_events = _events(start)
+    assert [name for name, _ in start_events] == ["session", "question", "done"]
+    session_id = start_events[0][1]["session_id"]
+
+    turn = client.post("/submit_answer/stream", json={
+        "session_id": session_id, "user_answer": _current_answer(session_id)
+    })
+    names = [name for name, _ in _events(turn)]
+    assert names[0] == "feedback" and set(names[:-3]) == {"feedback"}
+    assert names[-3:] == ["score", "question", "done"]
+
+    events = _events(turn)
+    feedback = "".join(data["text"] for name, data in events if name == "feedback")
+    done = events[-1][1]
+    assert events[names.index("score")][1] == {"is_correct": True, "points": 10, "score": 10}
+    assert done["message"].startswith(f"Feedback: {feedback}")
+    assert events[names.index("question")][1]["text"] in done["message"]
+
+
+def test_stream_last_turn_has_no_question(use_llm):
+    use_llm(StubChatModel(latency=0))
+    session_id = _events(client.post("/start_game/stream", json={"player_name": "sse", "topic": "Streaming"}))[0][1]["session_id"]
+
+    for _ in range(settings.MAX_QUESTIONS):
+        events = _events(client.post("/submit_answer/stream", json={"session_id": session_id, "user_answer": "nada"}))
+    names = [name for name, _ in events]
+    assert "question" not in names
+    assert events[-1][1]["game_over"] is True
+
+    assert client.post("/submit_answer/stream", json={"session_id": session_id, "user_answer": "x"}).status_code == 404
@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+from src.verdict_cache import MemoryBackend, SQLiteBackend, VerdictCache
+
+QUESTION, CORRECT = "¿Quién rescata a Zelda?", "Link"
+
+
+def _exercise(cache: VerdictCache):
+    verdict = {"is_correct": False, "feedback": "Era Link.", "points": 0}
+
+    async def scenario():
+        assert await cache.get(QUESTION, CORRECT, "Mario") is None
+        await cache.set(QUESTION, CORRECT, "Mario", verdict)
+        # Misma pregunta / respuesta con distinto formato -> misma clave
+        assert await cache.get("¿quién rescata a  zelda?", "link", "  MARIO ") == verdict
+        # Mismo texto de pregunta con otra respuesta correcta -> otro veredicto
+        assert await cache.get(QUESTION, "Zelda", "Mario") is None
+
+    asyncio.run(scenario())
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_memory_backend_hits_and_lru_eviction():
+    cache = VerdictCache(MemoryBackend(max_size=2), ttl_seconds=60)
+    _exercise(cache)
+    asyncio.run(cache.set("q2", "c", "a", {"x": 1}))
+    asyncio.run(cache.set("q3", "c", "a", {"x": 1}))
+    assert asyncio.run(cache.get(QUESTION, CORRECT, "Mario")) is None  # desalojada
+
+
+def test_sqlite_backend_persists_and_expires(tmp_path):
+    path = str(tmp_path / "verdicts.db")
+    _exercise(VerdictCache(SQLiteBackend(path, max_size=10), ttl_seconds=60))
+
+    reopened = VerdictCache(SQLiteBackend(path, max_size=10), ttl_seconds=60)
+    assert asyncio.run(reopened.get(QUESTION, CORRECT, "Mario")) is not None
+
+    expiring = VerdictCache(SQLiteBackend(path, max_size=10), ttl_seconds=-1)
+    asyncio.run(expiring.set("q", "c", "a", {"x": 1}))
+    time.sleep(0.01)
+    assert asyncio.run(expiring.get("q", "c", "a")) is None
+
+
+def test_sqlite_backend_prunes_on_an_interval_not_on_every_write(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "verdicts.db"), max_size=2, prune_seconds=3600)
+    for i in range(5):
+        backend.set(f"k{i}", "v", 60)
+    # La primera escritura podó; las siguientes esperan al próximo intervalo
+    assert len(backend) == 5
+
+    eager = SQLiteBackend(str(tmp_path / "eager.db"), max_size=2, prune_seconds=0)
+    for i in range(5):
+        eager.set(f"k{i}", "v", 60)
+    assert len(eager) == 2 and eager.get("k4") == "v"